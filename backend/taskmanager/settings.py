@@ -92,4 +92,56 @@ REST_FRAMEWORK = {
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
     ],
-}
\ No newline at end of file
+}
+# Response cache for the task API. BACKEND is 'local' (per-process LRU),
+# 'django' (uses CACHES[ALIAS]) or None to disable caching. MAX_BYTES caps
+# the encoded responses a local cache holds; larger responses are not cached.
+TASKS_RESULT_CACHE = {
+    'BACKEND': 'local',
+    'MAX_ENTRIES': 256,
+    'MAX_BYTES': 128 * 1024 * 1024,
+    'TIMEOUT': 300,
+}
+
+# Task lists recently POSTed to suggest, kept so later calls can send only
+# the changes against a list_id. Same BACKEND choices as the result cache;
+# MAX_BYTES caps the approximate memory of the lists in a local store.
+TASKS_TASK_LISTS = {
+    'BACKEND': 'local',
+    'MAX_ENTRIES': 32,
+    'MAX_BYTES': 128 * 1024 * 1024,
+    'TIMEOUT': 900,
+}
+
+# Full analyze and dependency-graph results behind paged requests, kept so
+# later pages are served without rescoring. Same BACKEND choices as above;
+# with None every page is computed from the resent tasks. MAX_BYTES caps the
+# approximate memory of the stored results in a local store.
+TASKS_RANKINGS = {
+    'BACKEND': 'local',
+    'MAX_ENTRIES': 16,
+    'MAX_BYTES': 256 * 1024 * 1024,
+    'TIMEOUT': 600,
+}
+
+# Per-request stage timings for the task API (Server-Timing header and
+# 'tasks.timing' log lines). '?profile=1' returns a cProfile summary when
+# TASKS_ALLOW_PROFILING is on.
+TASKS_STAGE_TIMING = False
+TASKS_ALLOW_PROFILING = DEBUG
+
+# Multi-process scoring for very large analyze requests. None keeps scoring
+# in the request thread; a dict enables it, e.g.
+# {'WORKERS': 4, 'CHUNK_SIZE': 50000, 'MIN_TASKS': 100000}. WORKERS
+# defaults to the CPU count; smaller requests are always scored serially.
+TASKS_PARALLEL_SCORING = None
+
+# Per-endpoint limits for the async analyze, suggest and dependency-graph
+# views. Each endpoint runs CPU work on its own pool of CONCURRENCY threads;
+# requests beyond CONCURRENCY + QUEUE get a 429 and requests that wait longer
+# than QUEUE_TIMEOUT seconds for a slot get a 503.
+TASKS_ENDPOINT_LIMITS = {
+    'analyze': {'CONCURRENCY': 2, 'QUEUE': 16, 'QUEUE_TIMEOUT': 10},
+    'suggest': {'CONCURRENCY': 4, 'QUEUE': 64, 'QUEUE_TIMEOUT': 10},
+    'dependency-graph': {'CONCURRENCY': 2, 'QUEUE': 8, 'QUEUE_TIMEOUT': 10},
+}
@@ -1,3 +1,28 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Project, Task, TaskDependency, TaskScore
+
+
+@admin.register(Project)
+class ProjectAdmin(admin.ModelAdmin):
+    list_display = ('name', 'max_blockers', 'scored_on', 'updated_at')
+    search_fields = ('name',)
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('task_id', 'title', 'project', 'due_date', 'importance', 'estimated_hours', 'blocking_count')
+    list_filter = ('project',)
+    search_fields = ('task_id', 'title')
+
+
+@admin.register(TaskDependency)
+class TaskDependencyAdmin(admin.ModelAdmin):
+    list_display = ('task', 'depends_on', 'project')
+    list_filter = ('project',)
+
+
+@admin.register(TaskScore)
+class TaskScoreAdmin(admin.ModelAdmin):
+    list_display = ('task', 'strategy', 'priority_score', 'project')
+    list_filter = ('project', 'strategy')
@@ -0,0 +1,200 @@
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional
+import gc
+import math
+import platform
+import random
+import time
+import tracemalloc
+
+from .scoring import analyze_dependency_graph, analyze_tasks, detect_circular_dependencies, get_top_recommendations
+from .wire import FORMATS, decode_payload, encode_payload, msgpack
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_REPEAT = 5
+
+
+def _task(i: int, rng: random.Random, today: date, dependencies: List[str]) -> Dict:
+    return {
+        'id': f"t{i}",
+        'title': f"Task {i}",
+        'due_date': (today + timedelta(days=rng.randint(-10, 60))).isoformat() if rng.random() < 0.8 else None,
+        'estimated_hours': rng.choice([0.5, 1, 2, 3, 5, 8, 13]),
+        'importance': rng.randint(1, 10),
+        'dependencies': dependencies,
+    }
+
+
+def random_dag(n: int, rng: random.Random, today: date) -> List[Dict]:
+    # Each task depends on up to three earlier tasks, so there are no cycles.
+    return [
+        _task(i, rng, today, [f"t{rng.randrange(i)}" for _ in range(min(i, rng.randint(0, 3)))])
+        for i in range(n)
+    ]
+
+
+def long_chain(n: int, rng: random.Random, today: date) -> List[Dict]:
+    return [_task(i, rng, today, [f"t{i - 1}"] if i else []) for i in range(n)]
+
+
+def wide_fan_in(n: int, rng: random.Random, today: date) -> List[Dict]:
+    # Every task waits on t0, which therefore blocks n - 1 tasks.
+    return [_task(i, rng, today, ["t0"] if i else []) for i in range(n)]
+
+
+def hub_nodes(n: int, rng: random.Random, today: date) -> List[Dict]:
+    hubs = max(1, int(math.sqrt(n)))
+    return [
+        _task(i, rng, today, [f"t{rng.randrange(hubs)}" for _ in range(2)] if i >= hubs else [])
+        for i in range(n)
+    ]
+
+
+def cyclic_graph(n: int, rng: random.Random, today: date) -> List[Dict]:
+    # A random DAG plus roughly one cycle per thousand tasks: follow a
+    # dependency path down from a random task and close it with a back edge.
+    tasks = random_dag(n, rng, today)
+    for _ in range(max(1, n // 1000)):
+        start = node = rng.randrange(n)
+        path = {node}
+        while tasks[node]['dependencies']:
+            node = int(tasks[node]['dependencies'][0][1:])
+            if node in path:
+                break
+            path.add(node)
+        if node != start:
+            tasks[node]['dependencies'].append(f"t{start}")
+    return tasks
+
+
+SHAPES: Dict[str, Callable] = {
+    'random_dag': random_dag,
+    'long_chain': long_chain,
+    'wide_fan_in': wide_fan_in,
+    'hub_nodes': hub_nodes,
+    'cyclic': cyclic_graph,
+}
+
+TARGETS: Dict[str, Callable] = {
+    'analyze_tasks': lambda tasks: analyze_tasks(tasks),
+    'get_top_recommendations': lambda tasks: get_top_recommendations(tasks, limit=10),
+    'detect_circular_dependencies': lambda tasks: detect_circular_dependencies(tasks),
+    'analyze_dependency_graph': lambda tasks: analyze_dependency_graph(tasks),
+}
+
+# Wire format targets encode and decode an analyze response for the tasks,
+# and report the encoded size as output_bytes. PREPARE builds a target's
+# input outside the timed region.
+WIRE_TABLES = (('tasks',),)
+PREPARE: Dict[str, Callable] = {}
+
+
+def _analyze_response(tasks: List[Dict]) -> Dict:
+    return {'strategy': 'smart_balance', 'tasks': analyze_tasks(tasks), 'total_tasks': len(tasks)}
+
+
+for _fmt in FORMATS:
+    if _fmt == 'msgpack' and msgpack is None:
+        continue
+    TARGETS[f'encode_{_fmt}'] = lambda payload, fmt=_fmt: encode_payload(payload, fmt, WIRE_TABLES)
+    TARGETS[f'decode_{_fmt}'] = lambda body, fmt=_fmt: decode_payload(body, fmt, WIRE_TABLES)
+    PREPARE[f'encode_{_fmt}'] = _analyze_response
+    PREPARE[f'decode_{_fmt}'] = lambda tasks, fmt=_fmt: encode_payload(_analyze_response(tasks), fmt, WIRE_TABLES)
+del _fmt
+
+
+def generate_tasks(shape: str, size: int, seed: int = 0) -> List[Dict]:
+    return SHAPES[shape](size, random.Random(seed), date.today())
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def measure(func: Callable, tasks, repeat: int = DEFAULT_REPEAT, size: Optional[int] = None) -> Dict:
+    # Timings and peak memory come from separate runs: tracemalloc slows
+    # allocation-heavy code down several times over. size is the task count
+    # behind a prepared input; it defaults to len(tasks).
+    samples = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        func(tasks)
+        samples.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        output = func(tasks)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    size = len(tasks) if size is None else size
+    p50 = percentile(samples, 50)
+    result = {
+        'repeat': repeat,
+        'p50_ms': round(p50 * 1000, 3),
+        'p99_ms': round(percentile(samples, 99) * 1000, 3),
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 3),
+        'throughput_tasks_per_s': round(size / p50) if p50 else None,
+        'peak_memory_bytes': peak,
+    }
+    if isinstance(output, bytes):
+        result['output_bytes'] = len(output)
+    return result
+
+
+def run_benchmarks(shapes=None, sizes=DEFAULT_SIZES, targets=None, repeat: int = DEFAULT_REPEAT,
+                   seed: int = 0, progress: Optional[Callable] = None) -> Dict:
+    results = []
+    for shape in shapes or SHAPES:
+        for size in sizes:
+            tasks = generate_tasks(shape, size, seed)
+            for name in targets or TARGETS:
+                data = PREPARE[name](tasks) if name in PREPARE else tasks
+                result = {'shape': shape, 'size': size, 'target': name, **measure(TARGETS[name], data, repeat, size)}
+                results.append(result)
+                if progress:
+                    progress(result)
+
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': numpy_version,
+            'msgpack': '.'.join(map(str, msgpack.version)) if msgpack is not None else None,
+            'platform': platform.platform(),
+            'date': date.today().isoformat(),
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def compare_results(baseline: Dict, current: Dict, threshold: float = 1.2) -> List[Dict]:
+    # Cases whose p50 grew by more than ``threshold`` times the baseline.
+    def key(result):
+        return result['shape'], result['size'], result['target']
+
+    previous = {key(result): result for result in baseline.get('results', [])}
+    regressions = []
+    for result in current['results']:
+        before = previous.get(key(result))
+        if before and before['p50_ms'] and result['p50_ms'] > before['p50_ms'] * threshold:
+            regressions.append({
+                'shape': result['shape'],
+                'size': result['size'],
+                'target': result['target'],
+                'baseline_p50_ms': before['p50_ms'],
+                'p50_ms': result['p50_ms'],
+                'ratio': round(result['p50_ms'] / before['p50_ms'], 2),
+            })
+    return regressions
@@ -0,0 +1,253 @@
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Hashable, Iterable, List, Optional
+import hashlib
+import json
+import sys
+import threading
+
+DEFAULT_CACHE_SETTINGS = {
+    'BACKEND': 'local',
+    'MAX_ENTRIES': 256,
+    'MAX_BYTES': 128 * 1024 * 1024,
+    'TIMEOUT': 300,
+    'ALIAS': 'default',
+    'KEY_PREFIX': 'tasks-result',
+}
+
+DEFAULT_TASK_LIST_SETTINGS = {
+    'BACKEND': 'local',
+    'MAX_ENTRIES': 32,
+    'MAX_BYTES': 128 * 1024 * 1024,
+    'TIMEOUT': 900,
+    'ALIAS': 'default',
+    'KEY_PREFIX': 'tasks-list',
+}
+
+DEFAULT_RANKING_SETTINGS = {
+    'BACKEND': 'local',
+    'MAX_ENTRIES': 16,
+    'MAX_BYTES': 256 * 1024 * 1024,
+    'TIMEOUT': 600,
+    'ALIAS': 'default',
+    'KEY_PREFIX': 'tasks-ranking',
+}
+
+
+def digest(value: Any, raw: Optional[bytes] = None) -> str:
+    # ``raw`` bytes, such as a request body, are hashed as sent after the
+    # canonical form of ``value``.
+    canonical = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    hasher = hashlib.sha256(canonical.encode())
+    if raw is not None:
+        hasher.update(b'\n')
+        hasher.update(raw)
+    return hasher.hexdigest()
+
+
+def approximate_size(rows: List[Dict], samples: int = 64) -> int:
+    # In-memory size of a list of flat dicts, scaled up from evenly spaced
+    # sample rows: each dict, its values and the items of list values. Keys
+    # are shared between rows and not counted.
+    if not rows:
+        return sys.getsizeof(rows)
+    sampled = rows[::max(1, len(rows) // samples)]
+    total = 0
+    for row in sampled:
+        total += sys.getsizeof(row)
+        for value in row.values():
+            total += sys.getsizeof(value)
+            if isinstance(value, list):
+                total += sum(map(sys.getsizeof, value))
+    return sys.getsizeof(rows) + total * len(rows) // len(sampled)
+
+
+class LocalCacheBackend:
+    # LRU bounded by entry count and, when max_bytes is set, by the total
+    # size callers report for their values. A value larger than the whole
+    # budget is not stored.
+    def __init__(self, max_entries: int = 256, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, now: float) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value, size = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.nbytes -= size
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, timeout: float, now: float, size: int = 0) -> None:
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.nbytes -= previous[2]
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._entries[key] = (now + timeout, value, size)
+            self.nbytes += size
+            while len(self._entries) > self.max_entries or (
+                    self.max_bytes is not None and self.nbytes > self.max_bytes):
+                self.nbytes -= self._entries.popitem(last=False)[1][2]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DjangoCacheBackend:
+    def __init__(self, alias: str = 'default'):
+        from django.core.cache import caches
+        self._cache = caches[alias]
+
+    def get(self, key: str, now: float) -> Any:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: Any, timeout: float, now: float, size: int = 0) -> None:
+        # The Django cache enforces its own size limits.
+        self._cache.set(key, value, timeout=max(1, int(timeout)))
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+class ResultCache:
+    def __init__(self, backend, timeout: float = 300, key_prefix: str = 'tasks-result'):
+        self.backend = backend
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def make_key(self, endpoint: str, tasks: Any, scoring_date: Optional[date] = None, **params: Hashable) -> str:
+        # Scores depend on date.today(), so the scoring date is part of the key
+        # and identical payloads never share results across days. ``tasks``
+        # may be the raw request body as bytes, which is hashed as sent
+        # instead of re-serializing the parsed tasks; only byte-identical
+        # bodies then share a key.
+        scoring_date = scoring_date or date.today()
+        key = [endpoint, scoring_date.isoformat(), params]
+        if isinstance(tasks, bytes):
+            return f"{self.key_prefix}:{endpoint}:{digest(key, tasks)}"
+        return f"{self.key_prefix}:{endpoint}:{digest(key + [tasks])}"
+
+    def get(self, key: str) -> Any:
+        value = self.backend.get(key, datetime.now().timestamp())
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, size: int = 0) -> None:
+        # ``size`` is the value's size in bytes, for backends with a budget.
+        now = datetime.now()
+        midnight = datetime.combine(now.date() + timedelta(days=1), time.min)
+        timeout = min(self.timeout, (midnight - now).total_seconds())
+        self.backend.set(key, value, timeout, now.timestamp(), size)
+
+    def clear(self) -> None:
+        self.backend.clear()
+        with self._stats_lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+def build_result_cache(config: Optional[Dict] = None) -> Optional[ResultCache]:
+    config = {**DEFAULT_CACHE_SETTINGS, **(config or {})}
+    backend_name = config['BACKEND']
+
+    if not backend_name:
+        return None
+    if backend_name == 'local':
+        backend = LocalCacheBackend(config['MAX_ENTRIES'], config['MAX_BYTES'])
+    elif backend_name == 'django':
+        backend = DjangoCacheBackend(config['ALIAS'])
+    else:
+        raise ValueError(f"Unknown result cache backend: {backend_name}")
+
+    return ResultCache(backend, config['TIMEOUT'], config['KEY_PREFIX'])
+
+
+class ExpiringStore:
+    # Values kept for a while under a digest, so later requests can refer
+    # to them by id: task lists recently sent to the API, so a client can
+    # send only what changed since, and computed rankings, so later pages
+    # are cut from them without rescoring. A task list id is a digest of the
+    # request body that sent the list or of (base list id, changes), so equal
+    # requests get equal ids and the result cache can key on the id instead
+    # of the whole list. Callers pass each value's approximate size for the
+    # MAX_BYTES budget.
+    def __init__(self, backend, timeout: float = 900, key_prefix: str = 'tasks-list'):
+        self.backend = backend
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+
+    def get(self, key: str) -> Any:
+        return self.backend.get(f"{self.key_prefix}:{key}", datetime.now().timestamp())
+
+    def set(self, key: str, value: Any, size: int = 0) -> None:
+        self.backend.set(f"{self.key_prefix}:{key}", value, self.timeout, datetime.now().timestamp(), size)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+def apply_task_changes(base: Iterable[Dict], upsert: Iterable[Dict] = (), remove: Iterable = ()) -> List[Dict]:
+    # Upserted tasks replace the base task with the same id in place or are
+    # appended; removed ids are dropped. Ids compare as given, so 1 and "1"
+    # are different tasks, as everywhere else.
+    tasks = {task['id']: task for task in base}
+    for task in upsert:
+        tasks[task['id']] = task
+    for task_id in remove:
+        tasks.pop(task_id, None)
+    return list(tasks.values())
+
+
+def _build_store(config: Dict, label: str) -> Optional[ExpiringStore]:
+    backend_name = config['BACKEND']
+
+    if not backend_name:
+        return None
+    if backend_name == 'local':
+        backend = LocalCacheBackend(config['MAX_ENTRIES'], config.get('MAX_BYTES'))
+    elif backend_name == 'django':
+        backend = DjangoCacheBackend(config['ALIAS'])
+    else:
+        raise ValueError(f"Unknown {label} backend: {backend_name}")
+
+    return ExpiringStore(backend, config['TIMEOUT'], config['KEY_PREFIX'])
+
+
+def build_task_lists(config: Optional[Dict] = None) -> Optional[ExpiringStore]:
+    return _build_store({**DEFAULT_TASK_LIST_SETTINGS, **(config or {})}, 'task list')
+
+
+def build_rankings(config: Optional[Dict] = None) -> Optional[ExpiringStore]:
+    return _build_store({**DEFAULT_RANKING_SETTINGS, **(config or {})}, 'ranking')
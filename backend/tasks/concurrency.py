@@ -0,0 +1,111 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import Callable, Dict, Optional
+import asyncio
+import contextvars
+import threading
+
+from django.db import close_old_connections
+from django.http import JsonResponse
+
+DEFAULT_LIMIT_SETTINGS = {
+    'CONCURRENCY': 2,
+    'QUEUE': 16,
+    'QUEUE_TIMEOUT': 10,
+}
+
+DEFAULT_ENDPOINT_LIMITS = {
+    'analyze': {'CONCURRENCY': 2, 'QUEUE': 16},
+    'suggest': {'CONCURRENCY': 4, 'QUEUE': 64},
+    'dependency-graph': {'CONCURRENCY': 2, 'QUEUE': 8},
+}
+
+# Each endpoint gets its own executor, so a burst of large dependency-graph
+# requests queues behind itself instead of in front of small suggest calls.
+# CONCURRENCY bounds requests running at once, QUEUE bounds requests waiting
+# for a slot (429 beyond that), and QUEUE_TIMEOUT bounds how long a request
+# may wait before it is dropped with a 503. Running work is never cancelled.
+# Worker threads sit outside the request_started/request_finished signals,
+# so each job closes stale database connections itself, as Django does
+# around a request.
+
+
+class Saturated(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _run_closing_connections(func: Callable, *args, **kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+class EndpointLimiter:
+    def __init__(self, name: str, concurrency: int = 2, queue: int = 16, queue_timeout: float = 10):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.queue = max(0, queue)
+        self.queue_timeout = queue_timeout
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix=f'tasks-{name}')
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def run(self, func: Callable, *args, **kwargs):
+        with self._lock:
+            if self._in_flight >= self.concurrency + self.queue:
+                raise Saturated(429, f"Too many concurrent {self.name} requests")
+            self._in_flight += 1
+
+        try:
+            context = contextvars.copy_context()
+            future = self.executor.submit(context.run, _run_closing_connections, func, *args, **kwargs)
+            result = asyncio.wrap_future(future)
+            try:
+                return await asyncio.wait_for(asyncio.shield(result), self.queue_timeout)
+            except asyncio.TimeoutError:
+                # Only work that has not started yet can be cancelled.
+                if future.cancel():
+                    raise Saturated(503, f"Timed out waiting for a {self.name} worker")
+                return await result
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False)
+
+
+def build_limiters(config: Optional[Dict[str, Dict]] = None) -> Dict[str, EndpointLimiter]:
+    config = {**DEFAULT_ENDPOINT_LIMITS, **(config or {})}
+    limiters = {}
+    for name, overrides in config.items():
+        options = {**DEFAULT_LIMIT_SETTINGS, **DEFAULT_ENDPOINT_LIMITS.get(name, {}), **(overrides or {})}
+        limiters[name] = EndpointLimiter(name, options['CONCURRENCY'], options['QUEUE'], options['QUEUE_TIMEOUT'])
+    return limiters
+
+
+def offload(limiter: EndpointLimiter):
+    # Turns a sync view into an async one that runs on the limiter's
+    # executor, so the event loop only waits and stays free for other
+    # requests. Attributes such as csrf_exempt carry over through wraps.
+    def decorator(view):
+        @wraps(view)
+        async def wrapped(request, *args, **kwargs):
+            try:
+                return await limiter.run(view, request, *args, **kwargs)
+            except Saturated as e:
+                response = JsonResponse({"error": str(e)}, status=e.status)
+                response['Retry-After'] = '1'
+                return response
+
+        return wrapped
+
+    return decorator
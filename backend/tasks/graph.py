@@ -0,0 +1,274 @@
+from array import array
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Events emitted by depth_first_events. Traversal is driven by an explicit
+# stack so chains of any length stay within O(V + E) and never touch the
+# interpreter recursion limit.
+ENTER = 0
+EDGE = 1
+EXIT = 2
+
+# Nodes whose slack is within this many hours of zero count as critical;
+# absorbs float error from summing durations along different paths.
+SLACK_TOLERANCE = 1e-9
+
+
+def index_graph(graph: Dict) -> Tuple[List[Hashable], List[List[int]]]:
+    # {id: [dependency ids]} -> (ids, adjacency over node numbers). Targets
+    # that are not keys of ``graph`` are dropped.
+    ids = list(graph)
+    index = {node: k for k, node in enumerate(ids)}
+    adjacency = [[index[t] for t in targets if t in index] for targets in graph.values()]
+    return ids, adjacency
+
+
+def depth_first_events(adjacency: List[List[int]], roots: Optional[Iterable[int]] = None) -> Iterator[Tuple[int, int, int]]:
+    # ENTER (node, parent) on discovery, EDGE (node, target) for edges into an
+    # already discovered node, EXIT (node, parent) once all children are done.
+    # Nodes are 0..len(adjacency) - 1; a root's parent is -1.
+    visited = bytearray(len(adjacency))
+    for root in (range(len(adjacency)) if roots is None else roots):
+        if visited[root]:
+            continue
+        visited[root] = 1
+        yield ENTER, root, -1
+        stack = [(root, iter(adjacency[root]))]
+        while stack:
+            node, children = stack[-1]
+            for nxt in children:
+                if visited[nxt]:
+                    yield EDGE, node, nxt
+                else:
+                    visited[nxt] = 1
+                    yield ENTER, nxt, node
+                    stack.append((nxt, iter(adjacency[nxt])))
+                    break
+            else:
+                stack.pop()
+                yield EXIT, node, stack[-1][0] if stack else -1
+
+
+def indexed_cycles(adjacency: List[List[int]], first_only: bool = False) -> List[List[int]]:
+    path = []
+    position = array('l', [-1]) * len(adjacency)
+    cycles = []
+
+    for event, node, other in depth_first_events(adjacency):
+        if event == ENTER:
+            position[node] = len(path)
+            path.append(node)
+        elif event == EDGE:
+            start = position[other]
+            if start >= 0:
+                cycles.append(path[start:] + [other])
+                if first_only:
+                    break
+        else:
+            path.pop()
+            position[node] = -1
+
+    return cycles
+
+
+def indexed_components(adjacency: List[List[int]]) -> List[List[int]]:
+    # Tarjan's algorithm on top of depth_first_events.
+    n = len(adjacency)
+    index = array('l', [-1]) * n
+    lowlink = array('l', [0]) * n
+    on_stack = bytearray(n)
+    stack = []
+    sccs = []
+    counter = 0
+
+    for event, node, other in depth_first_events(adjacency):
+        if event == ENTER:
+            index[node] = lowlink[node] = counter
+            counter += 1
+            stack.append(node)
+            on_stack[node] = 1
+        elif event == EDGE:
+            if on_stack[other] and index[other] < lowlink[node]:
+                lowlink[node] = index[other]
+        else:
+            if lowlink[node] == index[node]:
+                comp = []
+                while True:
+                    v = stack.pop()
+                    on_stack[v] = 0
+                    comp.append(v)
+                    if v == node:
+                        break
+                sccs.append(comp)
+            if other >= 0 and lowlink[node] < lowlink[other]:
+                lowlink[other] = lowlink[node]
+
+    return sccs
+
+
+def find_cycles(graph: Dict, first_only: bool = False) -> List[List[Hashable]]:
+    ids, adjacency = index_graph(graph)
+    return [[ids[k] for k in cycle] for cycle in indexed_cycles(adjacency, first_only)]
+
+
+def strongly_connected_components(graph: Dict) -> List[List[Hashable]]:
+    ids, adjacency = index_graph(graph)
+    return [[ids[k] for k in comp] for comp in indexed_components(adjacency)]
+
+
+def topological_order(adjacency: List[List[int]]) -> Optional[List[int]]:
+    # Kahn's algorithm: every node comes after all of its targets. Returns
+    # None if the graph has a cycle.
+    n = len(adjacency)
+    pending = array('l', [len(targets) for targets in adjacency])
+    dependents = [[] for _ in range(n)]
+    for node, targets in enumerate(adjacency):
+        for target in targets:
+            dependents[target].append(node)
+
+    order = [node for node in range(n) if not pending[node]]
+    for node in order:
+        for dependent in dependents[node]:
+            pending[dependent] -= 1
+            if not pending[dependent]:
+                order.append(dependent)
+    return order if len(order) == n else None
+
+
+def critical_path_schedule(adjacency: List[List[int]], durations) -> Optional[Dict]:
+    # Critical path method over a DAG whose edges point from a node to the
+    # nodes that must finish before it starts. Returns the topological order,
+    # per-node earliest/latest start and finish, the total duration and one
+    # critical path in execution order, or None if the graph has a cycle.
+    order = topological_order(adjacency)
+    if order is None:
+        return None
+
+    n = len(adjacency)
+    earliest_start = array('d', [0.0]) * n
+    earliest_finish = array('d', [0.0]) * n
+    for node in order:
+        start = 0.0
+        for target in adjacency[node]:
+            if earliest_finish[target] > start:
+                start = earliest_finish[target]
+        earliest_start[node] = start
+        earliest_finish[node] = start + durations[node]
+
+    total = max(earliest_finish) if n else 0.0
+    latest_start = array('d', [0.0]) * n
+    latest_finish = array('d', [total]) * n
+    for node in reversed(order):
+        latest_start[node] = start = latest_finish[node] - durations[node]
+        for target in adjacency[node]:
+            if start < latest_finish[target]:
+                latest_finish[target] = start
+
+    # Walk back from a critical sink along zero-slack predecessors that
+    # finish exactly when the current node can start.
+    path = []
+    node = max(range(n), key=earliest_finish.__getitem__) if n else None
+    while node is not None:
+        path.append(node)
+        start = earliest_start[node]
+        node = next((target for target in adjacency[node]
+                     if earliest_finish[target] == start
+                     and latest_start[target] - earliest_start[target] <= SLACK_TOLERANCE), None)
+    path.reverse()
+
+    return {
+        'order': order,
+        'earliest_start': earliest_start,
+        'earliest_finish': earliest_finish,
+        'latest_start': latest_start,
+        'latest_finish': latest_finish,
+        'total_duration': total,
+        'critical_path': path,
+    }
+
+
+# int.bit_count is Python 3.10+.
+_popcount = getattr(int, 'bit_count', None) or (lambda bits: bin(bits).count('1'))
+
+# Bit offsets set in each byte value, for walking a bitset a byte at a time.
+_BYTE_BITS = [tuple(k for k in range(8) if value >> k & 1) for value in range(256)]
+
+
+def _bitset_summer(weights: Sequence[float]):
+    # Returns a function summing ``weights[k]`` over the set bits k of an int
+    # bitset. With NumPy the bits are unpacked and dotted with the weights;
+    # otherwise each set bit is visited once through its byte.
+    n = len(weights)
+    size = (n + 7) // 8
+    if np is not None:
+        column = np.asarray(weights, dtype=float)
+
+        def total(bits):
+            unpacked = np.unpackbits(np.frombuffer(bits.to_bytes(size, 'little'), dtype=np.uint8),
+                                     count=n, bitorder='little')
+            return float(unpacked @ column)
+        return total
+
+    def total(bits):
+        result = 0
+        for k, byte in enumerate(bits.to_bytes(size, 'little')):
+            if byte:
+                base = k * 8
+                for offset in _BYTE_BITS[byte]:
+                    result += weights[base + offset]
+        return result
+    return total
+
+
+def descendant_weights(adjacency: List[List[int]], weights: Optional[Sequence[float]] = None
+                       ) -> Optional[Tuple[List[int], List[float]]]:
+    # For every node: how many distinct nodes transitively point to it, and
+    # the sum of ``weights`` over those nodes (the count again if None).
+    # Returns None if the graph has a cycle.
+    #
+    # Reachability sets are int bitsets built in one pass over the reversed
+    # topological order: a node's set is the union of its direct sources'
+    # sets plus their own bits. Bit k stands for the k-th node visited, so a
+    # set never spans more than the nodes visited before it, and each set is
+    # dropped once every node it feeds has been visited. Weighted sums
+    # visit each set's bits once, against the weights in visiting order.
+    order = topological_order(adjacency)
+    if order is None:
+        return None
+
+    n = len(adjacency)
+    order.reverse()
+    position = array('l', [0]) * n
+    for k, node in enumerate(order):
+        position[node] = k
+
+    sources = [[] for _ in range(n)]
+    for node, targets in enumerate(adjacency):
+        for target in targets:
+            sources[target].append(node)
+
+    weighted_sum = _bitset_summer([weights[node] for node in order]) if weights is not None else None
+
+    pending = array('l', [len(targets) for targets in adjacency])
+    reach = {}
+    counts = [0] * n
+    totals = [0] * n
+    for node in order:
+        bits = 0
+        for source in sources[node]:
+            bits |= reach[source] | (1 << position[source])
+            pending[source] -= 1
+            if not pending[source]:
+                del reach[source]
+        if pending[node]:
+            reach[node] = bits
+        counts[node] = _popcount(bits)
+        if weights is None:
+            totals[node] = counts[node]
+        elif bits:
+            totals[node] = weighted_sum(bits)
+    return counts, totals
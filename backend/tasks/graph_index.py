@@ -0,0 +1,443 @@
+from collections import OrderedDict
+from itertools import chain
+from typing import Dict, Hashable, Iterable, List, Optional, Set
+import threading
+import uuid
+
+from .graph import strongly_connected_components
+from .scoring import _get_node_group, analyze_dependency_graph
+
+# A GraphIndex holds one project's dependency graph between requests so an
+# edit only touches the nodes, edges and circular components it affects.
+# Nodes and edges have the same shape and semantics as in
+# analyze_dependency_graph: dependencies on ids that are not in the graph
+# count towards total_dependencies and the 'has dependencies' groups but
+# produce no edge, and an edge is red when both ends share a cycle.
+#
+# Indexes are process-local working copies held in an LRU registry. Writes
+# through tasks.store drop the project's index so it is reseeded from the
+# stored tasks on next use; edits through the index are not persisted.
+# Every index has a version, unique to this copy and bumped by each applied
+# batch of ops, so a client holding a snapshot can tell when the copy it
+# built on was replaced, evicted, edited by someone else or lives in
+# another worker process.
+
+MAX_INDEXED_PROJECTS = 64
+
+CIRCULAR_EDGE_COLOR = {'color': '#e63946'}
+EDGE_COLOR = {'color': '#2B7CE9'}
+
+OPS = ('upsert_task', 'remove_task', 'add_edge', 'remove_edge')
+
+# Neighborhoods: the tasks a focus task depends on, the tasks that depend on
+# it, both, or every task connected to it in either direction.
+DIRECTIONS = ('upstream', 'downstream', 'both', 'component')
+
+
+class GraphIndex:
+    def __init__(self, tasks: Iterable[Dict] = ()):
+        self.labels: Dict[Hashable, str] = {}
+        self.deps: Dict[Hashable, Dict[Hashable, None]] = {}
+        self.dependents: Dict[Hashable, Set[Hashable]] = {}
+        self.component: Dict[Hashable, int] = {}
+        self.components: Dict[int, List[Hashable]] = {}
+        self.total_dependencies = 0
+        self.lock = threading.Lock()
+        self._copy = uuid.uuid4().hex
+        self._revision = 0
+        self._next_component = 0
+        self._touched_nodes = None
+        self._touched_edges = None
+        self._cycles_changed = False
+
+        # Same duplicate-id rules as analyze_dependency_graph: the first row
+        # names the task, the last row's dependencies win.
+        for task in tasks:
+            task_id = task['id']
+            self.labels.setdefault(task_id, task['title'])
+            self.deps[task_id] = dict.fromkeys(task.get('dependencies') or ())
+        for task_id, deps in self.deps.items():
+            self.total_dependencies += len(deps)
+            for dep in deps:
+                self.dependents.setdefault(dep, set()).add(task_id)
+        graph = {task_id: list(deps) for task_id, deps in self.deps.items()}
+        for comp in strongly_connected_components(graph):
+            if len(comp) > 1:
+                self._add_component(comp)
+
+    @property
+    def version(self) -> str:
+        return f"{self._copy}.{self._revision}"
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def node(self, task_id: Hashable) -> Optional[Dict]:
+        if task_id not in self.labels:
+            return None
+        blocks = self._blocks(task_id)
+        return {
+            'id': task_id,
+            'label': self.labels[task_id],
+            'group': _get_node_group(blocks, bool(self.deps[task_id])),
+            'value': blocks + 1,
+            'title': f"Blocks {blocks} tasks"
+        }
+
+    def edge(self, dep: Hashable, task_id: Hashable) -> Optional[Dict]:
+        if task_id not in self.labels or dep not in self.labels or dep not in self.deps[task_id]:
+            return None
+        component = self.component.get(task_id)
+        circular = component is not None and self.component.get(dep) == component
+        return {
+            'from': dep,
+            'to': task_id,
+            'arrows': 'to',
+            'color': CIRCULAR_EDGE_COLOR if circular else EDGE_COLOR
+        }
+
+    def as_tasks(self) -> List[Dict]:
+        return [
+            {'id': task_id, 'title': label, 'dependencies': list(self.deps[task_id])}
+            for task_id, label in self.labels.items()
+        ]
+
+    def snapshot(self) -> Dict:
+        return analyze_dependency_graph(self.as_tasks())
+
+    def neighborhood(self, focus: Hashable, depth: Optional[int] = None, direction: str = 'both') -> Dict:
+        # The subgraph within ``depth`` hops of ``focus`` (unbounded with
+        # None), walked breadth-first from the focus only, so the work and
+        # the result scale with the neighborhood rather than the project.
+        # Nodes and edges render as in snapshot(), with the blocking counts
+        # of the whole graph; edges are those between included tasks, and
+        # circular_dependencies lists the cycles visible in the subgraph.
+        # Raises KeyError for an unknown focus.
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Direction must be one of: {', '.join(DIRECTIONS)}")
+        if depth is not None and depth < 0:
+            raise ValueError("Depth must be at least 0")
+        if focus not in self.labels:
+            raise KeyError(focus)
+
+        if direction == 'component':
+            steps = [lambda task_id: chain(self._forward(task_id), self._backward(task_id))]
+        else:
+            steps = [step for step, name in ((self._forward, 'upstream'), (self._backward, 'downstream'))
+                     if direction in (name, 'both')]
+        included = {}
+        for step in steps:
+            included.update(self._within(focus, step, depth))
+
+        edges = [self.edge(dep, task_id) for task_id in included for dep in self.deps[task_id] if dep in included]
+        cycles = {}
+        for task_id in included:
+            if task_id in self.component:
+                cycles.setdefault(self.component[task_id], []).append(task_id)
+        circular = [members for members in cycles.values() if len(members) > 1]
+        return {
+            'nodes': [self.node(task_id) for task_id in included],
+            'edges': edges,
+            'analysis': {
+                'focus': focus,
+                'direction': direction,
+                'depth': depth,
+                'total_tasks': len(included),
+                'total_edges': len(edges),
+                'circular_dependencies': circular,
+                'cycle_count': len(circular)
+            }
+        }
+
+    def apply(self, ops: List[Dict]) -> Dict:
+        # Applies ops in order and returns the nodes and edges whose
+        # rendering changed. The analysis carries circular_dependencies only
+        # when cycle membership changed. Ops are checked against the graph as
+        # it will be when they run, before anything is modified, so a bad
+        # batch changes nothing.
+        self._check_ops(ops)
+        self._touched_nodes = {}
+        self._touched_edges = {}
+        self._cycles_changed = False
+        try:
+            for op in ops:
+                kind = op['op']
+                if kind == 'upsert_task':
+                    task = op['task']
+                    self._upsert_task(task['id'], task['title'], task.get('dependencies') or ())
+                elif kind == 'remove_task':
+                    self._remove_task(op['id'])
+                elif kind == 'add_edge':
+                    self._add_edge(op['task'], op['depends_on'])
+                else:
+                    self._remove_edge(op['task'], op['depends_on'])
+            self._revision += 1
+            return self._delta()
+        finally:
+            self._touched_nodes = None
+            self._touched_edges = None
+
+    def _check_ops(self, ops: List[Dict]) -> None:
+        if not isinstance(ops, list):
+            raise ValueError("Ops must be a list")
+        # Ids added or removed by earlier ops in the batch, so the check does
+        # not copy the whole label map.
+        pending = {}
+
+        def present(task_id):
+            return pending.get(task_id, task_id in self.labels)
+
+        for position, op in enumerate(ops, 1):
+            kind = op.get('op') if isinstance(op, dict) else None
+            if kind not in OPS:
+                raise ValueError(f"Op #{position}: op must be one of {', '.join(OPS)}")
+            if kind == 'upsert_task':
+                task = op.get('task')
+                if not isinstance(task, dict) or 'id' not in task or 'title' not in task:
+                    raise ValueError(f"Op #{position}: task must have id and title")
+                if not isinstance(task.get('dependencies', []), list):
+                    raise ValueError(f"Op #{position}: dependencies must be a list")
+                pending[task['id']] = True
+            elif kind == 'remove_task':
+                if not present(op.get('id')):
+                    raise ValueError(f"Op #{position}: unknown task {op.get('id')!r}")
+                pending[op['id']] = False
+            elif not present(op.get('task')) or 'depends_on' not in op:
+                raise ValueError(f"Op #{position}: edge ops need a known task and depends_on")
+
+    def _blocks(self, task_id: Hashable) -> int:
+        return len(self.dependents.get(task_id, ()))
+
+    def _touch_node(self, task_id: Hashable) -> None:
+        if task_id not in self._touched_nodes:
+            self._touched_nodes[task_id] = self.node(task_id)
+
+    def _touch_edge(self, dep: Hashable, task_id: Hashable) -> None:
+        if (dep, task_id) not in self._touched_edges:
+            self._touched_edges[(dep, task_id)] = self.edge(dep, task_id)
+
+    def _touch_component(self, members: Iterable[Hashable]) -> None:
+        members = set(members)
+        for task_id in members:
+            for dep in self.deps.get(task_id, ()):
+                if dep in members:
+                    self._touch_edge(dep, task_id)
+
+    def _delta(self) -> Dict:
+        upserted_nodes, removed_nodes = [], []
+        for task_id, before in self._touched_nodes.items():
+            after = self.node(task_id)
+            if after is None:
+                if before is not None:
+                    removed_nodes.append(task_id)
+            elif after != before:
+                upserted_nodes.append(after)
+
+        upserted_edges, removed_edges = [], []
+        for (dep, task_id), before in self._touched_edges.items():
+            after = self.edge(dep, task_id)
+            if after is None:
+                if before is not None:
+                    removed_edges.append({'from': dep, 'to': task_id})
+            elif after != before:
+                upserted_edges.append(after)
+
+        analysis = {
+            'total_tasks': len(self.labels),
+            'total_dependencies': self.total_dependencies,
+            'cycle_count': len(self.components)
+        }
+        if self._cycles_changed:
+            analysis['circular_dependencies'] = list(self.components.values())
+
+        return {
+            'nodes': {'upserted': upserted_nodes, 'removed': removed_nodes},
+            'edges': {'upserted': upserted_edges, 'removed': removed_edges},
+            'analysis': analysis
+        }
+
+    def _upsert_task(self, task_id: Hashable, title: str, dependencies: Iterable[Hashable]) -> None:
+        self._touch_node(task_id)
+        wanted = dict.fromkeys(dependencies)
+        if task_id in self.labels:
+            self.labels[task_id] = title
+            for dep in [dep for dep in self.deps[task_id] if dep not in wanted]:
+                self._remove_edge(task_id, dep)
+        else:
+            # Tasks that already listed this id now have a real edge to it.
+            dependents = [dependent for dependent in self.dependents.get(task_id, ()) if dependent in self.labels]
+            for dependent in dependents:
+                self._touch_edge(task_id, dependent)
+            self.labels[task_id] = title
+            self.deps[task_id] = {}
+            for dependent in dependents:
+                self._join_cycles(dependent, task_id)
+        for dep in wanted:
+            self._add_edge(task_id, dep)
+
+    def _remove_task(self, task_id: Hashable) -> None:
+        self._touch_node(task_id)
+        for dep in list(self.deps[task_id]):
+            self._remove_edge(task_id, dep)
+        for dependent in self.dependents.get(task_id, ()):
+            self._touch_edge(task_id, dependent)
+        component = self.component.get(task_id)
+        del self.labels[task_id]
+        del self.deps[task_id]
+        if component is not None:
+            self._split_component(component)
+
+    def _add_edge(self, task_id: Hashable, dep: Hashable) -> None:
+        deps = self.deps[task_id]
+        if dep in deps:
+            return
+        self._touch_node(task_id)
+        self._touch_node(dep)
+        self._touch_edge(dep, task_id)
+        deps[dep] = None
+        self.dependents.setdefault(dep, set()).add(task_id)
+        self.total_dependencies += 1
+        if dep in self.labels:
+            self._join_cycles(task_id, dep)
+
+    def _remove_edge(self, task_id: Hashable, dep: Hashable) -> None:
+        deps = self.deps[task_id]
+        if dep not in deps:
+            return
+        self._touch_node(task_id)
+        self._touch_node(dep)
+        self._touch_edge(dep, task_id)
+        del deps[dep]
+        dependents = self.dependents[dep]
+        dependents.discard(task_id)
+        if not dependents:
+            del self.dependents[dep]
+        self.total_dependencies -= 1
+        component = self.component.get(task_id)
+        if component is not None and self.component.get(dep) == component:
+            self._split_component(component)
+
+    def _add_component(self, members: List[Hashable]) -> None:
+        component = self._next_component
+        self._next_component += 1
+        self._cycles_changed = True
+        self.components[component] = members
+        for task_id in members:
+            self.component[task_id] = component
+
+    def _drop_component(self, component: int) -> List[Hashable]:
+        members = self.components.pop(component)
+        self._cycles_changed = True
+        for task_id in members:
+            del self.component[task_id]
+        return members
+
+    def _join_cycles(self, task_id: Hashable, dep: Hashable) -> None:
+        # The new edge task_id -> dep closes a cycle iff task_id is reachable
+        # from dep. The two searches advance in turns so the cost is bounded
+        # by the smaller side; only when they meet are the full forward and
+        # backward sets walked to find the merged component.
+        # A self-dependency is a single-node component, which the full
+        # analysis does not report as circular either.
+        component = self.component.get(task_id)
+        if task_id == dep or component is not None and self.component.get(dep) == component:
+            return
+        if not self._reaches(dep, task_id):
+            return
+
+        forward = self._reachable(dep, self._forward)
+        backward = self._reachable(task_id, self._backward)
+        members = [node for node in forward if node in backward]
+        self._touch_component(members)
+        for component in {self.component[node] for node in members if node in self.component}:
+            self._drop_component(component)
+        self._add_component(members)
+
+    def _split_component(self, component: int) -> None:
+        # Re-run Tarjan on the component's remaining members only.
+        members = [task_id for task_id in self.components[component] if task_id in self.labels]
+        self._touch_component(members)
+        self._drop_component(component)
+        inside = set(members)
+        graph = {task_id: [dep for dep in self.deps[task_id] if dep in inside] for task_id in members}
+        for comp in strongly_connected_components(graph):
+            if len(comp) > 1:
+                self._add_component(comp)
+
+    def _forward(self, task_id: Hashable) -> Iterable[Hashable]:
+        return (dep for dep in self.deps.get(task_id, ()) if dep in self.labels)
+
+    def _backward(self, task_id: Hashable) -> Iterable[Hashable]:
+        return (dependent for dependent in self.dependents.get(task_id, ()) if dependent in self.labels)
+
+    def _reachable(self, start: Hashable, step) -> Dict[Hashable, None]:
+        seen = {start: None}
+        stack = [start]
+        while stack:
+            for nxt in step(stack.pop()):
+                if nxt not in seen:
+                    seen[nxt] = None
+                    stack.append(nxt)
+        return seen
+
+    def _within(self, start: Hashable, step, depth: Optional[int]) -> Dict[Hashable, None]:
+        # Like _reachable, level by level, stopping after ``depth`` levels.
+        seen = {start: None}
+        frontier = [start]
+        while frontier and depth != 0:
+            depth = None if depth is None else depth - 1
+            next_frontier = []
+            for task_id in frontier:
+                for nxt in step(task_id):
+                    if nxt not in seen:
+                        seen[nxt] = None
+                        next_frontier.append(nxt)
+            frontier = next_frontier
+        return seen
+
+    def _reaches(self, source: Hashable, target: Hashable) -> bool:
+        sides = [({source: None}, [source], self._forward), ({target: None}, [target], self._backward)]
+        while sides[0][1] and sides[1][1]:
+            seen, frontier, step = sides[0] if len(sides[0][1]) <= len(sides[1][1]) else sides[1]
+            other = sides[1][0] if seen is sides[0][0] else sides[0][0]
+            for nxt in step(frontier.pop()):
+                if nxt in other:
+                    return True
+                if nxt not in seen:
+                    seen[nxt] = None
+                    frontier.append(nxt)
+        return False
+
+
+class GraphIndexRegistry:
+    def __init__(self, max_projects: int = MAX_INDEXED_PROJECTS):
+        self.max_projects = max_projects
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, project: str) -> Optional[GraphIndex]:
+        with self._lock:
+            index = self._indexes.get(project)
+            if index is not None:
+                self._indexes.move_to_end(project)
+            return index
+
+    def load(self, project: str, tasks: Iterable[Dict]) -> GraphIndex:
+        index = GraphIndex(tasks)
+        with self._lock:
+            self._indexes[project] = index
+            self._indexes.move_to_end(project)
+            while len(self._indexes) > self.max_projects:
+                self._indexes.popitem(last=False)
+        return index
+
+    def discard(self, project: str) -> None:
+        with self._lock:
+            self._indexes.pop(project, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+
+
+graph_indexes = GraphIndexRegistry()
@@ -0,0 +1,269 @@
+from collections import Counter
+from http.client import HTTPConnection
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlencode, urlsplit
+import bisect
+import itertools
+import json
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from django.conf import settings
+
+from .benchmarks import generate_tasks, percentile
+from .scoring import STRATEGIES
+
+# Replays a request mix against a running server over real HTTP, so the
+# timings include the middleware stack, request parsing, JSON encoding and
+# the WSGI/ASGI server, which the scoring benchmarks leave out. The server
+# runs in its own process so client and server never share a GIL.
+#
+# A request is a dict:
+#
+#     {"endpoint": "analyze", "method": "POST", "path": "/api/tasks/analyze/",
+#      "query": {...}, "body": {...}, "headers": {...}}
+#
+# Only endpoint and path are required. Bodies are sent as JSON. Recorded
+# mixes are JSON Lines files with one request per line.
+
+API_PREFIX = '/api/tasks/'
+ENDPOINTS = ('analyze', 'suggest', 'dependency-graph')
+DEFAULT_MIX = {'analyze': 0.5, 'suggest': 0.3, 'dependency-graph': 0.2}
+SERVERS = ('runserver', 'uvicorn')
+
+# Upper bounds of the latency histogram buckets, in milliseconds; the last
+# bucket is open-ended.
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+SERVER_START_TIMEOUT = 30
+
+
+def _request(endpoint: str, tasks: List[Dict], strategy: str) -> Dict:
+    body = {'tasks': tasks, 'strategy': strategy}
+    if endpoint == 'suggest':
+        body['limit'] = 5
+    elif endpoint == 'dependency-graph':
+        del body['strategy']
+    return {'endpoint': endpoint, 'method': 'POST', 'path': f"{API_PREFIX}{endpoint}/", 'body': body}
+
+
+def synthetic_mix(shape: str = 'random_dag', size: int = 100, count: int = 100,
+                  mix: Optional[Dict[str, float]] = None, distinct: int = 10, seed: int = 0) -> List[Dict]:
+    # ``count`` requests drawn from ``mix`` (endpoint -> weight). Task lists
+    # come from ``distinct`` seeds, so ``distinct`` bounds how many different
+    # bodies the result cache sees.
+    mix = mix or DEFAULT_MIX
+    rng = random.Random(seed)
+    task_sets = [generate_tasks(shape, size, seed + k) for k in range(max(1, distinct))]
+    endpoints = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    return [_request(endpoint, rng.choice(task_sets), rng.choice(list(STRATEGIES))) for endpoint in endpoints]
+
+
+def load_recorded(path: str) -> List[Dict]:
+    requests = []
+    with open(path, encoding='utf-8') as fp:
+        for number, line in enumerate(fp, 1):
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            if not isinstance(request, dict) or 'path' not in request:
+                raise ValueError(f"Line {number}: each request needs at least a path")
+            request.setdefault('endpoint', request['path'])
+            requests.append(request)
+    return requests
+
+
+def _encode(request: Dict) -> tuple:
+    # (method, url, body, headers), encoded once before the timed run.
+    path = request['path']
+    if request.get('query'):
+        path = f"{path}?{urlencode(request['query'])}"
+    headers = dict(request.get('headers') or {})
+    body = None
+    if request.get('body') is not None:
+        body = json.dumps(request['body']).encode()
+        headers.setdefault('Content-Type', 'application/json')
+    return request.get('method', 'POST' if body is not None else 'GET'), path, body, headers
+
+
+def _histogram(latencies_ms: List[float]) -> Dict[str, int]:
+    counts = Counter(bisect.bisect_left(HISTOGRAM_BOUNDS_MS, value) for value in latencies_ms)
+    labels = [f"<={bound}ms" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}ms"]
+    return {label: counts.get(k, 0) for k, label in enumerate(labels)}
+
+
+def _summarize(samples: List[tuple], elapsed: float) -> Dict:
+    # samples are (status, latency in seconds, response bytes); status 0
+    # means the request failed before a response arrived.
+    if not samples:
+        return {'requests': 0, 'errors': 0, 'error_rate': 0.0, 'rps': 0.0}
+    latencies_ms = [latency * 1000 for _, latency, _ in samples]
+    errors = sum(1 for status, _, _ in samples if not 200 <= status < 400)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4),
+        'rps': round(len(samples) / elapsed, 2) if elapsed else None,
+        'p50_ms': round(percentile(latencies_ms, 50), 3),
+        'p90_ms': round(percentile(latencies_ms, 90), 3),
+        'p99_ms': round(percentile(latencies_ms, 99), 3),
+        'max_ms': round(max(latencies_ms), 3),
+        'mean_ms': round(sum(latencies_ms) / len(latencies_ms), 3),
+        'mean_response_bytes': round(sum(size for _, _, size in samples) / len(samples)),
+        'status': {str(status): count for status, count in sorted(Counter(s for s, _, _ in samples).items())},
+        'histogram': _histogram(latencies_ms),
+    }
+
+
+def _replay(encoded: List[tuple], url, concurrency: int, total: Optional[int], duration: Optional[float],
+            timeout: float, progress: Optional[Callable]) -> Dict[str, List[tuple]]:
+    counter = itertools.count()
+    samples = {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration if duration is not None else None
+
+    def worker():
+        connection = HTTPConnection(url.hostname, url.port or 80, timeout=timeout)
+        try:
+            while True:
+                with lock:
+                    index = next(counter)
+                if total is not None and index >= total:
+                    return
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+                endpoint, method, path, body, headers = encoded[index % len(encoded)]
+                started = time.perf_counter()
+                try:
+                    connection.request(method, path, body=body, headers=headers)
+                    response = connection.getresponse()
+                    size = len(response.read())
+                    sample = (response.status, time.perf_counter() - started, size)
+                except (OSError, ValueError):
+                    connection.close()
+                    sample = (0, time.perf_counter() - started, 0)
+                with lock:
+                    samples.setdefault(endpoint, []).append(sample)
+                if progress:
+                    progress(endpoint, sample)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, concurrency))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def run_load(requests: List[Dict], base_url: str, concurrency: int = 4, total: Optional[int] = None,
+             duration: Optional[float] = None, warmup: int = 0, timeout: float = 60,
+             progress: Optional[Callable] = None) -> Dict:
+    # Replays ``requests`` round-robin from ``concurrency`` threads, each on
+    # its own keep-alive connection, until ``total`` requests have been sent
+    # or ``duration`` seconds have passed (one pass over the mix by
+    # default). ``warmup`` requests are sent first and not reported.
+    # Connection errors and timeouts count as errors with status 0.
+    if not requests:
+        raise ValueError("No requests to replay")
+    if total is None and duration is None:
+        total = len(requests)
+
+    url = urlsplit(base_url)
+    encoded = [(request['endpoint'], *_encode(request)) for request in requests]
+    if warmup:
+        _replay(encoded, url, concurrency, warmup, None, timeout, None)
+
+    started = time.perf_counter()
+    samples = _replay(encoded, url, concurrency, total, duration, timeout, progress)
+    elapsed = time.perf_counter() - started
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'base_url': base_url,
+            'concurrency': concurrency,
+            'warmup': warmup,
+            'elapsed_s': round(elapsed, 3),
+        },
+        'endpoints': {endpoint: _summarize(items, elapsed) for endpoint, items in sorted(samples.items())},
+        'total': _summarize(list(itertools.chain.from_iterable(samples.values())), elapsed),
+    }
+
+
+def _free_port(host: str) -> int:
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(host: str, port: int, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode}")
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server did not start listening on {host}:{port} within {timeout}s")
+
+
+def start_server(kind: str = 'runserver', host: str = '127.0.0.1', port: Optional[int] = None,
+                 workers: int = 1, base_dir: Optional[Path] = None) -> tuple:
+    # Starts the project in a child process and waits until it accepts
+    # connections. Returns (process, base_url); stop it with stop_server.
+    # 'runserver' is Django's threaded WSGI development server, 'uvicorn'
+    # serves taskmanager.asgi and needs the uvicorn package.
+    if kind not in SERVERS:
+        raise ValueError(f"Unknown server: {kind}")
+    base_dir = Path(base_dir or settings.BASE_DIR)
+    port = port or _free_port(host)
+    if kind == 'runserver':
+        command = [sys.executable, str(base_dir / 'manage.py'), 'runserver', '--noreload', f"{host}:{port}"]
+    else:
+        command = [sys.executable, '-m', 'uvicorn', 'taskmanager.asgi:application', '--host', host,
+                   '--port', str(port), '--workers', str(workers), '--no-access-log']
+    process = subprocess.Popen(command, cwd=base_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_for_port(host, port, process, SERVER_START_TIMEOUT)
+    except Exception:
+        stop_server(process)
+        raise
+    return process, f"http://{host}:{port}"
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def parse_mix(spec: Iterable[str]) -> Dict[str, float]:
+    # "analyze=5", "suggest=3" -> {"analyze": 5.0, "suggest": 3.0}
+    mix = {}
+    for item in spec:
+        endpoint, _, weight = item.partition('=')
+        if endpoint not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint: {endpoint}; expected one of: {', '.join(ENDPOINTS)}")
+        try:
+            mix[endpoint] = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f"Weight for {endpoint} must be a number")
+        if mix[endpoint] < 0:
+            raise ValueError(f"Weight for {endpoint} must not be negative")
+    if not mix or not any(mix.values()):
+        raise ValueError("The mix needs at least one endpoint with a positive weight")
+    return mix
@@ -0,0 +1,43 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.models import Project
+from tasks.store import SCORE_CHUNK_SIZE, iter_exported_tasks
+from tasks.transfer import FORMATS, detect_format, write_tasks
+
+
+class Command(BaseCommand):
+    help = "Export a project's tasks as a JSON array, NDJSON or CSV ('-' writes stdout)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', required=True)
+        parser.add_argument('--output', default='-')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=SCORE_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        output = options['output']
+        try:
+            fmt = detect_format(output, options['format'] or ('ndjson' if output == '-' else None))
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        project = Project.objects.filter(name=options['project']).first()
+        if project is None:
+            raise CommandError(f"Project '{options['project']}' does not exist")
+
+        started = time.perf_counter()
+        fp = sys.stdout if output == '-' else open(output, 'w', newline='', encoding='utf-8')
+        try:
+            count = write_tasks(fp, iter_exported_tasks(project, options['batch_size']), fmt)
+        finally:
+            if fp is not sys.stdout:
+                fp.close()
+
+        elapsed = time.perf_counter() - started
+        self.stderr.write(
+            f"Exported {count} tasks from '{project.name}' in {elapsed:.2f}s "
+            f"({count / elapsed if elapsed else 0:.0f} rows/s)"
+        )
@@ -0,0 +1,51 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.store import IMPORT_BATCH_SIZE, CircularDependencyError, get_project, import_tasks
+from tasks.transfer import FORMATS, detect_format, read_tasks
+
+
+class Command(BaseCommand):
+    help = "Import tasks into a project from a JSON array, NDJSON or CSV file ('-' reads stdin)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--project', required=True)
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--replace', action='store_true', help="Delete the project's existing tasks first.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            fmt = detect_format(path, options['format'] or ('ndjson' if path == '-' else None))
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        started = time.perf_counter()
+
+        def progress(count):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"  {count} tasks ({count / elapsed:.0f} rows/s)")
+
+        fp = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            result = import_tasks(get_project(options['project']), read_tasks(fp, fmt),
+                                  batch_size=options['batch_size'], replace=options['replace'],
+                                  progress=progress if options['verbosity'] > 1 else None)
+        except CircularDependencyError as e:
+            raise CommandError(f"{e}: {e.cycles[0]}")
+        except ValueError as e:
+            raise CommandError(str(e))
+        finally:
+            if fp is not sys.stdin:
+                fp.close()
+
+        elapsed = time.perf_counter() - started
+        count = result['imported']
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {count} tasks into '{options['project']}' in {elapsed:.2f}s "
+            f"({count / elapsed if elapsed else 0:.0f} rows/s)"
+        ))
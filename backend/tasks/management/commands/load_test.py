@@ -0,0 +1,88 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.benchmarks import SHAPES
+from tasks.loadtest import (
+    SERVERS,
+    load_recorded,
+    parse_mix,
+    run_load,
+    start_server,
+    stop_server,
+    synthetic_mix
+)
+
+
+class Command(BaseCommand):
+    help = ("Replay a recorded or synthetic request mix against the HTTP API at a fixed concurrency and print "
+            "per-endpoint RPS, latency percentiles, histograms and error rates as JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help="Base URL of a running server. By default one is started locally.")
+        parser.add_argument('--server', default='runserver', choices=SERVERS,
+                            help="Server to start when --url is not given.")
+        parser.add_argument('--server-workers', type=int, default=1, help="Worker processes for uvicorn.")
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--requests', type=int,
+                            help="Requests to send; defaults to one pass over the mix unless --duration is set.")
+        parser.add_argument('--duration', type=float, help="Seconds to keep sending requests.")
+        parser.add_argument('--warmup', type=int, default=0, help="Requests sent first and left out of the report.")
+        parser.add_argument('--timeout', type=float, default=60, help="Per-request timeout in seconds.")
+        parser.add_argument('--record', help="JSON Lines file of recorded requests to replay.")
+        parser.add_argument('--mix', default='analyze=5,suggest=3,dependency-graph=2',
+                            help="Synthetic endpoint weights, e.g. analyze=5,suggest=3,dependency-graph=2.")
+        parser.add_argument('--count', type=int, default=100, help="Distinct synthetic requests in the mix.")
+        parser.add_argument('--shape', default='random_dag', choices=list(SHAPES))
+        parser.add_argument('--size', type=int, default=100, help="Tasks per synthetic request.")
+        parser.add_argument('--distinct', type=int, default=10,
+                            help="Distinct task lists in the synthetic mix; fewer means more result cache hits.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        try:
+            if options['record']:
+                requests = load_recorded(options['record'])
+            else:
+                mix = parse_mix(item.strip() for item in options['mix'].split(',') if item.strip())
+                requests = synthetic_mix(options['shape'], options['size'], options['count'], mix,
+                                         options['distinct'], options['seed'])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        if not requests:
+            raise CommandError("No requests to replay")
+
+        process = None
+        base_url = options['url']
+        if base_url is None:
+            try:
+                process, base_url = start_server(options['server'], workers=options['server_workers'])
+            except RuntimeError as e:
+                raise CommandError(f"Could not start {options['server']}: {e}")
+
+        try:
+            report = run_load(requests, base_url, options['concurrency'], options['requests'],
+                              options['duration'], options['warmup'], options['timeout'])
+        finally:
+            if process is not None:
+                stop_server(process)
+        report['meta']['server'] = options['server'] if process is not None else None
+
+        if options['verbosity'] > 0:
+            for endpoint, result in {**report['endpoints'], 'total': report['total']}.items():
+                if not result['requests']:
+                    continue
+                self.stderr.write(
+                    f"{endpoint:>20} {result['requests']:>7} req  {result['rps']:>9.1f} rps  "
+                    f"p50 {result['p50_ms']:>9.2f}ms  p99 {result['p99_ms']:>9.2f}ms  "
+                    f"errors {result['error_rate']:>7.2%}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fp:
+                json.dump(report, fp, indent=2)
+        else:
+            json.dump(report, sys.stdout, indent=2)
+            sys.stdout.write('\n')
@@ -0,0 +1,71 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.benchmarks import DEFAULT_REPEAT, DEFAULT_SIZES, SHAPES, TARGETS, compare_results, run_benchmarks
+
+
+def _csv_option(value, choices=None):
+    items = [item.strip() for item in value.split(',') if item.strip()]
+    if choices is not None:
+        unknown = [item for item in items if item not in choices]
+        if unknown:
+            raise CommandError(f"Unknown value(s): {', '.join(unknown)}; expected one of: {', '.join(choices)}")
+    return items
+
+
+class Command(BaseCommand):
+    help = ("Benchmark the scoring and dependency graph engines and the wire formats on synthetic task sets "
+            "and print JSON results.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                            help="Comma-separated task counts, e.g. 1000,10000,1000000.")
+        parser.add_argument('--shapes', default=','.join(SHAPES), help=f"Any of: {', '.join(SHAPES)}.")
+        parser.add_argument('--targets', default=','.join(TARGETS), help=f"Any of: {', '.join(TARGETS)}.")
+        parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+        parser.add_argument('--baseline', help="Earlier JSON report to compare p50 timings against.")
+        parser.add_argument('--threshold', type=float, default=1.2,
+                            help="Slowdown ratio against --baseline that counts as a regression.")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in _csv_option(options['sizes'])]
+        except ValueError:
+            raise CommandError("--sizes must be a comma-separated list of integers")
+
+        def progress(result):
+            self.stderr.write(
+                f"{result['shape']:>12} {result['size']:>8} {result['target']:<30} "
+                f"p50 {result['p50_ms']:>10.2f}ms  p99 {result['p99_ms']:>10.2f}ms  "
+                f"peak {result['peak_memory_bytes'] / 1e6:>8.1f}MB"
+                + (f"  out {result['output_bytes'] / 1e6:>8.2f}MB" if 'output_bytes' in result else "")
+            )
+
+        report = run_benchmarks(
+            shapes=_csv_option(options['shapes'], SHAPES),
+            sizes=sizes,
+            targets=_csv_option(options['targets'], TARGETS),
+            repeat=options['repeat'],
+            seed=options['seed'],
+            progress=progress if options['verbosity'] > 0 else None,
+        )
+
+        regressions = []
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as fp:
+                regressions = compare_results(json.load(fp), report, options['threshold'])
+            report['regressions'] = regressions
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fp:
+                json.dump(report, fp, indent=2)
+        else:
+            json.dump(report, sys.stdout, indent=2)
+            sys.stdout.write('\n')
+
+        if regressions:
+            raise CommandError(f"{len(regressions)} benchmark(s) regressed beyond {options['threshold']}x the baseline")
@@ -0,0 +1,86 @@
+# Generated by Django 4.2.30 on 2026-10-16 20:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Project',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('max_blockers', models.PositiveIntegerField(default=1)),
+                ('scored_on', models.DateField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Task',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.CharField(max_length=255)),
+                ('title', models.CharField(max_length=500)),
+                ('due_date', models.DateField(blank=True, db_index=True, null=True)),
+                ('importance', models.PositiveSmallIntegerField(default=5)),
+                ('estimated_hours', models.FloatField(default=4.0)),
+                ('blocking_count', models.PositiveIntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tasks', to='tasks.project')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskDependency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depends_on', models.CharField(max_length=255)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dependencies', to='tasks.project')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dependency_edges', to='tasks.task')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('strategy', models.CharField(max_length=32)),
+                ('priority_score', models.FloatField()),
+                ('urgency_score', models.FloatField()),
+                ('importance_score', models.FloatField()),
+                ('effort_score', models.FloatField()),
+                ('dependency_score', models.FloatField()),
+                ('explanation', models.TextField(blank=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='tasks.project')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='tasks.task')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project', 'strategy', '-priority_score'], name='tasks_tasks_project_a15369_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='taskscore',
+            constraint=models.UniqueConstraint(fields=('task', 'strategy'), name='unique_task_strategy_score'),
+        ),
+        migrations.AddIndex(
+            model_name='taskdependency',
+            index=models.Index(fields=['project', 'depends_on'], name='tasks_taskd_project_f92d73_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='taskdependency',
+            constraint=models.UniqueConstraint(fields=('task', 'depends_on'), name='unique_task_dependency'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'blocking_count'], name='tasks_task_project_9f2d27_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(fields=('project', 'task_id'), name='unique_task_per_project'),
+        ),
+    ]
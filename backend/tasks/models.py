@@ -1,3 +1,83 @@
 from django.db import models
 
-# Create your models here.
+
+class Project(models.Model):
+    name = models.CharField(max_length=200, unique=True)
+    # Denormalized inputs of the dependency sub-score, kept current by
+    # tasks.store so an edit only rescores the tasks it actually affects.
+    max_blockers = models.PositiveIntegerField(default=1)
+    scored_on = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+
+class Task(models.Model):
+    project = models.ForeignKey(Project, related_name='tasks', on_delete=models.CASCADE)
+    task_id = models.CharField(max_length=255)
+    title = models.CharField(max_length=500)
+    due_date = models.DateField(null=True, blank=True, db_index=True)
+    importance = models.PositiveSmallIntegerField(default=5)
+    estimated_hours = models.FloatField(default=4.0)
+    blocking_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'task_id'], name='unique_task_per_project'),
+        ]
+        indexes = [
+            models.Index(fields=['project', 'blocking_count']),
+        ]
+
+    def __str__(self):
+        return f"{self.task_id}: {self.title}"
+
+    def as_dict(self, dependencies=None):
+        data = {
+            'id': self.task_id,
+            'title': self.title,
+            'due_date': self.due_date.isoformat() if self.due_date else None,
+            'estimated_hours': self.estimated_hours,
+            'importance': self.importance,
+        }
+        if dependencies is not None:
+            data['dependencies'] = dependencies
+        return data
+
+
+class TaskDependency(models.Model):
+    project = models.ForeignKey(Project, related_name='dependencies', on_delete=models.CASCADE)
+    task = models.ForeignKey(Task, related_name='dependency_edges', on_delete=models.CASCADE)
+    # External id of the task this one waits on. Not a foreign key: like the
+    # JSON API, dependencies may point at tasks that are not stored.
+    depends_on = models.CharField(max_length=255)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'depends_on'], name='unique_task_dependency'),
+        ]
+        indexes = [
+            models.Index(fields=['project', 'depends_on']),
+        ]
+
+
+class TaskScore(models.Model):
+    project = models.ForeignKey(Project, related_name='scores', on_delete=models.CASCADE)
+    task = models.ForeignKey(Task, related_name='scores', on_delete=models.CASCADE)
+    strategy = models.CharField(max_length=32)
+    priority_score = models.FloatField()
+    urgency_score = models.FloatField()
+    importance_score = models.FloatField()
+    effort_score = models.FloatField()
+    dependency_score = models.FloatField()
+    explanation = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'strategy'], name='unique_task_strategy_score'),
+        ]
+        indexes = [
+            models.Index(fields=['project', 'strategy', '-priority_score']),
+        ]
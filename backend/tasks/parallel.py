@@ -0,0 +1,146 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from itertools import repeat
+from typing import Dict, List, Optional, Sequence
+import heapq
+import os
+import threading
+
+from .profiling import stage
+from .records import TaskTable
+from .scoring import (
+    STRATEGIES,
+    _dependency_inputs,
+    _table_columns,
+    analyze_tasks,
+    prepare_tasks,
+    resolve_fields
+)
+
+DEFAULT_PARALLEL_SETTINGS = {
+    'WORKERS': None,
+    'CHUNK_SIZE': 50000,
+    'MIN_TASKS': 100000,
+}
+
+# Scoring one row only needs its own inputs plus the global max_blockers,
+# so the table is cut into contiguous shards that are scored and sorted in
+# worker processes, then k-way merged in the parent. Shards carry typed
+# arrays and due date strings rather than task dicts; the source dicts never
+# leave the parent and are only read again to build the response.
+
+
+class ScoringShard:
+    # The scoring columns of rows [start, start + len) of a TaskTable. Has
+    # the attributes _table_columns reads, so it scores like a table.
+    __slots__ = ('start', 'importance', 'estimated_hours', 'due_dates', 'blocking', 'impact')
+
+    def __init__(self, table: TaskTable, blocking: Sequence[int], impact: Optional[Sequence[float]],
+                 start: int, stop: int):
+        self.start = start
+        self.importance = table.importance[start:stop]
+        self.estimated_hours = table.estimated_hours[start:stop]
+        self.due_dates = table.due_dates[start:stop]
+        self.blocking = blocking[start:stop]
+        self.impact = None if impact is None else impact[start:stop]
+
+    def __len__(self) -> int:
+        return len(self.importance)
+
+
+def score_shard(shard: ScoringShard, max_blockers: int, weights: Dict, today: date,
+                explain: bool = True) -> List[tuple]:
+    # Rows as (-priority, due ordinal, row, explanation, urgency, importance,
+    # effort, dependency), sorted. Row numbers are unique, so ties never
+    # compare the trailing fields and the order matches analyze_tasks. The
+    # explanation is None with ``explain`` off.
+    columns = _table_columns(shard, shard.blocking, max_blockers, {'': weights}, today, shard.impact, explain)
+    due_ordinal = columns['due_ordinal']
+    if not isinstance(due_ordinal, list):
+        due_ordinal = due_ordinal.tolist()
+    return sorted(zip(
+        [-priority for priority in columns['priority_score']['']],
+        due_ordinal,
+        range(shard.start, shard.start + len(shard)),
+        repeat(None) if columns['explanation'] is None else columns['explanation'],
+        columns['urgency_score'],
+        columns['importance_score'],
+        columns['effort_score'],
+        columns['dependency_score'],
+    ))
+
+
+class ParallelScorer:
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 50000, min_tasks: int = 100000):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self.min_tasks = min_tasks
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def analyze(self, tasks, strategy: str = "smart_balance", today: Optional[date] = None,
+                impact: str = "direct", fields=None, verbose: bool = True) -> List[Dict]:
+        # Same result as analyze_tasks. Inputs below min_tasks, or that fit
+        # in a single shard, take the serial path.
+        if len(tasks) < self.min_tasks or len(tasks) <= self.chunk_size or self.workers < 2:
+            return analyze_tasks(tasks, strategy, today=today, impact=impact, fields=fields, verbose=verbose)
+
+        fields = resolve_fields(fields)
+        explain = verbose if fields is None else 'explanation' in fields
+
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy}")
+
+        table = prepare_tasks(tasks).scoring_table()
+        blocking, impact_values, max_blockers = _dependency_inputs(table, impact)
+        weights = STRATEGIES[strategy]
+        today = today or date.today()
+
+        with stage('score'):
+            futures = []
+            for start in range(0, len(table), self.chunk_size):
+                shard = ScoringShard(table, blocking, impact_values, start, start + self.chunk_size)
+                futures.append(self.executor.submit(score_shard, shard, max_blockers, weights, today, explain))
+            shards = [future.result() for future in futures]
+
+        with stage('sort'):
+            rows = table.rows
+            results = []
+            for neg_priority, _, row, explanation, urgency, importance, effort, dependency in heapq.merge(*shards):
+                scores = {
+                    'priority_score': -neg_priority,
+                    'explanation': explanation,
+                    'urgency_score': urgency,
+                    'importance_score': importance,
+                    'effort_score': effort,
+                    'dependency_score': dependency
+                }
+                if not explain:
+                    del scores['explanation']
+                source = rows[row]
+                if fields is None:
+                    results.append({**source, **scores})
+                else:
+                    results.append({name: scores[name] if name in scores else source[name]
+                                    for name in fields if name in scores or name in source})
+            return results
+
+
+def build_parallel_scorer(config: Optional[Dict] = None) -> Optional[ParallelScorer]:
+    if not config:
+        return None
+    config = {**DEFAULT_PARALLEL_SETTINGS, **config}
+    return ParallelScorer(config['WORKERS'], config['CHUNK_SIZE'], config['MIN_TASKS'])
@@ -0,0 +1,116 @@
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, List, Optional
+import cProfile
+import json
+import logging
+import pstats
+import time
+
+from django.conf import settings
+from django.http import JsonResponse
+
+logger = logging.getLogger('tasks.timing')
+
+PROFILE_ROWS = 40
+
+_current_timer: ContextVar[Optional['StageTimer']] = ContextVar('tasks_stage_timer', default=None)
+_NULL_STAGE = nullcontext()
+
+
+class StageTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    def total(self) -> float:
+        return time.perf_counter() - self.started
+
+    def as_millis(self) -> Dict[str, float]:
+        return {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()}
+
+    def server_timing(self) -> str:
+        parts = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.stages.items()]
+        parts.append(f"total;dur={self.total() * 1000:.3f}")
+        return ', '.join(parts)
+
+
+def stage(name: str):
+    # Times a block against the active request, if timing is on. With timing
+    # off this is one context variable lookup and a shared no-op context.
+    timer = _current_timer.get()
+    if timer is None:
+        return _NULL_STAGE
+    return timer.stage(name)
+
+
+def profile_summary(profile: cProfile.Profile, limit: int = PROFILE_ROWS) -> List[Dict]:
+    stats = pstats.Stats(profile).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {
+            'function': f"{filename}:{line}({name})",
+            'ncalls': calls,
+            'tottime_ms': round(tottime * 1000, 3),
+            'cumtime_ms': round(cumtime * 1000, 3),
+        }
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in rows
+    ]
+
+
+def instrument_stages(view):
+    # Adds a Server-Timing header and a structured 'tasks.timing' log line per
+    # request when TASKS_STAGE_TIMING is on. With TASKS_ALLOW_PROFILING on,
+    # '?profile=1' replaces the response with a cProfile summary.
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        profiling = (request.GET.get('profile') == '1'
+                     and getattr(settings, 'TASKS_ALLOW_PROFILING', settings.DEBUG))
+        if not profiling and not getattr(settings, 'TASKS_STAGE_TIMING', False):
+            return view(request, *args, **kwargs)
+
+        timer = StageTimer()
+        token = _current_timer.set(timer)
+        profile = cProfile.Profile() if profiling else None
+        try:
+            if profile:
+                profile.enable()
+            try:
+                response = view(request, *args, **kwargs)
+            finally:
+                if profile:
+                    profile.disable()
+        finally:
+            _current_timer.reset(token)
+
+        total_ms = round(timer.total() * 1000, 3)
+        if profile:
+            response = JsonResponse({
+                'status': response.status_code,
+                'total_ms': total_ms,
+                'stages': timer.as_millis(),
+                'profile': profile_summary(profile),
+            })
+
+        response['Server-Timing'] = timer.server_timing()
+        logger.info(json.dumps({
+            'event': 'request_timing',
+            'view': view.__name__,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': total_ms,
+            'stages': timer.as_millis(),
+        }))
+        return response
+
+    return wrapped
@@ -0,0 +1,111 @@
+from array import array
+from collections import Counter
+from sys import intern
+from typing import Dict, Hashable, Iterable, List, Tuple
+
+
+def _importance_value(task: Dict) -> int:
+    try:
+        importance_val = int(task.get('importance')) if task.get('importance') is not None else 5
+    except:
+        importance_val = 5
+    return max(1, min(10, importance_val))
+
+def _estimated_hours_value(task: Dict) -> float:
+    try:
+        hours_val = float(task.get('estimated_hours')) if task.get('estimated_hours') is not None else 4.0
+    except:
+        hours_val = 4.0
+    return max(0.5, hours_val)
+
+
+def _interned(value: Hashable) -> Hashable:
+    return intern(value) if type(value) is str else value
+
+
+class TaskTable:
+    # Columnar form of a task list for the scoring and graph code. Every
+    # distinct id becomes a dense node number: task ids first, in order of
+    # first appearance, then ids that only occur as dependencies. Each row's
+    # dependencies are stored CSR-style as node numbers, and the coerced
+    # scoring inputs live in typed arrays. ``rows`` keeps a reference to the
+    # source dicts, which are only read again when a response is built. The
+    # adjacency and dependent counts are built on first use and kept, so the
+    # cycle check, the graph and scoring can share one table; callers treat
+    # them as read-only.
+    __slots__ = (
+        'rows', 'ids', 'index', 'node_count', 'row_node', 'last_row',
+        'dep_start', 'dep_nodes', 'importance', 'estimated_hours', 'due_dates',
+        '_blocking', '_adjacency',
+    )
+
+    def __init__(self, tasks: Iterable[Dict], scoring: bool = True):
+        rows = self.rows = tasks if isinstance(tasks, list) else list(tasks)
+        ids = self.ids = []
+        index = self.index = {}
+        row_node = self.row_node = array('l')
+        last_row = self.last_row = array('l')
+
+        for row, task in enumerate(rows):
+            node = index.get(task['id'])
+            if node is None:
+                task_id = _interned(task['id'])
+                node = index[task_id] = len(ids)
+                ids.append(task_id)
+                last_row.append(row)
+            else:
+                last_row[node] = row
+            row_node.append(node)
+        self.node_count = len(ids)
+
+        dep_start = self.dep_start = array('l', [0])
+        dep_nodes = self.dep_nodes = array('l')
+        for task in rows:
+            for dep in task.get('dependencies') or ():
+                node = index.get(dep)
+                if node is None:
+                    dep = _interned(dep)
+                    node = index[dep] = len(ids)
+                    ids.append(dep)
+                dep_nodes.append(node)
+            dep_start.append(len(dep_nodes))
+
+        if scoring:
+            self.importance = array('b', [_importance_value(task) for task in rows])
+            self.estimated_hours = array('d', [_estimated_hours_value(task) for task in rows])
+            self.due_dates = [task.get('due_date') for task in rows]
+        else:
+            self.importance = self.estimated_hours = self.due_dates = None
+        self._blocking = self._adjacency = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def blocking_counts(self) -> Tuple[array, int]:
+        # Per row: how many rows list its id as a dependency, duplicates
+        # included. Also returns the largest count over all ids, or 1.
+        if self._blocking is not None:
+            return self._blocking
+        counts = array('l', [0]) * len(self.ids)
+        for node, count in Counter(self.dep_nodes).items():
+            counts[node] = count
+        max_blockers = max(counts) if self.dep_nodes else 1
+        self._blocking = array('l', [counts[node] for node in self.row_node]), max_blockers
+        return self._blocking
+
+    def dependency_lists(self, include_external: bool = True) -> List[List[int]]:
+        # Deduplicated dependency node numbers per task node, taken from the
+        # last row with that id (like building a dict keyed by id).
+        dep_start, dep_nodes, n = self.dep_start, self.dep_nodes, self.node_count
+        lists = []
+        for row in self.last_row:
+            deps = dep_nodes[dep_start[row]:dep_start[row + 1]]
+            if not include_external:
+                deps = [node for node in deps if node < n]
+            lists.append(list(dict.fromkeys(deps)))
+        return lists
+
+    def adjacency(self) -> List[List[int]]:
+        if self._adjacency is None:
+            self._adjacency = self.dependency_lists(include_external=False)
+        return self._adjacency
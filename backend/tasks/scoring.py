@@ -1,7 +1,17 @@
 from datetime import datetime, date
-from typing import List, Dict, Tuple
+from functools import lru_cache
+from typing import List, Dict, Optional, Sequence, Tuple
+import heapq
 import math
-from collections import defaultdict
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .graph import SLACK_TOLERANCE, critical_path_schedule, descendant_weights, indexed_components, indexed_cycles
+from .profiling import stage
+from .records import TaskTable, _estimated_hours_value, _importance_value
 
 STRATEGIES = {
     "smart_balance": {"urgency": 0.35, "importance": 0.35, "effort": 0.15, "dependency": 0.15},
@@ -10,151 +20,528 @@ STRATEGIES = {
     "deadline_driven": {"urgency": 0.60, "importance": 0.20, "effort": 0.10, "dependency": 0.10},
 }
 
-def detect_circular_dependencies(tasks: List[Dict]) -> Tuple[bool, List[List[str]]]:
-    graph = {task['id']: set(task.get('dependencies', [])) for task in tasks}
-    visited = set()
-    active = set()
-    cycles = []
+# Task lists at least this long are scored through calculate_batch_scores
+# when NumPy is available.
+BATCH_SCORING_THRESHOLD = 1000
 
-    def dfs(node, path):
-        if node in active:
-            start = path.index(node)
-            cycles.append(path[start:] + [node])
-            return
-        if node in visited:
-            return
+# How the dependency sub-score measures a task's blocking impact: its
+# direct dependents (the original behaviour), all transitive dependents, or
+# those dependents weighted by their estimated hours or importance.
+IMPACT_MODES = ("direct", "transitive", "transitive_hours", "transitive_importance")
 
-        visited.add(node)
-        active.add(node)
+WEIGHT_KEYS = ("urgency", "importance", "effort", "dependency")
 
-        for nxt in graph.get(node, []):
-            if nxt in graph:
-                dfs(nxt, path + [nxt])
+# Most weight vectors one analyze_strategies request may rank.
+MAX_BATCH_STRATEGIES = 16
 
-        active.remove(node)
+# Fields analyze_tasks adds to each task. A ``fields`` projection may name
+# these and any input field; 'id' is always included.
+SCORE_FIELDS = ('priority_score', 'explanation', 'urgency_score', 'importance_score', 'effort_score',
+                'dependency_score')
 
-    for node in graph:
-        if node not in visited:
-            dfs(node, [node])
+# Upper bound on distinct due date strings and day offsets memoized by the
+# date helpers below.
+DATE_CACHE_SIZE = 4096
 
+def detect_circular_dependencies(tasks, stop_at_first: bool = False) -> Tuple[bool, List[List[str]]]:
+    table = _graph_table(tasks)
+    ids = table.ids
+    cycles = [[ids[k] for k in cycle] for cycle in indexed_cycles(table.adjacency(), first_only=stop_at_first)]
     return len(cycles) > 0, cycles
 
-def calculate_task_score(task: Dict, weights: Dict, blocking_counts: Dict, max_blockers: int) -> Dict:
-    today = date.today()
-
-    due_date = task.get('due_date')
-
-    try:
-        importance_val = int(task.get('importance')) if task.get('importance') is not None else 5
-    except:
-        importance_val = 5
-    importance = max(1, min(10, importance_val))
-
-    try:
-        hours_val = float(task.get('estimated_hours')) if task.get('estimated_hours') is not None else 4.0
-    except:
-        hours_val = 4.0
-    estimated_hours = max(0.5, hours_val)
-
-    urgency_score = 0.1
-    urgency_details = ""
-
-    if due_date:
+# Parsed dates do not depend on the reference date, so they are memoized
+# across runs; task lists reuse few distinct dates.
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_iso_date(value: str) -> Optional[date]:
+    # Fast path for canonical YYYY-MM-DD strings; anything else goes through
+    # strptime so the accepted formats do not change.
+    if len(value) == 10 and value[4] == '-' and value[7] == '-' and \
+            value[:4].isdigit() and value[5:7].isdigit() and value[8:].isdigit():
         try:
-            due = datetime.strptime(due_date, '%Y-%m-%d').date()
-            days_diff = (due - today).days
-            if days_diff >= 0:
-                urgency_score = math.exp(-days_diff / 7)
-                urgency_details = f"Due in {days_diff} days"
-            else:
-                urgency_score = min(1.2, 1.0 + abs(days_diff) * 0.05)
-                urgency_details = f"Overdue by {abs(days_diff)} days"
-        except:
-            urgency_details = "Invalid date"
-
-    importance_score = (importance / 10.0) ** 0.9
-
-    effort_score = 1.0 / (math.sqrt(estimated_hours) + 1.0)
-
-    blocking_count = blocking_counts.get(task['id'], 0)
-    dependency_score = math.log(1 + (blocking_count / max(1, max_blockers)) * 5) / math.log(6)
-
-    weighted_score = (
+            return date(int(value[:4]), int(value[5:7]), int(value[8:]))
+        except ValueError:
+            return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+def parse_due_date(value) -> Optional[date]:
+    if not value or not isinstance(value, str):
+        return None
+    return _parse_iso_date(value)
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _urgency_for_days(days_diff: int) -> Tuple[float, str]:
+    if days_diff >= 0:
+        return math.exp(-days_diff / 7), f"Due in {days_diff} days"
+    return min(1.2, 1.0 + abs(days_diff) * 0.05), f"Overdue by {abs(days_diff)} days"
+
+def _urgency(due_date, today: date) -> Tuple[float, str]:
+    if not due_date:
+        return 0.1, ""
+    due = parse_due_date(due_date)
+    if due is None:
+        return 0.1, "Invalid date"
+    return _urgency_for_days((due - today).days)
+
+def _safe_due_date(d) -> date:
+    return parse_due_date(d) or date.max
+
+def _due_date_info(due_date, today: date, cache: Dict) -> Tuple[float, str, date]:
+    # (urgency score, urgency details, sort date), memoized per distinct
+    # due date string for the duration of one scoring pass.
+    entry = cache.get(due_date) if isinstance(due_date, str) else None
+    if entry is None:
+        entry = (*_urgency(due_date, today), _safe_due_date(due_date))
+        if isinstance(due_date, str):
+            cache[due_date] = entry
+    return entry
+
+def _importance_score(importance: int) -> float:
+    return (importance / 10.0) ** 0.9
+
+def _effort_score(estimated_hours: float) -> float:
+    return 1.0 / (math.sqrt(estimated_hours) + 1.0)
+
+def _dependency_score(blocking_count: int, max_blockers: int) -> float:
+    return math.log(1 + (blocking_count / max(1, max_blockers)) * 5) / math.log(6)
+
+def _priority(weighted_score: float):
+    return min(100, max(0, round(weighted_score * 100, 2)))
+
+def _weighted_sum(urgency_score, importance_score, effort_score, dependency_score, weights: Dict):
+    return (
         urgency_score * weights['urgency'] +
         importance_score * weights['importance'] +
         effort_score * weights['effort'] +
         dependency_score * weights['dependency']
     )
 
-    priority_score = min(100, max(0, round(weighted_score * 100, 2)))
-
-    explanation_parts = []
-    if urgency_details:
-        explanation_parts.append(urgency_details)
-    explanation_parts.append(f"Importance: {importance}/10")
-    explanation_parts.append(f"Effort: {estimated_hours}h")
-    if blocking_count > 0:
-        explanation_parts.append(f"Blocks {blocking_count} tasks")
+def _rank_key(table: TaskTable, row: int, weights: Dict, blocking: Sequence[int], max_blockers: int,
+              today: date, due_cache: Dict):
+    urgency_score, _, due = _due_date_info(table.due_dates[row], today, due_cache)
+    priority_score = _priority(_weighted_sum(
+        urgency_score,
+        _importance_score(table.importance[row]),
+        _effort_score(table.estimated_hours[row]),
+        _dependency_score(blocking[row], max_blockers),
+        weights
+    ))
+    return -priority_score, due
+
+def _fill_scores(target: Dict, importance: int, estimated_hours: float, urgency_score: float, urgency_details: str,
+                 blocking_count: int, max_blockers: int, weights: Dict, impact: Optional[float] = None,
+                 explain: bool = True) -> Dict:
+    # ``impact`` replaces blocking_count in the dependency score when given;
+    # the explanation always reports blocking_count. With ``explain`` off
+    # no explanation text is built.
+    importance_score = _importance_score(importance)
+    effort_score = _effort_score(estimated_hours)
+    dependency_score = _dependency_score(blocking_count if impact is None else impact, max_blockers)
+
+    priority_score = _priority(_weighted_sum(urgency_score, importance_score, effort_score, dependency_score, weights))
+
+    target['priority_score'] = priority_score
+    if explain:
+        explanation_parts = []
+        if urgency_details:
+            explanation_parts.append(urgency_details)
+        explanation_parts.append(f"Importance: {importance}/10")
+        explanation_parts.append(f"Effort: {estimated_hours}h")
+        if blocking_count > 0:
+            explanation_parts.append(f"Blocks {blocking_count} tasks")
+        target['explanation'] = ' | '.join(explanation_parts)
+    target['urgency_score'] = round(urgency_score, 3)
+    target['importance_score'] = round(importance_score, 3)
+    target['effort_score'] = round(effort_score, 3)
+    target['dependency_score'] = round(dependency_score, 3)
+    return target
+
+def calculate_task_score(task: Dict, weights: Dict, blocking_counts: Dict, max_blockers: int,
+                         today: Optional[date] = None, explain: bool = True) -> Dict:
+    urgency_score, urgency_details = _urgency(task.get('due_date'), today or date.today())
+    return _fill_scores({}, _importance_value(task), _estimated_hours_value(task), urgency_score, urgency_details,
+                        blocking_counts.get(task['id'], 0), max_blockers, weights, explain=explain)
+
+def _scored_task(table: TaskTable, row: int, weights: Dict, blocking: Sequence[int], max_blockers: int,
+                 today: date, due_cache: Dict, impact: Optional[Sequence[float]] = None,
+                 fields: Optional[Tuple[str, ...]] = None, explain: bool = True) -> Dict:
+    # The response dict for one row: a copy of the source task plus its
+    # score breakdown, built in place, or only ``fields`` of the two.
+    urgency_score, urgency_details, _ = _due_date_info(table.due_dates[row], today, due_cache)
+    source = table.rows[row]
+    scores = _fill_scores(dict(source) if fields is None else {}, table.importance[row], table.estimated_hours[row],
+                          urgency_score, urgency_details, blocking[row], max_blockers, weights,
+                          None if impact is None else impact[row], explain)
+    if fields is None:
+        return scores
+    return {name: scores[name] if name in scores else source[name]
+            for name in fields if name in scores or name in source}
+
+def _map_unique(values, func) -> List:
+    # Apply a scalar Python function once per distinct array value. Keeps the
+    # batch path bit-for-bit identical to calculate_task_score (math.* and
+    # round()) while only paying interpreter cost per distinct value.
+    uniques, inverse = np.unique(values, return_inverse=True)
+    mapped = [func(v) for v in uniques.tolist()]
+    return [mapped[i] for i in inverse.tolist()]
+
+def _batch_columns(table: TaskTable, blocking: Sequence[int], max_blockers: int, strategies: Dict[str, Dict],
+                   today: date, impact: Optional[Sequence[float]] = None, explain: bool = True) -> Dict:
+    n = len(table)
+
+    urgency = np.empty(n)
+    due_ordinal = np.empty(n, dtype=np.int64)
+    urgency_details = [""] * n
+    due_cache = {}
+
+    for i, due_date in enumerate(table.due_dates):
+        urgency[i], urgency_details[i], due = _due_date_info(due_date, today, due_cache)
+        due_ordinal[i] = due.toordinal()
+
+    importance = np.frombuffer(table.importance, dtype=np.int8)
+    hours = np.frombuffer(table.estimated_hours, dtype=np.float64)
+    blocking = np.asarray(blocking, dtype=np.int64)
+
+    importance_table = np.array([_importance_score(k) if k else 0.0 for k in range(11)])
+    importance_scores = importance_table[importance]
+    effort_scores = 1.0 / (np.sqrt(hours) + 1.0)
+    dependency_scores = np.array(_map_unique(blocking if impact is None else np.asarray(impact, dtype=float),
+                                             lambda c: _dependency_score(c, max_blockers)))
+
+    priorities = {}
+    for name, weights in strategies.items():
+        weighted = _weighted_sum(urgency, importance_scores, effort_scores, dependency_scores, weights)
+        priorities[name] = _map_unique(weighted, _priority)
+
+    explanations = None
+    if explain:
+        blocks_text = {}
+        explanations = []
+        for details, imp, est, count in zip(urgency_details, table.importance, table.estimated_hours,
+                                            blocking.tolist()):
+            parts = [details] if details else []
+            parts.append(f"Importance: {imp}/10")
+            parts.append(f"Effort: {est}h")
+            if count > 0:
+                text = blocks_text.get(count)
+                if text is None:
+                    text = blocks_text[count] = f"Blocks {count} tasks"
+                parts.append(text)
+            explanations.append(' | '.join(parts))
 
     return {
-        'priority_score': priority_score,
-        'explanation': ' | '.join(explanation_parts),
-        'urgency_score': round(urgency_score, 3),
-        'importance_score': round(importance_score, 3),
-        'effort_score': round(effort_score, 3),
-        'dependency_score': round(dependency_score, 3)
+        'priority_score': priorities,
+        'explanation': explanations,
+        'urgency_score': _map_unique(urgency, lambda v: round(v, 3)),
+        'importance_score': _map_unique(importance_scores, lambda v: round(v, 3)),
+        'effort_score': _map_unique(effort_scores, lambda v: round(v, 3)),
+        'dependency_score': _map_unique(dependency_scores, lambda v: round(v, 3)),
+        'due_ordinal': due_ordinal,
     }
 
-def analyze_tasks(tasks: List[Dict], strategy: str = "smart_balance") -> List[Dict]:
+def _table_blocking(table: TaskTable, blocking_counts: Dict) -> List[int]:
+    ids, row_node = table.ids, table.row_node
+    return [blocking_counts.get(ids[node], 0) for node in row_node]
+
+def calculate_batch_scores(tasks: List[Dict], blocking_counts: Dict, max_blockers: int,
+                           strategies: Optional[Dict[str, Dict]] = None, today: Optional[date] = None) -> Dict:
+    if np is None:
+        raise RuntimeError("NumPy is required for batch scoring")
+    table = TaskTable(tasks)
+    return _batch_columns(table, _table_blocking(table, blocking_counts), max_blockers,
+                          STRATEGIES if strategies is None else strategies, today or date.today())
+
+def score_columns(tasks: List[Dict], blocking_counts: Dict, max_blockers: int,
+                  strategies: Optional[Dict[str, Dict]] = None, today: Optional[date] = None) -> Dict:
+    # calculate_batch_scores when NumPy is available, otherwise the same
+    # columns built task by task.
+    if strategies is None:
+        strategies = STRATEGIES
+    table = TaskTable(tasks)
+    return _table_columns(table, _table_blocking(table, blocking_counts), max_blockers, strategies,
+                          today or date.today())
+
+def _table_columns(table: TaskTable, blocking: Sequence[int], max_blockers: int, strategies: Dict[str, Dict],
+                   today: date, impact: Optional[Sequence[float]] = None, explain: bool = True) -> Dict:
+    # Only reads the scoring columns of ``table`` (importance,
+    # estimated_hours, due_dates) and its length. The explanation column is
+    # None with ``explain`` off.
+    if np is not None:
+        return _batch_columns(table, blocking, max_blockers, strategies, today, impact, explain)
+
+    columns = {
+        'priority_score': {name: [] for name in strategies},
+        'explanation': [] if explain else None,
+        'urgency_score': [],
+        'importance_score': [],
+        'effort_score': [],
+        'dependency_score': [],
+        'due_ordinal': [],
+    }
+    due_cache = {}
+    score_data = {}
+    for row in range(len(table)):
+        urgency_score, urgency_details, due = _due_date_info(table.due_dates[row], today, due_cache)
+        for name, weights in strategies.items():
+            _fill_scores(score_data, table.importance[row], table.estimated_hours[row], urgency_score,
+                         urgency_details, blocking[row], max_blockers, weights,
+                         None if impact is None else impact[row], explain)
+            columns['priority_score'][name].append(score_data['priority_score'])
+        for key in SCORE_FIELDS[1:]:
+            if explain or key != 'explanation':
+                columns[key].append(score_data[key])
+        columns['due_ordinal'].append(due.toordinal())
+    return columns
+
+def _column_order(columns: Dict, name: str) -> List[int]:
+    # Row numbers by (-priority, due date); ties keep input order.
+    priorities = columns['priority_score'][name]
+    due_ordinal = columns['due_ordinal']
+    if np is not None:
+        return np.lexsort((due_ordinal, -np.array(priorities, dtype=float))).tolist()
+    return sorted(range(len(priorities)), key=lambda k: (-priorities[k], due_ordinal[k]))
+
+def _column_tasks(rows: List[Dict], columns: Dict, name: str, order: List[int],
+                  fields: Optional[Tuple[str, ...]] = None) -> List[Dict]:
+    priorities = columns['priority_score'][name]
+    if fields is None:
+        if columns['explanation'] is None:
+            return [
+                {
+                    **rows[k],
+                    'priority_score': priorities[k],
+                    'urgency_score': columns['urgency_score'][k],
+                    'importance_score': columns['importance_score'][k],
+                    'effort_score': columns['effort_score'][k],
+                    'dependency_score': columns['dependency_score'][k]
+                }
+                for k in order
+            ]
+        return [
+            {
+                **rows[k],
+                'priority_score': priorities[k],
+                'explanation': columns['explanation'][k],
+                'urgency_score': columns['urgency_score'][k],
+                'importance_score': columns['importance_score'][k],
+                'effort_score': columns['effort_score'][k],
+                'dependency_score': columns['dependency_score'][k]
+            }
+            for k in order
+        ]
+
+    # Projected: requested score columns are read by index, requested input
+    # fields copied from the source task when present.
+    score_columns = [(field, priorities if field == 'priority_score' else columns[field])
+                     for field in fields if field in SCORE_FIELDS]
+    task_fields = [field for field in fields if field not in SCORE_FIELDS]
+    tasks = []
+    for k in order:
+        row = rows[k]
+        task = {field: row[field] for field in task_fields if field in row}
+        for field, column in score_columns:
+            task[field] = column[k]
+        tasks.append(task)
+    return tasks
+
+def _dependency_inputs(table: TaskTable, impact: str) -> Tuple[Sequence[int], Optional[Sequence[float]], int]:
+    # (per-row dependent counts for explanations, per-row impact values for
+    # the dependency score or None to score the counts, the value the score
+    # is normalized by).
+    if impact == "direct":
+        blocking, max_blockers = table.blocking_counts()
+        return blocking, None, max_blockers
+    if impact not in IMPACT_MODES:
+        raise ValueError(f"Unknown impact mode: {impact}")
+
+    weights = None
+    if impact != "transitive":
+        column = table.estimated_hours if impact == "transitive_hours" else table.importance
+        weights = [column[row] for row in table.last_row]
+    result = descendant_weights(table.adjacency(), weights)
+    if result is None:
+        raise ValueError("Transitive impact requires acyclic dependencies")
+
+    counts, totals = result
+    blocking = [counts[node] for node in table.row_node]
+    if weights is None:
+        return blocking, None, max(counts, default=0) or 1
+    return blocking, [totals[node] for node in table.row_node], max(totals, default=0) or 1
+
+def analyze_tasks(tasks, strategy: str = "smart_balance", vectorized: Optional[bool] = None,
+                  today: Optional[date] = None, impact: str = "direct", fields=None,
+                  verbose: bool = True) -> List[Dict]:
+    # ``today`` is the reference date for urgency; it is read once per run
+    # so every task is scored against the same day. ``fields`` (see
+    # resolve_fields) projects each result onto the named fields; otherwise
+    # ``verbose`` decides whether explanations are built and returned.
+    fields = resolve_fields(fields)
+    explain = verbose if fields is None else 'explanation' in fields
     if not tasks:
         return []
 
     if strategy not in STRATEGIES:
         raise ValueError(f"Unknown strategy: {strategy}")
 
-    valid_tasks = []
-    for task in tasks:
-        if not task.get('id'):
-            continue
-        if not task.get('title'):
-            task['title'] = f"Untitled Task {task['id']}"
-        valid_tasks.append(task)
-
-    if not valid_tasks:
+    table = prepare_tasks(tasks).scoring_table()
+    if not len(table):
         return []
 
     weights = STRATEGIES[strategy]
+    blocking, impact_values, max_blockers = _dependency_inputs(table, impact)
+    rows = table.rows
+    today = today or date.today()
+
+    if vectorized is None:
+        vectorized = np is not None and len(table) >= BATCH_SCORING_THRESHOLD
+
+    if vectorized:
+        with stage('score'):
+            columns = _batch_columns(table, blocking, max_blockers, {strategy: weights}, today, impact_values,
+                                     explain)
+        with stage('sort'):
+            order = _column_order(columns, strategy)
+        return _column_tasks(rows, columns, strategy, order, fields)
+
+    # Rank on one (priority, due date) key per row, then build response
+    # dicts in final order; the urgency memo makes the second pass cheap.
+    due_cache = {}
+    scored = blocking if impact_values is None else impact_values
+    with stage('score'):
+        keys = [_rank_key(table, row, weights, scored, max_blockers, today, due_cache) for row in range(len(rows))]
+    with stage('sort'):
+        order = sorted(range(len(rows)), key=keys.__getitem__)
+    del keys
+    return [_scored_task(table, row, weights, blocking, max_blockers, today, due_cache, impact_values,
+                         fields, explain)
+            for row in order]
+
+def resolve_fields(spec) -> Optional[Tuple[str, ...]]:
+    # A list of field names or one comma-separated string; None keeps every
+    # field. The result always starts with 'id'.
+    if spec is None:
+        return None
+    if isinstance(spec, str):
+        spec = [name.strip() for name in spec.split(',') if name.strip()]
+    if not isinstance(spec, (list, tuple)) or not spec or not all(isinstance(name, str) for name in spec):
+        raise ValueError("Fields must be a non-empty list of field names")
+    return ('id',) + tuple(name for name in dict.fromkeys(spec) if name != 'id')
+
+def resolve_impact(impact) -> str:
+    # Request parameters name the impact mode; None means "direct".
+    if impact is None:
+        return "direct"
+    if impact not in IMPACT_MODES:
+        raise ValueError(f"Unknown impact mode: {impact}; expected one of: {', '.join(IMPACT_MODES)}")
+    return impact
+
+def resolve_strategies(spec) -> Dict[str, Dict]:
+    # A list of built-in strategy names, or {name: weights} where weights is
+    # a dict with the four STRATEGIES keys, or None for the built-in of that
+    # name. None selects every built-in strategy.
+    if spec is None:
+        return dict(STRATEGIES)
+    if isinstance(spec, list):
+        spec = {name: None for name in spec}
+    if not isinstance(spec, dict) or not spec:
+        raise ValueError("Strategies must be a non-empty list or object")
+    if len(spec) > MAX_BATCH_STRATEGIES:
+        raise ValueError(f"At most {MAX_BATCH_STRATEGIES} strategies per request")
+
+    resolved = {}
+    for name, weights in spec.items():
+        if weights is None:
+            if name not in STRATEGIES:
+                raise ValueError(f"Unknown strategy: {name}")
+            weights = STRATEGIES[name]
+        elif not isinstance(weights, dict) or set(weights) != set(WEIGHT_KEYS):
+            raise ValueError(f"Weights for {name} must have exactly: {', '.join(WEIGHT_KEYS)}")
+        elif not all(isinstance(v, (int, float)) and not isinstance(v, bool) and 0 <= v < math.inf
+                     for v in weights.values()):
+            raise ValueError(f"Weights for {name} must be non-negative numbers")
+        resolved[name] = {key: weights[key] for key in WEIGHT_KEYS}
+    return resolved
+
+def analyze_strategies(tasks, strategies: Optional[Dict[str, Dict]] = None,
+                       today: Optional[date] = None, impact: str = "direct") -> Dict:
+    # Validation, blocking counts and the sub-scores are computed once; only
+    # the weighted sum and the sort run per strategy. Each scored task is
+    # returned once, and each ranking as indexes into ``tasks`` with the
+    # matching priority scores, so
+    #   [{**tasks[k], 'priority_score': p} for k, p in zip(order, scores)]
+    # equals analyze_tasks under that strategy.
+    if strategies is None:
+        strategies = STRATEGIES
+
+    table = prepare_tasks(tasks).scoring_table()
+    if not len(table):
+        return {'tasks': [], 'rankings': {name: {'order': [], 'priority_score': []} for name in strategies}}
+
+    blocking, impact_values, max_blockers = _dependency_inputs(table, impact)
+    with stage('score'):
+        columns = _table_columns(table, blocking, max_blockers, strategies, today or date.today(), impact_values)
+
+    rankings = {}
+    with stage('sort'):
+        for name in strategies:
+            order = _column_order(columns, name)
+            priorities = columns['priority_score'][name]
+            rankings[name] = {'order': order, 'priority_score': [priorities[k] for k in order]}
+
+    scored_tasks = [
+        {
+            **task,
+            'explanation': explanation,
+            'urgency_score': urgency,
+            'importance_score': importance,
+            'effort_score': effort,
+            'dependency_score': dependency
+        }
+        for task, explanation, urgency, importance, effort, dependency in zip(
+            table.rows, columns['explanation'], columns['urgency_score'], columns['importance_score'],
+            columns['effort_score'], columns['dependency_score'])
+    ]
+    return {'tasks': scored_tasks, 'rankings': rankings}
+
+def select_top_tasks(tasks, strategy: str = "smart_balance", limit: int = 3,
+                     today: Optional[date] = None, impact: str = "direct",
+                     verbose: bool = True) -> Tuple[List[Dict], int]:
+    # Same ordering as analyze_tasks(...)[:limit], but rows are ranked into a
+    # bounded heap: O(n log limit) time. Only the winners get the full score
+    # breakdown and a response dict.
+    if not tasks:
+        return [], 0
 
-    blocking_counts = defaultdict(int)
-    for task in valid_tasks:
-        for dep in task.get('dependencies', []):
-            blocking_counts[dep] += 1
-
-    max_blockers = max(blocking_counts.values()) if blocking_counts else 1
-
-    scored_tasks = []
-    for task in valid_tasks:
-        score_data = calculate_task_score(task, weights, blocking_counts, max_blockers)
-        scored_tasks.append({**task, **score_data})
-
-    def safe_due_date(d):
-        if not d:
-            return date.max
-        try:
-            return datetime.strptime(d, '%Y-%m-%d').date()
-        except:
-            return date.max
-
-    scored_tasks.sort(key=lambda x: (-x['priority_score'], safe_due_date(x.get('due_date'))))
-    return scored_tasks
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy}")
 
-def get_top_recommendations(tasks: List[Dict], strategy: str = "smart_balance", limit: int = 3):
-    analyzed_tasks = analyze_tasks(tasks, strategy)
+    table = prepare_tasks(tasks).scoring_table()
+    total = len(table)
+    if limit <= 0 or not total:
+        return [], total
 
+    weights = STRATEGIES[strategy]
+    blocking, impact_values, max_blockers = _dependency_inputs(table, impact)
+    scored = blocking if impact_values is None else impact_values
+    today = today or date.today()
+    due_cache = {}
+    with stage('score'):
+        ranked = heapq.nsmallest(limit, range(total), key=lambda row: _rank_key(
+            table, row, weights, scored, max_blockers, today, due_cache))
+
+    top_tasks = [_scored_task(table, row, weights, blocking, max_blockers, today, due_cache, impact_values,
+                              explain=verbose)
+                 for row in ranked]
+    return top_tasks, total
+
+def build_recommendations(ranked_tasks: List[Dict], verbose: bool = True) -> List[Dict]:
+    # Without ``verbose`` the explanation and reasoning text is left out
+    # and never built.
     recommendations = []
-    for i, task in enumerate(analyzed_tasks[:limit], 1):
-        reasoning = generate_recommendation_reasoning(task, i)
-        recommendations.append({
+    for i, task in enumerate(ranked_tasks, 1):
+        recommendation = {
             'rank': i,
             'task': {
                 'id': task['id'],
@@ -163,15 +550,22 @@ def get_top_recommendations(tasks: List[Dict], strategy: str = "smart_balance",
                 'due_date': task.get('due_date'),
                 'estimated_hours': task.get('estimated_hours'),
                 'importance': task.get('importance')
-            },
-            'explanation': task['explanation'],
-            'reasoning': reasoning
-        })
+            }
+        }
+        if verbose:
+            recommendation['explanation'] = task['explanation']
+            recommendation['reasoning'] = generate_recommendation_reasoning(task, i)
+        recommendations.append(recommendation)
+    return recommendations
+
+def get_top_recommendations(tasks, strategy: str = "smart_balance", limit: int = 3,
+                            today: Optional[date] = None, impact: str = "direct", verbose: bool = True):
+    top_tasks, total = select_top_tasks(tasks, strategy, limit, today, impact, verbose)
 
     return {
-        'recommendations': recommendations,
+        'recommendations': build_recommendations(top_tasks, verbose),
         'strategy_used': strategy,
-        'total_tasks_analyzed': len(analyzed_tasks),
+        'total_tasks_analyzed': total,
         'timestamp': datetime.now().isoformat()
     }
 
@@ -200,97 +594,204 @@ def validate_task_data(task: Dict) -> Tuple[bool, str]:
         return False, "Task missing 'title'"
     return True, "Valid"
 
-def analyze_dependency_graph(tasks):
-    graph = {task['id']: set(task.get('dependencies', [])) for task in tasks}
-    reverse_graph = defaultdict(set)
+def task_data_error(task) -> Optional[str]:
+    # Request-level rules shared by the API views, the task store and bulk
+    # imports. analyze_tasks itself stays lenient.
+    if not isinstance(task, dict) or 'id' not in task or 'title' not in task:
+        return "Each task must have id and title"
+    if not isinstance(task.get('dependencies', []), list):
+        return "Dependencies must be a list"
+    return None
+
+class TaskDataError(ValueError):
+    pass
+
+class PreparedTasks:
+    # A task list read once for all the stages of a request. The scoring,
+    # graph and schedule functions here take one in place of a plain list
+    # and then share its TaskTable, so the adjacency and dependent counts
+    # are built once per request. Rows without an id are graph nodes but are
+    # never scored; only then, or when the shared table was built without
+    # scoring columns, does scoring get a table of its own. Build with
+    # prepare_tasks.
+    __slots__ = ('tasks', 'scoring', 'all_scored', '_table', '_scoring_table')
+
+    def __init__(self, tasks: List[Dict], scoring: bool = True, all_scored: bool = True):
+        self.tasks = tasks
+        self.scoring = scoring
+        self.all_scored = all_scored
+        self._table = self._scoring_table = None
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    @property
+    def table(self) -> TaskTable:
+        if self._table is None:
+            self._table = TaskTable(self.tasks, self.scoring)
+        return self._table
+
+    def scoring_table(self) -> TaskTable:
+        if self._scoring_table is None:
+            if self.scoring and self.all_scored:
+                self._scoring_table = self.table
+            else:
+                rows = [task for task in self.tasks if task.get('id')]
+                for task in rows:
+                    _name_untitled(task)
+                self._scoring_table = TaskTable(rows)
+        return self._scoring_table
 
-    for t, deps in graph.items():
-        for d in deps:
-            if d in graph:
-                reverse_graph[d].add(t)
+def _name_untitled(task: Dict) -> None:
+    if not task.get('title'):
+        task['title'] = f"Untitled Task {task['id']}"
+
+def prepare_tasks(tasks, validate: bool = False, scoring: bool = True) -> PreparedTasks:
+    # One pass over ``tasks``: with ``validate`` each task is checked
+    # against task_data_error, raising TaskDataError for the first failure.
+    # With ``scoring``, tasks with an id but no title are named in place, as
+    # scoring always has; ``scoring`` off leaves titles and the scoring
+    # columns alone for graph-only requests.
+    if isinstance(tasks, PreparedTasks):
+        return tasks
+    all_scored = True
+    for task in tasks:
+        if validate:
+            error = task_data_error(task)
+            if error:
+                raise TaskDataError(error)
+        if not task.get('id'):
+            all_scored = False
+        elif scoring:
+            _name_untitled(task)
+    return PreparedTasks(tasks, scoring, all_scored)
+
+def _graph_table(tasks) -> TaskTable:
+    # Graph code reads every row, so a plain list skips prepare_tasks and
+    # is never modified.
+    if isinstance(tasks, PreparedTasks):
+        return tasks.table
+    return TaskTable(tasks, scoring=False)
 
-    blocking_counts = {task_id: len(reverse_graph.get(task_id, set())) for task_id in graph}
+def analyze_dependency_graph(tasks):
+    table = _graph_table(tasks)
+    ids = table.ids
+    n = table.node_count
+    dependencies = table.dependency_lists()
+
+    # Labels come from the first row with each id, the rest from the last.
+    labels = [None] * n
+    for row in range(len(table) - 1, -1, -1):
+        labels[table.row_node[row]] = table.rows[row]['title']
+
+    # Distinct tasks in the list that depend on each node.
+    blocking_counts = [0] * n
+    for deps in dependencies:
+        for dep in deps:
+            if dep < n:
+                blocking_counts[dep] += 1
+
+    circular = [comp for comp in indexed_components(table.adjacency()) if len(comp) > 1]
+    component_of = {}
+    for i, comp in enumerate(circular):
+        for node in comp:
+            component_of[node] = i
+
+    nodes = []
+    edges = []
+    critical_tasks = []
+    independent_tasks = []
+    leaf_tasks = []
+    root_tasks = []
+    total_dependencies = 0
+
+    for node, deps in enumerate(dependencies):
+        task_id = ids[node]
+        blocks = blocking_counts[node]
+
+        nodes.append({
+            'id': task_id,
+            'label': labels[node],
+            'group': _get_node_group(blocks, bool(deps)),
+            'value': blocks + 1,
+            'title': f"Blocks {blocks} tasks"
+        })
 
-    strongly_connected = _find_strongly_connected_components(graph)
+        component = component_of.get(node)
+        for dep in deps:
+            if dep < n:
+                circular_edge = component is not None and component_of.get(dep) == component
+                edges.append({
+                    'from': ids[dep],
+                    'to': task_id,
+                    'arrows': 'to',
+                    'color': {'color': '#e63946'} if circular_edge else {'color': '#2B7CE9'}
+                })
+
+        total_dependencies += len(deps)
+        if blocks >= 3:
+            critical_tasks.append(task_id)
+        if not blocks:
+            leaf_tasks.append(task_id)
+            if not deps:
+                independent_tasks.append(task_id)
+        if not deps:
+            root_tasks.append(task_id)
 
     return {
-        'nodes': [
-            {
-                'id': task_id,
-                'label': next((t['title'] for t in tasks if t['id'] == task_id), task_id),
-                'group': _get_node_group(task_id, graph, reverse_graph, blocking_counts),
-                'value': blocking_counts[task_id] + 1,
-                'title': f"Blocks {blocking_counts[task_id]} tasks"
-            }
-            for task_id in graph
-        ],
-        'edges': [
-            {
-                'from': dep,
-                'to': task,
-                'arrows': 'to',
-                'color': {'color': '#e63946'} if _is_circular_edge(task, dep, strongly_connected)
-                        else {'color': '#2B7CE9'}
-            }
-            for task, deps in graph.items()
-            for dep in deps
-            if dep in graph
-        ],
+        'nodes': nodes,
+        'edges': edges,
         'analysis': {
-            'total_tasks': len(graph),
-            'total_dependencies': sum(len(deps) for deps in graph.values()),
-            'critical_tasks': [t for t, c in blocking_counts.items() if c >= 3],
-            'independent_tasks': [t for t in graph if not graph[t] and not reverse_graph.get(t)],
-            'leaf_tasks': [t for t in graph if not reverse_graph.get(t)],
-            'root_tasks': [t for t in graph if not graph[t]],
-            'circular_dependencies': [c for c in strongly_connected if len(c) > 1],
-            'cycle_count': len([c for c in strongly_connected if len(c) > 1])
+            'total_tasks': n,
+            'total_dependencies': total_dependencies,
+            'critical_tasks': critical_tasks,
+            'independent_tasks': independent_tasks,
+            'leaf_tasks': leaf_tasks,
+            'root_tasks': root_tasks,
+            'circular_dependencies': [[ids[k] for k in comp] for comp in circular],
+            'cycle_count': len(circular)
         }
     }
 
-def _find_strongly_connected_components(graph):
-    index = 0
-    stack = []
-    on_stack = set()
-    indices = {}
-    lowlink = {}
-    sccs = []
-
-    def visit(node):
-        nonlocal index
-        indices[node] = index
-        lowlink[node] = index
-        index += 1
-        stack.append(node)
-        on_stack.add(node)
-
-        for nxt in graph.get(node, []):
-            if nxt not in indices:
-                visit(nxt)
-                lowlink[node] = min(lowlink[node], lowlink[nxt])
-            elif nxt in on_stack:
-                lowlink[node] = min(lowlink[node], indices[nxt])
-
-        if lowlink[node] == indices[node]:
-            comp = []
-            while True:
-                v = stack.pop()
-                on_stack.remove(v)
-                comp.append(v)
-                if v == node:
-                    break
-            sccs.append(comp)
-
-    for n in graph:
-        if n not in indices:
-            visit(n)
-
-    return sccs
-
-def _get_node_group(task_id, graph, reverse_graph, blocking_counts):
-    blocks = blocking_counts[task_id]
-    has_deps = bool(graph[task_id])
-    is_blocked = bool(reverse_graph.get(task_id))
+def task_schedule(tasks) -> Dict:
+    # Earliest/latest start and finish, slack and the critical path, in
+    # hours from the project start, using each task's estimated_hours with
+    # the same defaults as scoring. Dependencies on ids that are not in the
+    # list are ignored. Raises ValueError if the dependencies have a cycle.
+    table = _graph_table(tasks)
+    ids = table.ids
+    rows = table.rows
+    durations = [_estimated_hours_value(rows[row]) for row in table.last_row]
+
+    with stage('schedule'):
+        schedule = critical_path_schedule(table.adjacency(), durations)
+    if schedule is None:
+        raise ValueError("Circular dependencies detected")
+
+    earliest_start, earliest_finish = schedule['earliest_start'], schedule['earliest_finish']
+    latest_start, latest_finish = schedule['latest_start'], schedule['latest_finish']
+    scheduled = []
+    for node in schedule['order']:
+        slack = latest_start[node] - earliest_start[node]
+        scheduled.append({
+            'id': ids[node],
+            'duration': durations[node],
+            'earliest_start': round(earliest_start[node], 3),
+            'earliest_finish': round(earliest_finish[node], 3),
+            'latest_start': round(latest_start[node], 3),
+            'latest_finish': round(latest_finish[node], 3),
+            'slack': round(max(0.0, slack), 3),
+            'critical': slack <= SLACK_TOLERANCE
+        })
+
+    return {
+        'tasks': scheduled,
+        'critical_path': [ids[node] for node in schedule['critical_path']],
+        'project_duration': round(schedule['total_duration'], 3)
+    }
+
+def _get_node_group(blocks: int, has_deps: bool) -> str:
+    is_blocked = blocks > 0
 
     if blocks >= 3:
         return 'critical'
@@ -302,9 +803,3 @@ def _get_node_group(task_id, graph, reverse_graph, blocking_counts):
         return 'leaf'
     else:
         return 'normal'
-
-def _is_circular_edge(child, parent, components):
-    for comp in components:
-        if child in comp and parent in comp and len(comp) > 1:
-            return True
-    return False
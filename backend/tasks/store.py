@@ -0,0 +1,395 @@
+from datetime import date, datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .graph import find_cycles
+from .graph_index import graph_indexes
+from .models import Project, Task, TaskDependency, TaskScore
+from .scoring import (
+    STRATEGIES,
+    _estimated_hours_value,
+    _importance_value,
+    build_recommendations,
+    parse_due_date,
+    score_columns,
+    task_data_error
+)
+
+# Keeps ``__in`` lookups below SQLite's bound-parameter limit.
+QUERY_CHUNK_SIZE = 500
+SCORE_CHUNK_SIZE = 2000
+IMPORT_BATCH_SIZE = 5000
+
+# An edit to task T changes T's own score and the blocking counts of the
+# tasks T depends on (before and after the edit). Only if that moves the
+# project-wide max_blockers do other dependency scores change, and then only
+# for tasks that block something: a zero count scores 0 for any maximum.
+# Urgency depends on the current date, so the first write or read on a new
+# day rescores the whole project.
+
+
+class CircularDependencyError(ValueError):
+    def __init__(self, cycles):
+        super().__init__("Circular dependencies detected")
+        self.cycles = cycles
+
+
+def _chunks(items: Iterable, size: int = QUERY_CHUNK_SIZE) -> Iterator[List]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def task_fields(data: Dict) -> Dict:
+    return {
+        'title': data.get('title') or f"Untitled Task {data['id']}",
+        'due_date': parse_due_date(data.get('due_date')),
+        'importance': _importance_value(data),
+        'estimated_hours': _estimated_hours_value(data),
+    }
+
+
+def get_project(name: str) -> Project:
+    return Project.objects.get_or_create(name=name)[0]
+
+
+def _project_tasks(project: Project, task_ids: Optional[Iterable[str]] = None) -> Iterator[Task]:
+    if task_ids is None:
+        yield from Task.objects.filter(project=project).order_by('pk').iterator(chunk_size=SCORE_CHUNK_SIZE)
+        return
+    for chunk in _chunks(task_ids):
+        yield from Task.objects.filter(project=project, task_id__in=chunk)
+
+
+def _dependency_targets(project: Project, task_ids: Iterable[str]) -> Set[str]:
+    targets = set()
+    for chunk in _chunks(task_ids):
+        task_pks = Task.objects.filter(project=project, task_id__in=chunk).values('pk')
+        targets.update(TaskDependency.objects.filter(task__in=task_pks).values_list('depends_on', flat=True))
+    return targets
+
+
+def _reachable_edges(project: Project, task_ids: List[str]) -> Dict[str, List[str]]:
+    # {task id: [dependency ids]} for the given tasks and every stored task
+    # reachable from them along dependency edges, read in one recursive
+    # query that only touches the reachable rows.
+    quote = connection.ops.quote_name
+    tasks = quote(Task._meta.db_table)
+    edges = quote(TaskDependency._meta.db_table)
+    placeholders = ', '.join(['%s'] * len(task_ids))
+    query = f"""
+        WITH RECURSIVE reach(node) AS (
+            SELECT id FROM {tasks} WHERE project_id = %s AND task_id IN ({placeholders})
+            UNION
+            SELECT target.id FROM reach
+            JOIN {edges} edge ON edge.task_id = reach.node
+            JOIN {tasks} target ON target.project_id = %s AND target.task_id = edge.depends_on
+        )
+        SELECT source.task_id, edge.depends_on FROM reach
+        JOIN {tasks} source ON source.id = reach.node
+        JOIN {edges} edge ON edge.task_id = reach.node
+    """
+    graph = {}
+    with connection.cursor() as cursor:
+        cursor.execute(query, [project.pk, *task_ids, project.pk])
+        for task_id, dep in cursor.fetchall():
+            graph.setdefault(task_id, []).append(dep)
+    return graph
+
+
+def _check_cycles(project: Project, edited_ids: Set[str]) -> None:
+    # Every new cycle runs through an edited task, so only the edges
+    # reachable from the edited tasks are read, and cycles are only searched
+    # for when one of them leads back to an edited task.
+    for chunk in _chunks(edited_ids):
+        graph = _reachable_edges(project, chunk)
+        if any(dep in edited_ids for deps in graph.values() for dep in deps):
+            cycles = find_cycles(graph)
+            if cycles:
+                raise CircularDependencyError(cycles)
+
+
+def _refresh_blocking_counts(project: Project, targets: Set[str]) -> Set[str]:
+    counts = {}
+    for chunk in _chunks(targets):
+        counts.update(TaskDependency.objects.filter(project=project, depends_on__in=chunk)
+                      .values('depends_on').annotate(n=Count('id')).values_list('depends_on', 'n'))
+
+    changed = []
+    for task in _project_tasks(project, targets):
+        count = counts.get(task.task_id, 0)
+        if task.blocking_count != count:
+            task.blocking_count = count
+            changed.append(task)
+    Task.objects.bulk_update(changed, ['blocking_count'], batch_size=QUERY_CHUNK_SIZE)
+    return {task.task_id for task in changed}
+
+
+def _recompute_all_blocking_counts(project: Project) -> None:
+    edge_counts = (TaskDependency.objects
+                   .filter(project=project, depends_on=OuterRef('task_id'))
+                   .values('depends_on')
+                   .annotate(n=Count('pk'))
+                   .values('n'))
+    Task.objects.filter(project=project).update(blocking_count=Coalesce(Subquery(edge_counts), 0))
+
+
+def _refresh_max_blockers(project: Project) -> bool:
+    top = Task.objects.filter(project=project).aggregate(top=Max('blocking_count'))['top']
+    max_blockers = max(1, top or 0)
+    if max_blockers == project.max_blockers:
+        return False
+    project.max_blockers = max_blockers
+    project.save(update_fields=['max_blockers', 'updated_at'])
+    return True
+
+
+SCORE_FIELDS = ('project', 'task', 'strategy', 'priority_score', 'urgency_score', 'importance_score',
+                'effort_score', 'dependency_score', 'explanation')
+
+
+def _score_rows(project: Project, tasks: List[Task], today: date) -> Iterator[tuple]:
+    blocking_counts = {task.task_id: task.blocking_count for task in tasks}
+    columns = score_columns([task.as_dict() for task in tasks], blocking_counts, project.max_blockers, today=today)
+    for strategy, priorities in columns['priority_score'].items():
+        for i, task in enumerate(tasks):
+            yield (project.pk, task.pk, strategy, priorities[i], columns['urgency_score'][i],
+                   columns['importance_score'][i], columns['effort_score'][i],
+                   columns['dependency_score'][i], columns['explanation'][i])
+
+
+def _insert_rows(model, fields: Iterable[str], rows: Iterable[tuple]) -> None:
+    # For plain value rows with no per-row model logic (scores, edges): skips
+    # model instantiation and sends one executemany.
+    meta = model._meta
+    quote = connection.ops.quote_name
+    fields = list(fields)
+    columns = ', '.join(quote(meta.get_field(name).column) for name in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    with connection.cursor() as cursor:
+        cursor.executemany(f"INSERT INTO {quote(meta.db_table)} ({columns}) VALUES ({placeholders})", list(rows))
+
+
+def rescore_tasks(project: Project, task_ids: Optional[Iterable[str]] = None, today: Optional[date] = None) -> int:
+    # Scores only need each task's own blocking count, so tasks are scored
+    # and written in bounded chunks; a full rescore never holds the project.
+    today = today or date.today()
+    full = task_ids is None or project.scored_on != today
+
+    rescored = 0
+    with transaction.atomic():
+        if full:
+            TaskScore.objects.filter(project=project).delete()
+
+        for tasks in _chunks(_project_tasks(project, None if full else task_ids), SCORE_CHUNK_SIZE):
+            if not full:
+                TaskScore.objects.filter(task__in=tasks).delete()
+            _insert_rows(TaskScore, SCORE_FIELDS, _score_rows(project, tasks, today))
+            rescored += len(tasks)
+
+        if project.scored_on != today:
+            project.scored_on = today
+            project.save(update_fields=['scored_on', 'updated_at'])
+
+    return rescored
+
+
+def _rescore_affected(project: Project, task_ids: Set[str]) -> int:
+    if _refresh_max_blockers(project):
+        task_ids = task_ids | set(Task.objects.filter(
+            project=project, blocking_count__gt=0
+        ).values_list('task_id', flat=True))
+    return rescore_tasks(project, task_ids)
+
+
+@transaction.atomic
+def upsert_tasks(project: Project, tasks: List[Dict], check_cycles: bool = True) -> Dict:
+    for data in tasks:
+        error = task_data_error(data)
+        if error:
+            raise ValueError(error)
+
+    incoming = {str(data['id']): data for data in tasks}
+    existing = {task.task_id: task for task in _project_tasks(project, incoming)}
+    old_targets = _dependency_targets(project, existing)
+
+    created = []
+    for task_id, data in incoming.items():
+        fields = task_fields(data)
+        task = existing.get(task_id)
+        if task is None:
+            created.append(Task(project=project, task_id=task_id, **fields))
+        else:
+            for name, value in fields.items():
+                setattr(task, name, value)
+
+    Task.objects.bulk_update(list(existing.values()), ['title', 'due_date', 'importance', 'estimated_hours'],
+                             batch_size=QUERY_CHUNK_SIZE)
+    Task.objects.bulk_create(created, batch_size=QUERY_CHUNK_SIZE)
+    for chunk in _chunks(existing.values()):
+        TaskDependency.objects.filter(task__in=chunk).delete()
+
+    saved = {**existing, **{task.task_id: task for task in created}}
+    new_targets = set()
+    edges = []
+    for task_id, data in incoming.items():
+        for dep in dict.fromkeys(str(dep) for dep in data.get('dependencies', [])):
+            new_targets.add(dep)
+            edges.append(TaskDependency(project=project, task=saved[task_id], depends_on=dep))
+    TaskDependency.objects.bulk_create(edges, batch_size=QUERY_CHUNK_SIZE)
+
+    if check_cycles and edges:
+        _check_cycles(project, set(incoming))
+
+    # New tasks may already be depended on by stored ones, so their counts
+    # are refreshed as well.
+    created_ids = {task.task_id for task in created}
+    affected = _refresh_blocking_counts(project, old_targets | new_targets | created_ids)
+    rescored = _rescore_affected(project, set(incoming) | affected)
+    graph_indexes.discard(project.name)
+    return {'saved': len(incoming), 'rescored': rescored}
+
+
+@transaction.atomic
+def delete_tasks(project: Project, task_ids: List[str]) -> Dict:
+    task_ids = [str(task_id) for task_id in task_ids]
+    old_targets = _dependency_targets(project, task_ids)
+
+    deleted = 0
+    for chunk in _chunks(task_ids):
+        deleted += Task.objects.filter(project=project, task_id__in=chunk).delete()[1].get('tasks.Task', 0)
+
+    affected = _refresh_blocking_counts(project, old_targets)
+    rescored = _rescore_affected(project, affected)
+    graph_indexes.discard(project.name)
+    return {'deleted': deleted, 'rescored': rescored}
+
+
+def stored_recommendations(project: Project, strategy: str = "smart_balance", limit: int = 3,
+                           today: Optional[date] = None) -> Dict:
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy}")
+
+    today = today or date.today()
+    if project.scored_on != today:
+        rescore_tasks(project, today=today)
+
+    scores = (TaskScore.objects
+              .filter(project=project, strategy=strategy)
+              .select_related('task')
+              .order_by('-priority_score', F('task__due_date').asc(nulls_last=True), 'task__id'))
+
+    ranked = []
+    for score in scores[:max(0, limit)]:
+        ranked.append({
+            **score.task.as_dict(),
+            'priority_score': score.priority_score,
+            'explanation': score.explanation,
+            'urgency_score': score.urgency_score,
+            'importance_score': score.importance_score,
+            'effort_score': score.effort_score,
+            'dependency_score': score.dependency_score
+        })
+
+    return {
+        'recommendations': build_recommendations(ranked),
+        'strategy_used': strategy,
+        'total_tasks_analyzed': Task.objects.filter(project=project).count(),
+        'timestamp': datetime.now().isoformat()
+    }
+
+
+def import_tasks(project: Project, rows: Iterable, batch_size: int = IMPORT_BATCH_SIZE,
+                 replace: bool = False, progress=None) -> Dict:
+    # Loads tasks in batches, each committed in its own transaction, then
+    # derives blocking counts in SQL and rescores in chunks. Memory holds one
+    # batch plus the bare ids and edges needed for the duplicate and cycle
+    # checks. On any error the partially imported project is emptied again.
+    # With replace, the delete and the whole load share one transaction, so
+    # a failed import leaves the existing tasks in place.
+    try:
+        if replace:
+            try:
+                with transaction.atomic():
+                    project.tasks.all().delete()
+                    imported = _load_tasks(project, rows, batch_size, progress)
+            except Exception:
+                project.refresh_from_db()
+                raise
+        elif project.tasks.exists():
+            raise ValueError(f"Project '{project.name}' already has tasks; use replace to overwrite them")
+        else:
+            try:
+                imported = _load_tasks(project, rows, batch_size, progress)
+            except Exception:
+                project.tasks.all().delete()
+                raise
+    finally:
+        graph_indexes.discard(project.name)
+
+    return {'imported': imported}
+
+
+def _load_tasks(project: Project, rows: Iterable, batch_size: int, progress) -> int:
+    seen = set()
+    imported = 0
+    for batch in _chunks(rows, batch_size):
+        tasks = []
+        edges = []
+        for data in batch:
+            error = task_data_error(data)
+            if error:
+                raise ValueError(f"Task #{imported + len(tasks) + 1}: {error}")
+            task_id = str(data['id'])
+            if task_id in seen:
+                raise ValueError(f"Task #{imported + len(tasks) + 1}: duplicate id '{task_id}'")
+            seen.add(task_id)
+            task = Task(project=project, task_id=task_id, **task_fields(data))
+            tasks.append(task)
+            edges.append((task, dict.fromkeys(str(dep) for dep in data.get('dependencies', []))))
+
+        with transaction.atomic():
+            # Relies on the backend returning primary keys from bulk
+            # inserts (SQLite 3.35+, PostgreSQL) to attach the edges.
+            Task.objects.bulk_create(tasks, batch_size=QUERY_CHUNK_SIZE)
+            _insert_rows(TaskDependency, ('project', 'task', 'depends_on'), (
+                (project.pk, task.pk, dep) for task, deps in edges for dep in deps
+            ))
+
+        imported += len(tasks)
+        if progress:
+            progress(imported)
+
+    graph = {task_id: [] for task_id in seen}
+    for task_id, dep in TaskDependency.objects.filter(project=project).values_list('task__task_id', 'depends_on').iterator():
+        graph[task_id].append(dep)
+    cycles = find_cycles(graph, first_only=True)
+    if cycles:
+        raise CircularDependencyError(cycles)
+    del graph
+
+    _recompute_all_blocking_counts(project)
+    _refresh_max_blockers(project)
+    project.scored_on = None
+    rescore_tasks(project)
+    return imported
+
+
+def iter_exported_tasks(project: Project, chunk_size: int = SCORE_CHUNK_SIZE) -> Iterator[Dict]:
+    for tasks in _chunks(_project_tasks(project), chunk_size):
+        dependencies = {task.pk: [] for task in tasks}
+        for task_pk, dep in (TaskDependency.objects
+                             .filter(task__in=tasks)
+                             .order_by('pk')
+                             .values_list('task_id', 'depends_on')):
+            dependencies[task_pk].append(dep)
+        for task in tasks:
+            yield task.as_dict(dependencies[task.pk])
@@ -0,0 +1,165 @@
+from collections import defaultdict
+from datetime import date
+from tempfile import SpooledTemporaryFile
+from typing import Iterable, Iterator, List, Optional, Tuple
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .scoring import STRATEGIES, _safe_due_date, calculate_task_score
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+# Spooled buffers stay in memory up to this size and then move to a
+# temporary file, so peak memory no longer grows with the upload size.
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# Ranked lines are handed to an ASGI server in chunks of about this size.
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Ranking needs every score before the first line can be sent, and scores
+# need the global blocking counts, so the stream is processed in passes:
+#
+#   1. ingest:  read the request line by line, validate, keep only the
+#               dependency graph and blocking counts, spool the raw lines.
+#   2. rank:    re-read the spool, score each task and spool the encoded
+#               result, keeping a small (sort key, offset, length) record.
+#   3. emit:    sort the records and copy encoded lines out in rank order.
+#
+# Full task dicts only ever exist one at a time.
+
+
+class TaskSpool:
+    def __init__(self):
+        self.file = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        self.graph = {}
+        self.blocking_counts = defaultdict(int)
+        self.total_tasks = 0
+
+    @property
+    def max_blockers(self) -> int:
+        return max(self.blocking_counts.values()) if self.blocking_counts else 1
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def ingest_ndjson_tasks(lines: Iterable[bytes]) -> TaskSpool:
+    spool = TaskSpool()
+    try:
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+
+            task = json.loads(line)
+            if not isinstance(task, dict) or 'id' not in task or 'title' not in task:
+                raise ValueError("Each task must have id and title")
+            dependencies = task.get('dependencies', [])
+            if not isinstance(dependencies, list):
+                raise ValueError("Dependencies must be a list")
+
+            spool.graph[task['id']] = list(dict.fromkeys(dependencies))
+            if task['id']:
+                spool.total_tasks += 1
+                for dep in dependencies:
+                    spool.blocking_counts[dep] += 1
+
+            spool.file.write(line)
+            spool.file.write(b'\n')
+    except Exception:
+        spool.close()
+        raise
+
+    return spool
+
+
+def rank_spooled_tasks(spool: TaskSpool, strategy: str, today: Optional[date] = None,
+                       fields: Optional[Tuple[str, ...]] = None,
+                       verbose: bool = True) -> Tuple[SpooledTemporaryFile, List[Tuple[int, int]]]:
+    # ``fields`` (already resolved) and ``verbose`` shape each line as they
+    # shape each result of analyze_tasks.
+    explain = verbose if fields is None else 'explanation' in fields
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy}")
+
+    weights = STRATEGIES[strategy]
+    blocking_counts = spool.blocking_counts
+    max_blockers = spool.max_blockers
+    today = today or date.today()
+    # The graph is only needed for cycle detection.
+    spool.graph = {}
+
+    output = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    records = []
+    spool.file.seek(0)
+    try:
+        for position, line in enumerate(spool.file):
+            task = json.loads(line)
+            if not task.get('id'):
+                continue
+            if not task.get('title'):
+                task['title'] = f"Untitled Task {task['id']}"
+
+            score_data = calculate_task_score(task, weights, blocking_counts, max_blockers, today, explain)
+            if fields is None:
+                result = {**task, **score_data}
+            else:
+                result = {name: score_data[name] if name in score_data else task[name]
+                          for name in fields if name in score_data or name in task}
+            encoded = json.dumps(result, cls=DjangoJSONEncoder).encode() + b'\n'
+            records.append((
+                -score_data['priority_score'], _safe_due_date(task.get('due_date')), position,
+                output.tell(), len(encoded)
+            ))
+            output.write(encoded)
+    except Exception:
+        output.close()
+        raise
+
+    records.sort()
+    return output, [(offset, length) for *_, offset, length in records]
+
+
+def iter_ranked_lines(output: SpooledTemporaryFile, index: List[Tuple[int, int]]) -> Iterator[bytes]:
+    try:
+        for offset, length in index:
+            output.seek(offset)
+            yield output.read(length)
+    finally:
+        output.close()
+
+
+class AsyncRankedLines:
+    # iter_ranked_lines for ASGI servers, which would otherwise read a sync
+    # iterator into a list before sending the first byte. Chunks are read
+    # from the spool in a worker thread; Django calls close() once the
+    # response is finished, even if it was never iterated.
+    def __init__(self, output: SpooledTemporaryFile, index: List[Tuple[int, int]]):
+        self.output = output
+        self._lines = iter_ranked_lines(output, index)
+        self._read = sync_to_async(self._next_chunk, thread_sensitive=False)
+
+    def _next_chunk(self) -> bytes:
+        parts = []
+        size = 0
+        for line in self._lines:
+            parts.append(line)
+            size += len(line)
+            if size >= STREAM_CHUNK_SIZE:
+                break
+        return b''.join(parts)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> bytes:
+        chunk = await self._read()
+        if not chunk:
+            raise StopAsyncIteration
+        return chunk
+
+    def close(self) -> None:
+        self._lines.close()
+        self.output.close()
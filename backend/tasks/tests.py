@@ -1,6 +1,66 @@
-from django.test import TestCase
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import LiveServerTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from unittest import mock, skipUnless
 from datetime import date, timedelta
-from .scoring import analyze_tasks, detect_circular_dependencies, get_top_recommendations
+import asyncio
+import copy
+import io
+import json
+import math
+import os
+import random
+import tempfile
+import threading
+import warnings
+from .benchmarks import TARGETS, compare_results, generate_tasks
+from .cache import (
+    LocalCacheBackend,
+    apply_task_changes,
+    approximate_size,
+    build_rankings,
+    build_result_cache,
+    build_task_lists
+)
+from .concurrency import EndpointLimiter, Saturated, build_limiters
+from .graph import descendant_weights, strongly_connected_components
+from .graph_index import GraphIndex, graph_indexes
+from .loadtest import HISTOGRAM_BOUNDS_MS, load_recorded, parse_mix, run_load, synthetic_mix
+from .models import Project, Task, TaskDependency, TaskScore
+from .parallel import ParallelScorer, build_parallel_scorer
+from .records import TaskTable
+from .scoring import (
+    STRATEGIES,
+    TaskDataError,
+    analyze_dependency_graph,
+    analyze_strategies,
+    analyze_tasks,
+    calculate_batch_scores,
+    calculate_task_score,
+    detect_circular_dependencies,
+    get_top_recommendations,
+    np,
+    parse_due_date,
+    prepare_tasks,
+    resolve_strategies,
+    select_top_tasks,
+    task_schedule
+)
+from .store import (
+    CircularDependencyError,
+    _check_cycles,
+    _reachable_edges,
+    get_project,
+    import_tasks,
+    iter_exported_tasks,
+    upsert_tasks
+)
+from .streaming import ingest_ndjson_tasks, rank_spooled_tasks
+from .transfer import iter_json_array
+from .views import analyze_tasks_view, dependency_graph_view, rankings, result_cache, suggest_tasks_view, task_lists
+from . import wire
+from .wire import WireFormatError, decode_payload, encode_payload, response_format
 
 class TaskScoringTest(TestCase):
     def setUp(self):
@@ -109,3 +169,1326 @@ class TaskScoringTest(TestCase):
     def test_recommendations_limit_exceeds_tasks(self):
         result = get_top_recommendations(self.sample_tasks, limit=10)
         self.assertEqual(len(result["recommendations"]), len(self.sample_tasks))
+
+
+class DependencyGraphEngineTest(TestCase):
+    def test_long_chain_does_not_hit_recursion_limit(self):
+        size = 20000
+        tasks = [
+            {"id": f"t{i}", "title": f"Task {i}", "dependencies": [f"t{i + 1}"] if i + 1 < size else []}
+            for i in range(size)
+        ]
+        has_cycle, cycles = detect_circular_dependencies(tasks)
+        self.assertFalse(has_cycle)
+
+        tasks[-1]["dependencies"] = ["t0"]
+        has_cycle, cycles = detect_circular_dependencies(tasks)
+        self.assertTrue(has_cycle)
+        self.assertEqual(len(cycles[0]), size + 1)
+        self.assertEqual(cycles[0][0], cycles[0][-1])
+
+    def test_cycle_path_is_closed(self):
+        tasks = [
+            {"id": "a", "dependencies": ["b"]},
+            {"id": "b", "dependencies": ["c"]},
+            {"id": "c", "dependencies": ["a"]},
+        ]
+        has_cycle, cycles = detect_circular_dependencies(tasks)
+        self.assertEqual(cycles, [["a", "b", "c", "a"]])
+
+    def test_stop_at_first_cycle(self):
+        tasks = [
+            {"id": "a", "dependencies": ["b"]},
+            {"id": "b", "dependencies": ["a"]},
+            {"id": "c", "dependencies": ["d"]},
+            {"id": "d", "dependencies": ["c"]},
+        ]
+        self.assertEqual(len(detect_circular_dependencies(tasks)[1]), 2)
+        has_cycle, cycles = detect_circular_dependencies(tasks, stop_at_first=True)
+        self.assertTrue(has_cycle)
+        self.assertEqual(len(cycles), 1)
+
+    def test_strongly_connected_components_on_deep_graph(self):
+        size = 20000
+        graph = {i: [i + 1] for i in range(size)}
+        graph[size] = [0]
+        graph[size + 1] = [0]
+        components = strongly_connected_components(graph)
+        self.assertEqual(sorted(len(c) for c in components), [1, size + 1])
+
+
+@skipUnless(np is not None, "NumPy not installed")
+class BatchScoringTest(TestCase):
+    def setUp(self):
+        today = date.today()
+        self.tasks = []
+        for i in range(60):
+            self.tasks.append({
+                "id": f"t{i}",
+                "title": f"Task {i}",
+                "due_date": [(today + timedelta(days=i % 17 - 5)).isoformat(), None, "not-a-date"][i % 3],
+                "estimated_hours": [1, 2.5, "3", None, "bad", 0.1][i % 6],
+                "importance": [9, "4", None, 12, -1, 7.5, "x"][i % 7],
+                "dependencies": [f"t{(i * 7) % 60}"] if i % 4 else []
+            })
+
+    def test_batch_matches_per_task_scoring(self):
+        for strategy in STRATEGIES:
+            expected = analyze_tasks(copy.deepcopy(self.tasks), strategy, vectorized=False)
+            actual = analyze_tasks(copy.deepcopy(self.tasks), strategy, vectorized=True)
+            self.assertEqual(json.dumps(actual), json.dumps(expected))
+
+    def test_batch_scores_every_strategy_at_once(self):
+        blocking_counts = {"t0": 3}
+        columns = calculate_batch_scores(self.tasks, blocking_counts, 3)
+        self.assertEqual(set(columns['priority_score']), set(STRATEGIES))
+        for strategy, weights in STRATEGIES.items():
+            expected = [
+                calculate_task_score(task, weights, blocking_counts, 3)['priority_score']
+                for task in self.tasks
+            ]
+            self.assertEqual(columns['priority_score'][strategy], expected)
+
+
+class TopRecommendationsTest(TestCase):
+    def setUp(self):
+        today = date.today()
+        self.tasks = [
+            {
+                "id": f"t{i}",
+                "title": f"Task {i}" if i % 5 else "",
+                "due_date": (today + timedelta(days=i % 4)).isoformat() if i % 3 else None,
+                "estimated_hours": i % 3 + 1,
+                "importance": i % 4 + 5,
+                "dependencies": [f"t{i - 1}"] if i % 2 else []
+            }
+            for i in range(40)
+        ]
+
+    def test_top_tasks_match_full_ranking(self):
+        for strategy in STRATEGIES:
+            for limit in (1, 3, 10, 50):
+                expected = analyze_tasks(copy.deepcopy(self.tasks), strategy, vectorized=False)[:limit]
+                top_tasks, total = select_top_tasks(copy.deepcopy(self.tasks), strategy, limit)
+                self.assertEqual(top_tasks, expected)
+                self.assertEqual(total, len(self.tasks))
+
+    def test_recommendations_report_all_tasks_considered(self):
+        result = get_top_recommendations(self.tasks, limit=0)
+        self.assertEqual(result["recommendations"], [])
+        self.assertEqual(result["total_tasks_analyzed"], len(self.tasks))
+
+
+class ResultCacheTest(TestCase):
+    def setUp(self):
+        result_cache.clear()
+        self.tasks = [
+            {"id": "a", "title": "A", "importance": 8, "dependencies": []},
+            {"id": "b", "title": "B", "importance": 3, "dependencies": ["a"]},
+        ]
+
+    def test_key_is_canonical_and_includes_date(self):
+        cache = build_result_cache()
+        reordered = [{"dependencies": [], "importance": 8, "title": "A", "id": "a"}, self.tasks[1]]
+        key = cache.make_key("analyze", self.tasks, strategy="smart_balance")
+        self.assertEqual(key, cache.make_key("analyze", reordered, strategy="smart_balance"))
+        self.assertNotEqual(key, cache.make_key("analyze", self.tasks, strategy="high_impact"))
+        self.assertNotEqual(key, cache.make_key("suggest", self.tasks, strategy="smart_balance"))
+        tomorrow = date.today() + timedelta(days=1)
+        self.assertNotEqual(key, cache.make_key("analyze", self.tasks, tomorrow, strategy="smart_balance"))
+
+    def test_raw_body_keys_and_concurrent_stats(self):
+        cache = build_result_cache()
+        body = json.dumps({"tasks": self.tasks}).encode()
+        key = cache.make_key("analyze", body, strategy="smart_balance")
+        self.assertEqual(key, cache.make_key("analyze", bytes(body), strategy="smart_balance"))
+        self.assertNotEqual(key, cache.make_key("analyze", body.replace(b", ", b","), strategy="smart_balance"))
+        self.assertNotEqual(key, cache.make_key("suggest", body, strategy="smart_balance"))
+        self.assertNotEqual(key, cache.make_key("analyze", body, strategy="high_impact"))
+
+        cache.set("present", 1)
+        threads = [threading.Thread(target=lambda: [cache.get(k) for k in ("present", "absent") * 500])
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(cache.stats(), {"hits": 4000, "misses": 4000, "hit_rate": 0.5})
+
+    def test_local_backend_evicts_least_recently_used_and_expired(self):
+        backend = LocalCacheBackend(max_entries=2)
+        backend.set("a", 1, timeout=10, now=0)
+        backend.set("b", 2, timeout=10, now=0)
+        backend.get("a", now=1)
+        backend.set("c", 3, timeout=10, now=1)
+        self.assertIsNone(backend.get("b", now=1))
+        self.assertEqual(backend.get("a", now=1), 1)
+        self.assertIsNone(backend.get("c", now=11))
+        self.assertEqual(len(backend), 1)
+
+    def test_local_backend_honours_byte_budget(self):
+        backend = LocalCacheBackend(max_entries=10, max_bytes=100)
+        backend.set("a", 1, timeout=10, now=0, size=40)
+        backend.set("b", 2, timeout=10, now=0, size=40)
+        backend.get("a", now=1)
+        backend.set("c", 3, timeout=10, now=1, size=40)
+        self.assertIsNone(backend.get("b", now=1))
+        self.assertEqual((len(backend), backend.nbytes), (2, 80))
+        # Too large for the whole budget: not stored, nothing evicted.
+        backend.set("d", 4, timeout=10, now=1, size=101)
+        self.assertIsNone(backend.get("d", now=1))
+        self.assertEqual((len(backend), backend.nbytes), (2, 80))
+        backend.set("a", 5, timeout=10, now=1, size=10)
+        self.assertEqual(backend.nbytes, 50)
+
+        cache = build_result_cache({"MAX_BYTES": 1000})
+        cache.set("small", (200, b"x" * 600), 600)
+        cache.set("large", (200, b"x" * 1001), 1001)
+        cache.set("other", (200, b"x" * 600), 600)
+        self.assertEqual([cache.get(key) is not None for key in ("small", "large", "other")], [False, False, True])
+
+    def test_analyze_view_serves_repeat_requests_from_cache(self):
+        body = json.dumps({"tasks": self.tasks, "strategy": "smart_balance"})
+        first = self.client.post("/api/tasks/analyze/", body, content_type="application/json")
+        second = self.client.post("/api/tasks/analyze/", body, content_type="application/json")
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(result_cache.stats()["hits"], 1)
+        self.assertEqual(result_cache.stats()["misses"], 1)
+
+
+class DependencyGraphAnalysisTest(TestCase):
+    def test_labels_groups_and_circular_edges(self):
+        tasks = [
+            {"id": "a", "title": "Alpha", "dependencies": ["b"]},
+            {"id": "b", "title": "Beta", "dependencies": ["a"]},
+            {"id": "c", "title": "Gamma", "dependencies": ["a", "missing"]},
+            {"id": "d", "title": "Delta", "dependencies": []},
+        ]
+        graph = analyze_dependency_graph(tasks)
+
+        labels = {node["id"]: node["label"] for node in graph["nodes"]}
+        self.assertEqual(labels, {"a": "Alpha", "b": "Beta", "c": "Gamma", "d": "Delta"})
+
+        colors = {(edge["from"], edge["to"]): edge["color"]["color"] for edge in graph["edges"]}
+        self.assertEqual(colors, {("b", "a"): "#e63946", ("a", "b"): "#e63946", ("a", "c"): "#2B7CE9"})
+
+        analysis = graph["analysis"]
+        self.assertEqual(analysis["total_dependencies"], 4)
+        self.assertEqual(analysis["independent_tasks"], ["d"])
+        self.assertEqual(analysis["leaf_tasks"], ["c", "d"])
+        self.assertEqual(analysis["root_tasks"], ["d"])
+        self.assertEqual(analysis["cycle_count"], 1)
+        self.assertEqual(sorted(analysis["circular_dependencies"][0]), ["a", "b"])
+
+
+class NDJSONAnalyzeTest(TestCase):
+    def setUp(self):
+        result_cache.clear()
+        today = date.today()
+        self.tasks = [
+            {"id": f"t{i}", "title": f"Task {i}", "importance": i % 10 + 1,
+             "due_date": (today + timedelta(days=i % 5)).isoformat(),
+             "dependencies": [f"t{i - 1}"] if i else []}
+            for i in range(25)
+        ]
+
+    def post_ndjson(self, lines, strategy="smart_balance"):
+        body = "\n".join(lines) + "\n"
+        return self.client.post(f"/api/tasks/analyze/?strategy={strategy}", body,
+                                content_type="application/x-ndjson")
+
+    def test_streams_same_ranking_as_json_mode(self):
+        response = self.post_ndjson([json.dumps(task) for task in self.tasks], "high_impact")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(response["X-Total-Tasks"], "25")
+
+        streamed = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(streamed, analyze_tasks(copy.deepcopy(self.tasks), "high_impact"))
+
+    async def test_streams_asynchronously_under_asgi(self):
+        body = "".join(json.dumps(task) + "\n" for task in self.tasks)
+        with mock.patch("tasks.streaming.STREAM_CHUNK_SIZE", 512):
+            response = await self.async_client.post("/api/tasks/analyze/?strategy=high_impact", body,
+                                                    content_type="application/x-ndjson")
+            self.assertTrue(response.is_async)
+            with warnings.catch_warnings():
+                warnings.simplefilter("error")
+                chunks = [chunk async for chunk in response]
+        response.close()
+        self.assertGreater(len(chunks), 1)
+        streamed = [json.loads(line) for line in b"".join(chunks).splitlines()]
+        self.assertEqual(streamed, analyze_tasks(copy.deepcopy(self.tasks), "high_impact"))
+
+    def test_honours_fields_and_verbose(self):
+        lines = [json.dumps(task) for task in self.tasks]
+        for query, options in (("&fields=priority_score,title", {"fields": "priority_score,title"}),
+                               ("&verbose=false", {"verbose": False})):
+            response = self.post_ndjson(lines, "high_impact" + query)
+            self.assertEqual(response.status_code, 200)
+            streamed = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+            self.assertEqual(streamed, analyze_tasks(copy.deepcopy(self.tasks), "high_impact", **options))
+
+        response = self.post_ndjson(lines, "high_impact&impact=transitive")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "NDJSON analysis supports only direct impact")
+        self.assertEqual(self.post_ndjson(lines, "high_impact&verbose=maybe").status_code, 400)
+        self.assertEqual(self.post_ndjson(lines, "high_impact&fields=").status_code, 400)
+
+    def test_rejects_invalid_lines_and_cycles(self):
+        response = self.post_ndjson(['{"id": "a", "title": "A"}', '{"id": "b"}'])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Each task must have id and title")
+
+        response = self.post_ndjson(['{"id": "a", "title": "A"', ''])
+        self.assertEqual(response.json()["error"], "Invalid JSON")
+
+        response = self.post_ndjson([
+            '{"id": "a", "title": "A", "dependencies": ["b"]}',
+            '{"id": "b", "title": "B", "dependencies": ["a"]}',
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("cycles", response.json())
+
+    def test_failed_ranking_closes_output_spool(self):
+        spool = ingest_ndjson_tasks(json.dumps(task).encode() for task in self.tasks)
+        self.addCleanup(spool.close)
+        opened = []
+
+        def spooled_file(*args, **kwargs):
+            opened.append(tempfile.SpooledTemporaryFile(*args, **kwargs))
+            return opened[-1]
+
+        scores = [calculate_task_score(self.tasks[0], STRATEGIES["smart_balance"], {}, 1)] * 3
+        with mock.patch("tasks.streaming.SpooledTemporaryFile", side_effect=spooled_file), \
+                mock.patch("tasks.streaming.calculate_task_score", side_effect=scores + [TypeError("boom")]):
+            with self.assertRaises(TypeError):
+                rank_spooled_tasks(spool, "smart_balance")
+        self.assertTrue(opened[0].closed)
+
+
+class TaskStoreTest(TestCase):
+    def setUp(self):
+        self.project = get_project("demo")
+        today = date.today()
+        self.tasks = [
+            {"id": "a", "title": "A", "importance": 8, "estimated_hours": 2,
+             "due_date": (today + timedelta(days=2)).isoformat(), "dependencies": []},
+            {"id": "b", "title": "B", "importance": 4, "dependencies": ["a"]},
+            {"id": "c", "title": "C", "importance": 6, "dependencies": ["a", "b"]},
+            {"id": "d", "title": "D", "importance": 2, "dependencies": []},
+        ]
+        upsert_tasks(self.project, self.tasks)
+
+    def stored_scores(self, strategy="smart_balance"):
+        return {
+            score.task.task_id: score.priority_score
+            for score in TaskScore.objects.filter(project=self.project, strategy=strategy).select_related("task")
+        }
+
+    def test_stored_scores_match_analysis(self):
+        expected = {task["id"]: task["priority_score"] for task in analyze_tasks(copy.deepcopy(self.tasks))}
+        self.assertEqual(self.stored_scores(), expected)
+        self.assertEqual(Task.objects.get(project=self.project, task_id="a").blocking_count, 2)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.max_blockers, 2)
+
+    def test_edit_rescores_only_affected_tasks(self):
+        result = upsert_tasks(self.project, [{"id": "d", "title": "D", "importance": 9, "dependencies": ["b"]}])
+        # d itself and b, whose blocking count changed; max_blockers is unchanged.
+        self.assertEqual(result["rescored"], 2)
+
+        self.tasks[3] = {"id": "d", "title": "D", "importance": 9, "dependencies": ["b"]}
+        expected = {task["id"]: task["priority_score"] for task in analyze_tasks(copy.deepcopy(self.tasks))}
+        self.assertEqual(self.stored_scores(), expected)
+
+    def test_max_blockers_change_rescores_blocking_tasks(self):
+        result = upsert_tasks(self.project, [{"id": "d", "title": "D", "dependencies": ["a"]}])
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.max_blockers, 3)
+        # d, plus a and b which block other tasks.
+        self.assertEqual(result["rescored"], 3)
+
+    def test_new_task_counts_existing_dependents(self):
+        # e is depended on before it exists; creating it picks up the edge.
+        upsert_tasks(self.project, [{"id": "f", "title": "F", "dependencies": ["e"]}])
+        upsert_tasks(self.project, [{"id": "e", "title": "E", "importance": 7}])
+        self.assertEqual(Task.objects.get(project=self.project, task_id="e").blocking_count, 1)
+
+        self.tasks += [{"id": "f", "title": "F", "dependencies": ["e"]}, {"id": "e", "title": "E", "importance": 7}]
+        expected = {task["id"]: task["priority_score"] for task in analyze_tasks(copy.deepcopy(self.tasks))}
+        self.assertEqual(self.stored_scores(), expected)
+
+    def test_cycle_check_reads_only_reachable_edges(self):
+        # 2,000 two-task chains; an edit only reads its own chain.
+        project = get_project("large")
+        import_tasks(project, ({"id": f"t{k}", "title": "T", "dependencies": [f"t{k - 1}"] if k % 2 else []}
+                               for k in range(4000)))
+        with self.assertNumQueries(1):
+            self.assertEqual(_reachable_edges(project, ["t3"]), {"t3": ["t2"]})
+        with self.assertNumQueries(1):
+            _check_cycles(project, {"t3"})
+
+        # An edit without dependencies cannot close a cycle and skips the check.
+        for deps, walks in (([], 0), (["t0"], 1)):
+            with CaptureQueriesContext(connection) as queries:
+                upsert_tasks(project, [{"id": "t1", "title": "T", "dependencies": deps}])
+            self.assertEqual(sum("RECURSIVE" in query["sql"] for query in queries), walks)
+        with self.assertRaises(CircularDependencyError):
+            upsert_tasks(project, [{"id": "t0", "title": "T", "dependencies": ["t1"]}])
+
+    def test_rejects_edit_that_creates_cycle(self):
+        with self.assertRaises(CircularDependencyError):
+            upsert_tasks(self.project, [{"id": "a", "title": "A", "dependencies": ["c"]}])
+        self.assertFalse(TaskDependency.objects.filter(task__task_id="a").exists())
+
+    def test_delete_and_suggest_views(self):
+        response = self.client.delete("/api/tasks/projects/demo/tasks/a/")
+        self.assertEqual(response.json()["deleted"], 1)
+
+        response = self.client.get("/api/tasks/projects/demo/suggest/?limit=2")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["total_considered"], 3)
+        self.assertEqual(len(response.json()["recommendations"]), 2)
+
+        remaining = [task for task in self.tasks if task["id"] != "a"]
+        expected = get_top_recommendations(copy.deepcopy(remaining), limit=2)["recommendations"]
+        self.assertEqual([r["task"]["id"] for r in response.json()["recommendations"]],
+                         [r["task"]["id"] for r in expected])
+
+        self.assertEqual(self.client.get("/api/tasks/projects/missing/suggest/").status_code, 404)
+
+
+class ImportExportCommandTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.tasks = [
+            {"id": "a", "title": "A", "due_date": "2030-01-02", "estimated_hours": 2.0, "importance": 8,
+             "dependencies": []},
+            {"id": "b", "title": "B, with comma", "due_date": None, "estimated_hours": 4.0, "importance": 5,
+             "dependencies": ["a"]},
+            {"id": "c", "title": "C", "due_date": None, "estimated_hours": 1.5, "importance": 3,
+             "dependencies": ["a", "b"]},
+        ]
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_round_trip_all_formats(self):
+        source = self.path("tasks.json")
+        with open(source, "w") as fp:
+            json.dump(self.tasks, fp)
+        call_command("import_tasks", source, project="p", batch_size=2, stdout=io.StringIO())
+
+        project = Project.objects.get(name="p")
+        self.assertEqual(Task.objects.get(project=project, task_id="a").blocking_count, 2)
+        self.assertEqual(TaskScore.objects.filter(project=project).count(), 3 * len(STRATEGIES))
+
+        for fmt in ("json", "ndjson", "csv"):
+            exported = self.path(f"out.{fmt}")
+            call_command("export_tasks", project="p", output=exported, stderr=io.StringIO())
+            call_command("import_tasks", exported, project=f"copy-{fmt}", stdout=io.StringIO())
+            copied = Project.objects.get(name=f"copy-{fmt}")
+            self.assertEqual(list(iter_exported_tasks(copied)), self.tasks)
+
+    def test_invalid_rows_and_cycles_leave_project_empty(self):
+        source = self.path("tasks.ndjson")
+        with open(source, "w") as fp:
+            fp.write('{"id": "a", "title": "A"}\n{"id": "b"}\n')
+        with self.assertRaisesMessage(CommandError, "Task #2: Each task must have id and title"):
+            call_command("import_tasks", source, project="p", stdout=io.StringIO())
+
+        with open(source, "w") as fp:
+            fp.write('{"id": "a", "title": "A", "dependencies": ["b"]}\n')
+            fp.write('{"id": "b", "title": "B", "dependencies": ["a"]}\n')
+        with self.assertRaisesMessage(CommandError, "Circular dependencies detected"):
+            call_command("import_tasks", source, project="p", batch_size=1, stdout=io.StringIO())
+        self.assertFalse(Task.objects.filter(project__name="p").exists())
+
+    def test_failed_replace_keeps_existing_tasks(self):
+        source = self.path("tasks.json")
+        with open(source, "w") as fp:
+            json.dump(self.tasks, fp)
+        call_command("import_tasks", source, project="p", stdout=io.StringIO())
+
+        with open(source, "w") as fp:
+            json.dump([{"id": "x", "title": "X"}, {"id": "x", "title": "X again"}], fp)
+        with self.assertRaisesMessage(CommandError, "duplicate id 'x'"):
+            call_command("import_tasks", source, project="p", replace=True, batch_size=1, stdout=io.StringIO())
+        project = Project.objects.get(name="p")
+        self.assertEqual(list(iter_exported_tasks(project)), self.tasks)
+        self.assertEqual(TaskScore.objects.filter(project=project).count(), 3 * len(STRATEGIES))
+
+    def test_json_array_reader_handles_small_reads(self):
+        payload = json.dumps(self.tasks, indent=2)
+        with mock.patch("tasks.transfer.READ_SIZE", 7):
+            self.assertEqual(list(iter_json_array(io.StringIO(payload))), self.tasks)
+
+
+class BenchmarkCommandTest(TestCase):
+    def test_generators_produce_expected_shapes(self):
+        self.assertFalse(detect_circular_dependencies(generate_tasks("random_dag", 300))[0])
+        self.assertTrue(detect_circular_dependencies(generate_tasks("cyclic", 300))[0])
+        fan_in = analyze_dependency_graph(generate_tasks("wide_fan_in", 50))
+        self.assertEqual(fan_in["nodes"][0]["value"], 50)
+
+    def test_command_writes_json_report_and_flags_regressions(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "report.json")
+            call_command("run_benchmarks", sizes="50", shapes="long_chain,hub_nodes", repeat=2,
+                         output=output, verbosity=0)
+            with open(output) as fp:
+                report = json.load(fp)
+
+            self.assertEqual(len(report["results"]), 2 * len(TARGETS))
+            result = report["results"][0]
+            for key in ("p50_ms", "p99_ms", "throughput_tasks_per_s", "peak_memory_bytes"):
+                self.assertIn(key, result)
+
+            self.assertEqual(len(compare_results(report, report)), 0)
+            faster = copy.deepcopy(report)
+            for result in faster["results"]:
+                result["p50_ms"] = result["p50_ms"] / 10
+            self.assertEqual(len(compare_results(faster, report)), len(report["results"]))
+
+
+class StageTimingTest(TestCase):
+    def setUp(self):
+        result_cache.clear()
+        self.body = json.dumps({"tasks": [
+            {"id": "a", "title": "A", "dependencies": []},
+            {"id": "b", "title": "B", "dependencies": ["a"]},
+        ]})
+
+    def post(self, path="/api/tasks/analyze/"):
+        return self.client.post(path, self.body, content_type="application/json")
+
+    @override_settings(TASKS_STAGE_TIMING=False, TASKS_ALLOW_PROFILING=False)
+    def test_disabled_by_default(self):
+        response = self.post()
+        self.assertNotIn("Server-Timing", response)
+        self.assertIn("tasks", self.post("/api/tasks/analyze/?profile=1").json())
+
+    @override_settings(TASKS_STAGE_TIMING=True)
+    def test_server_timing_header_and_log_line(self):
+        with self.assertLogs("tasks.timing", level="INFO") as logs:
+            response = self.post()
+        stages = [part.split(";")[0] for part in response["Server-Timing"].split(", ")]
+        for name in ("parse", "cache", "validate", "cycles", "score", "sort", "serialize", "total"):
+            self.assertIn(name, stages)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["view"], "analyze_tasks_view")
+        self.assertEqual(record["status"], 200)
+        self.assertIn("score", record["stages"])
+
+    @override_settings(TASKS_ALLOW_PROFILING=True)
+    def test_profile_mode_returns_cprofile_summary(self):
+        with self.assertLogs("tasks.timing", level="INFO"):
+            response = self.post("/api/tasks/analyze/?profile=1")
+        data = response.json()
+        self.assertEqual(data["status"], 200)
+        self.assertTrue(any("analyze_tasks" in row["function"] for row in data["profile"]))
+
+
+class TaskTableTest(TestCase):
+    def setUp(self):
+        self.tasks = [
+            {"id": "a", "title": "A", "importance": "7", "estimated_hours": None, "dependencies": ["b", "x", "b"]},
+            {"id": "b", "title": "B", "importance": 42, "estimated_hours": "0.1", "dependencies": []},
+            {"id": "a", "title": "A again", "dependencies": ["b"]},
+        ]
+
+    def test_nodes_dependencies_and_coerced_columns(self):
+        table = TaskTable(self.tasks)
+        self.assertEqual(table.ids, ["a", "b", "x"])
+        self.assertEqual(table.node_count, 2)
+        self.assertEqual(list(table.row_node), [0, 1, 0])
+        self.assertEqual(table.dependency_lists(), [[1], []])
+        self.assertEqual(table.adjacency(), [[1], []])
+        self.assertEqual(list(table.importance), [7, 10, 5])
+        self.assertEqual(list(table.estimated_hours), [4.0, 0.5, 4.0])
+
+    def test_blocking_counts_include_duplicate_rows(self):
+        blocking, max_blockers = TaskTable(self.tasks, scoring=False).blocking_counts()
+        self.assertEqual(list(blocking), [0, 3, 0])
+        self.assertEqual(max_blockers, 3)
+
+    def test_dependency_ids_are_interned(self):
+        dep = "".join(["sha", "red"])
+        table = TaskTable([{"id": "t1", "dependencies": [dep]}, {"id": "t2", "dependencies": ["shared"]}])
+        self.assertEqual(table.ids, ["t1", "t2", "shared"])
+        self.assertIs(table.ids[2], "shared")
+
+
+class ReferenceDateTest(TestCase):
+    def setUp(self):
+        self.tasks = [
+            {"id": "a", "title": "A", "due_date": "2030-01-10", "dependencies": []},
+            {"id": "b", "title": "B", "due_date": "2030-01-01", "dependencies": []},
+            {"id": "c", "title": "C", "due_date": "2030-1-2", "dependencies": []},
+        ]
+
+    def test_injected_date_drives_urgency(self):
+        for vectorized in (False, True) if np is not None else (False,):
+            result = analyze_tasks(copy.deepcopy(self.tasks), vectorized=vectorized, today=date(2030, 1, 3))
+            explanations = {task["id"]: task["explanation"].split(" | ")[0] for task in result}
+            self.assertEqual(explanations, {"a": "Due in 7 days", "b": "Overdue by 2 days", "c": "Overdue by 1 days"})
+
+        top_tasks, _ = select_top_tasks(copy.deepcopy(self.tasks), limit=1, today=date(2030, 1, 10))
+        self.assertEqual(top_tasks[0]["id"], "b")
+
+    def test_parse_due_date_matches_strptime_formats(self):
+        self.assertEqual(parse_due_date("2030-01-10"), date(2030, 1, 10))
+        self.assertEqual(parse_due_date("2030-1-2"), date(2030, 1, 2))
+        for value in (None, "", "2030-02-30", "20300110", "2030-01-10T00:00", 20300110):
+            self.assertIsNone(parse_due_date(value))
+
+    def test_view_scores_and_caches_against_one_date(self):
+        frozen = date(2030, 1, 3)
+        result_cache.clear()
+        with mock.patch("tasks.views.date") as view_date, \
+                mock.patch("tasks.views.analyze_tasks", wraps=analyze_tasks) as analyze:
+            view_date.today.return_value = frozen
+            response = self.client.post("/api/tasks/analyze/", {"tasks": self.tasks},
+                                        content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(analyze.call_args.kwargs["today"], frozen)
+        self.assertEqual(response.json()["tasks"][0]["explanation"].split(" | ")[0], "Overdue by 2 days")
+
+
+class ParallelScoringTest(TestCase):
+    def setUp(self):
+        self.tasks = generate_tasks("hub_nodes", 500)
+        for i, task in enumerate(self.tasks[::7]):
+            task["title"] = ""
+            task["due_date"] = [None, "not-a-date", self.tasks[0]["due_date"]][i % 3]
+
+    def test_sharded_ranking_matches_serial(self):
+        scorer = ParallelScorer(workers=2, chunk_size=64, min_tasks=100)
+        self.addCleanup(scorer.shutdown)
+        for strategy in STRATEGIES:
+            expected = analyze_tasks(copy.deepcopy(self.tasks), strategy)
+            actual = scorer.analyze(copy.deepcopy(self.tasks), strategy)
+            self.assertEqual(json.dumps(actual), json.dumps(expected))
+
+    def test_small_inputs_stay_serial(self):
+        scorer = ParallelScorer(workers=2, chunk_size=64, min_tasks=1000)
+        scorer.analyze(copy.deepcopy(self.tasks))
+        self.assertIsNone(scorer._executor)
+        self.assertIsNone(build_parallel_scorer(None))
+        self.assertEqual(build_parallel_scorer({"WORKERS": 3}).chunk_size, 50000)
+
+
+class EndpointLimiterTest(TestCase):
+    def test_queue_overflow_and_timeout(self):
+        limiter = EndpointLimiter("graph", concurrency=1, queue=1, queue_timeout=0.2)
+        self.addCleanup(limiter.shutdown)
+        release = threading.Event()
+
+        async def scenario():
+            running = asyncio.ensure_future(limiter.run(release.wait, 5))
+            await asyncio.sleep(0.05)
+            waiting = asyncio.ensure_future(limiter.run(lambda: "queued"))
+            await asyncio.sleep(0.05)
+            with self.assertRaises(Saturated) as full:
+                await limiter.run(lambda: "rejected")
+            with self.assertRaises(Saturated) as timed_out:
+                await waiting
+            release.set()
+            return full.exception.status, timed_out.exception.status, await running
+
+        self.assertEqual(asyncio.run(scenario()), (429, 503, True))
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_workers_close_database_connections(self):
+        # SQLite test databases live in memory and ignore close(), so check
+        # that each job is bracketed by close_old_connections instead.
+        limiter = EndpointLimiter("store", concurrency=1)
+        self.addCleanup(limiter.shutdown)
+        with mock.patch("tasks.concurrency.close_old_connections") as close:
+            with self.assertRaises(KeyError):
+                asyncio.run(limiter.run({}.__getitem__, "missing"))
+        self.assertEqual(close.call_count, 2)
+
+    def test_endpoints_are_async_with_per_endpoint_settings(self):
+        for view in (analyze_tasks_view, suggest_tasks_view, dependency_graph_view):
+            self.assertTrue(asyncio.iscoroutinefunction(view))
+        self.assertTrue(analyze_tasks_view.csrf_exempt)
+
+        limiters = build_limiters({"suggest": {"QUEUE": 2}})
+        self.addCleanup(lambda: [limiter.shutdown() for limiter in limiters.values()])
+        self.assertEqual((limiters["suggest"].concurrency, limiters["suggest"].queue), (4, 2))
+        self.assertEqual(set(limiters), {"analyze", "suggest", "dependency-graph"})
+
+    def test_saturated_endpoint_returns_429(self):
+        with mock.patch("tasks.concurrency.EndpointLimiter.run", side_effect=Saturated(429, "busy")):
+            response = self.client.get("/api/tasks/suggest/", {"tasks": "[]"})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "1")
+
+
+class MultiStrategyAnalysisTest(TestCase):
+    def setUp(self):
+        self.tasks = generate_tasks("random_dag", 80)
+        self.tasks[3]["title"] = ""
+
+    def test_rankings_match_single_strategy_analysis(self):
+        result = analyze_strategies(copy.deepcopy(self.tasks))
+        self.assertEqual(list(result["rankings"]), list(STRATEGIES))
+        for strategy, ranking in result["rankings"].items():
+            ranked = [
+                {**result["tasks"][k], "priority_score": score}
+                for k, score in zip(ranking["order"], ranking["priority_score"])
+            ]
+            self.assertEqual(ranked, analyze_tasks(copy.deepcopy(self.tasks), strategy))
+
+    def test_resolves_builtin_and_custom_weights(self):
+        custom = {"urgency": 1, "importance": 0, "effort": 0, "dependency": 0}
+        strategies = resolve_strategies({"deadline_driven": None, "urgency_only": custom})
+        self.assertEqual(strategies["deadline_driven"], STRATEGIES["deadline_driven"])
+        self.assertEqual(resolve_strategies(["high_impact"]), {"high_impact": STRATEGIES["high_impact"]})
+        for bad in ([], ["nope"], {"x": {"urgency": 1}}, {"x": {**custom, "effort": -1}}, {"x": {**custom, "effort": True}}):
+            with self.assertRaises(ValueError):
+                resolve_strategies(bad)
+
+    def test_batch_view(self):
+        body = {"tasks": self.tasks, "strategies": ["fastest_wins", "high_impact"]}
+        response = self.client.post("/api/tasks/analyze/batch/", body, content_type="application/json")
+        data = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(data["rankings"]), ["fastest_wins", "high_impact"])
+        self.assertEqual(data["total_tasks"], len(self.tasks))
+
+        body["strategies"] = {"mine": {"urgency": 1}}
+        response = self.client.post("/api/tasks/analyze/batch/", body, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+
+class ScheduleTest(TestCase):
+    def setUp(self):
+        # a -> b (3h) and a -> c (1h), both -> d; external "x" is ignored.
+        self.tasks = [
+            {"id": "d", "title": "D", "estimated_hours": 1, "dependencies": ["b", "c"]},
+            {"id": "b", "title": "B", "estimated_hours": 3, "dependencies": ["a", "x"]},
+            {"id": "c", "title": "C", "estimated_hours": 1, "dependencies": ["a"]},
+            {"id": "a", "title": "A", "estimated_hours": 2, "dependencies": []},
+        ]
+
+    def test_earliest_latest_and_critical_path(self):
+        schedule = task_schedule(self.tasks)
+        by_id = {task["id"]: task for task in schedule["tasks"]}
+        self.assertEqual(schedule["project_duration"], 6)
+        self.assertEqual(schedule["critical_path"], ["a", "b", "d"])
+        self.assertEqual([task["id"] for task in schedule["tasks"]][0], "a")
+        self.assertEqual((by_id["c"]["earliest_start"], by_id["c"]["latest_start"], by_id["c"]["slack"]), (2, 4, 2))
+        self.assertFalse(by_id["c"]["critical"])
+        self.assertTrue(all(by_id[t]["critical"] for t in ("a", "b", "d")))
+
+    def test_long_chain_and_cycles(self):
+        size = 20000
+        chain = [
+            {"id": f"t{i}", "title": f"Task {i}", "estimated_hours": 1, "dependencies": [f"t{i - 1}"] if i else []}
+            for i in range(size)
+        ]
+        schedule = task_schedule(chain)
+        self.assertEqual(schedule["project_duration"], size)
+        self.assertEqual(len(schedule["critical_path"]), size)
+
+        self.tasks[3]["dependencies"] = ["d"]
+        with self.assertRaises(ValueError):
+            task_schedule(self.tasks)
+
+    def test_schedule_view(self):
+        response = self.client.post("/api/tasks/schedule/", {"tasks": self.tasks}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["schedule"]["critical_path"], ["a", "b", "d"])
+
+        self.tasks[3]["dependencies"] = ["d"]
+        response = self.client.post("/api/tasks/schedule/", {"tasks": self.tasks}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("cycles", response.json())
+
+
+class TransitiveImpactTest(TestCase):
+    def setUp(self):
+        # "root" blocks one task directly and four transitively; "side"
+        # blocks one task directly and nothing else.
+        self.tasks = [
+            {"id": "root", "title": "Root", "importance": 5, "estimated_hours": 4, "dependencies": []},
+            {"id": "side", "title": "Side", "importance": 5, "estimated_hours": 4, "dependencies": []},
+            {"id": "a", "title": "A", "estimated_hours": 1, "importance": 2, "dependencies": ["root"]},
+            {"id": "b", "title": "B", "estimated_hours": 2, "importance": 3, "dependencies": ["a"]},
+            {"id": "c", "title": "C", "estimated_hours": 3, "importance": 4, "dependencies": ["a"]},
+            {"id": "d", "title": "D", "estimated_hours": 4, "importance": 5, "dependencies": ["b", "c"]},
+            {"id": "e", "title": "E", "estimated_hours": 5, "importance": 6, "dependencies": ["side"]},
+        ]
+
+    def by_id(self, impact, vectorized=False):
+        result = analyze_tasks(copy.deepcopy(self.tasks), impact=impact, vectorized=vectorized)
+        return {task["id"]: task for task in result}
+
+    def test_descendant_weights_counts_each_descendant_once(self):
+        counts, totals = descendant_weights([[], [0], [1], [1], [2, 3]], [1, 2, 3, 4, 5])
+        self.assertEqual(counts, [4, 3, 1, 1, 0])
+        self.assertEqual(totals, [14, 12, 5, 5, 0])
+        self.assertIsNone(descendant_weights([[1], [0]]))
+
+    def test_descendant_weights_without_numpy(self):
+        rng = random.Random(3)
+        adjacency = [[rng.randrange(node) for _ in range(rng.randint(0, 3))] if node else [] for node in range(300)]
+        weights = [round(rng.uniform(0.5, 40), 2) for _ in adjacency]
+        expected = descendant_weights(adjacency, weights)
+        with mock.patch("tasks.graph.np", None):
+            counts, totals = descendant_weights(adjacency, weights)
+        self.assertEqual(counts, expected[0])
+        for total, reference in zip(totals, expected[1]):
+            self.assertAlmostEqual(total, reference)
+
+    def test_transitive_modes_rank_deep_blockers_higher(self):
+        direct = self.by_id("direct")
+        self.assertEqual(direct["root"]["priority_score"], direct["side"]["priority_score"])
+
+        transitive = self.by_id("transitive")
+        self.assertGreater(transitive["root"]["priority_score"], transitive["side"]["priority_score"])
+        self.assertIn("Blocks 4 tasks", transitive["root"]["explanation"])
+        self.assertEqual(transitive["root"]["dependency_score"], 1.0)
+
+        hours = self.by_id("transitive_hours")
+        self.assertIn("Blocks 4 tasks", hours["root"]["explanation"])
+        # "side" blocks 5 of the 10 downstream hours "root" does.
+        self.assertEqual(hours["side"]["dependency_score"], round(math.log(1 + 0.5 * 5) / math.log(6), 3))
+
+    @skipUnless(np is not None, "NumPy not installed")
+    def test_batch_path_and_recommendations_agree(self):
+        for impact in ("transitive", "transitive_hours", "transitive_importance"):
+            self.assertEqual(self.by_id(impact, vectorized=True), self.by_id(impact))
+            top_tasks, _ = select_top_tasks(copy.deepcopy(self.tasks), limit=3, impact=impact)
+            self.assertEqual(top_tasks, analyze_tasks(copy.deepcopy(self.tasks), impact=impact)[:3])
+
+    def test_rejects_unknown_modes_and_cycles(self):
+        with self.assertRaises(ValueError):
+            analyze_tasks(copy.deepcopy(self.tasks), impact="sideways")
+        self.tasks[0]["dependencies"] = ["d"]
+        with self.assertRaises(ValueError):
+            analyze_tasks(copy.deepcopy(self.tasks), impact="transitive")
+
+    def test_views_reject_unknown_mode(self):
+        body = {"tasks": self.tasks, "impact": "sideways"}
+        responses = [
+            self.client.post("/api/tasks/analyze/", body, content_type="application/json"),
+            self.client.post("/api/tasks/analyze/batch/", body, content_type="application/json"),
+            self.client.post("/api/tasks/suggest/", body, content_type="application/json"),
+            self.client.get("/api/tasks/suggest/", {"tasks": json.dumps(self.tasks), "impact": "sideways"}),
+        ]
+        for response in responses:
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("Unknown impact mode", response.json()["error"])
+
+
+class GraphIndexTest(TestCase):
+    def setUp(self):
+        graph_indexes.clear()
+        self.tasks = [
+            {"id": "a", "title": "A", "dependencies": []},
+            {"id": "b", "title": "B", "dependencies": ["a"]},
+            {"id": "c", "title": "C", "dependencies": ["b", "external"]},
+        ]
+
+    def apply(self, index, ops):
+        # Applies ops and checks the delta against a full rebuild.
+        before = index.snapshot()
+        nodes = {node["id"]: node for node in before["nodes"]}
+        edges = {(edge["from"], edge["to"]): edge for edge in before["edges"]}
+        delta = index.apply(ops)
+        for task_id in delta["nodes"]["removed"]:
+            del nodes[task_id]
+        nodes.update((node["id"], node) for node in delta["nodes"]["upserted"])
+        for edge in delta["edges"]["removed"]:
+            del edges[(edge["from"], edge["to"])]
+        edges.update(((edge["from"], edge["to"]), edge) for edge in delta["edges"]["upserted"])
+
+        expected = analyze_dependency_graph(index.as_tasks())
+        self.assertEqual(nodes, {node["id"]: node for node in expected["nodes"]})
+        self.assertEqual(edges, {(edge["from"], edge["to"]): edge for edge in expected["edges"]})
+        self.assertEqual(delta["analysis"]["cycle_count"], expected["analysis"]["cycle_count"])
+        return delta
+
+    def test_delta_covers_only_changed_nodes_and_edges(self):
+        index = GraphIndex(self.tasks)
+
+        delta = self.apply(index, [{"op": "add_edge", "task": "a", "depends_on": "c"}])
+        self.assertEqual(delta["analysis"]["cycle_count"], 1)
+        self.assertEqual(sorted(delta["analysis"]["circular_dependencies"][0]), ["a", "b", "c"])
+        self.assertEqual(len(delta["edges"]["upserted"]), 3)
+
+        delta = self.apply(index, [{"op": "upsert_task", "task": {"id": "d", "title": "D", "dependencies": ["a"]}}])
+        self.assertEqual([node["id"] for node in delta["nodes"]["upserted"]], ["d", "a"])
+        self.assertNotIn("circular_dependencies", delta["analysis"])
+
+        delta = self.apply(index, [{"op": "remove_task", "id": "b"}])
+        self.assertEqual(delta["nodes"]["removed"], ["b"])
+        self.assertEqual(delta["analysis"]["circular_dependencies"], [])
+
+        # "external" becomes a node and picks up the edge "c" already had.
+        delta = self.apply(index, [{"op": "upsert_task", "task": {"id": "external", "title": "E", "dependencies": ["c"]}}])
+        self.assertIn(("external", "c"), [(edge["from"], edge["to"]) for edge in delta["edges"]["upserted"]])
+        self.assertEqual(delta["analysis"]["cycle_count"], 1)
+
+    def test_random_edits_match_full_rebuild(self):
+        rng = random.Random(7)
+        ids = [f"t{i}" for i in range(12)]
+        index = GraphIndex([
+            {"id": task_id, "title": task_id, "dependencies": rng.sample(ids, 2)} for task_id in ids[:9]
+        ])
+        for _ in range(150):
+            task_id = rng.choice(sorted(index.labels))
+            op = rng.choice([
+                {"op": "add_edge", "task": task_id, "depends_on": rng.choice(ids)},
+                {"op": "remove_edge", "task": task_id, "depends_on": rng.choice(ids)},
+                {"op": "remove_task", "id": task_id},
+                {"op": "upsert_task", "task": {"id": rng.choice(ids), "title": "x", "dependencies": rng.sample(ids, 2)}},
+            ])
+            if op["op"] == "remove_task" and len(index) == 1:
+                continue
+            self.apply(index, [op])
+
+    def test_bad_batches_change_nothing(self):
+        index = GraphIndex(self.tasks)
+        with self.assertRaises(ValueError):
+            index.apply([
+                {"op": "remove_task", "id": "a"},
+                {"op": "add_edge", "task": "a", "depends_on": "c"},
+            ])
+        self.assertEqual(index.snapshot(), analyze_dependency_graph(self.tasks))
+
+    def test_project_endpoints(self):
+        upsert_tasks(get_project("graph"), [{**task, "estimated_hours": 1, "importance": 5} for task in self.tasks[:2]])
+        response = self.client.get("/api/tasks/projects/graph/graph/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["total_tasks"], 2)
+        version = response.json()["version"]
+        self.assertEqual(response["ETag"], f'"{version}"')
+
+        ops = {"ops": [{"op": "add_edge", "task": "a", "depends_on": "b"}]}
+        response = self.client.post("/api/tasks/projects/graph/graph/delta/", {**ops, "version": version},
+                                    content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["delta"]["analysis"]["cycle_count"], 1)
+        self.assertNotEqual(response.json()["version"], version)
+        version = response.json()["version"]
+
+        # Writes through the store drop the working copy; deltas built on it
+        # are rejected instead of being applied to the reseeded graph.
+        upsert_tasks(get_project("graph"), [{**self.tasks[2], "estimated_hours": 1, "importance": 5}])
+        self.assertIsNone(graph_indexes.get("graph"))
+        remove = {"ops": [{"op": "remove_edge", "task": "a", "depends_on": "b"}]}
+        response = self.client.post("/api/tasks/projects/graph/graph/delta/", remove,
+                                    content_type="application/json", HTTP_IF_MATCH=f'"{version}"')
+        self.assertEqual(response.status_code, 409)
+        response = self.client.post("/api/tasks/projects/graph/graph/delta/", remove,
+                                    content_type="application/json")
+        self.assertEqual(response.status_code, 428)
+
+        response = self.client.put("/api/tasks/projects/scratch/graph/", {"tasks": self.tasks},
+                                   content_type="application/json")
+        self.assertEqual(response.json()["graph"], analyze_dependency_graph(self.tasks))
+        response = self.client.post("/api/tasks/projects/scratch/graph/delta/",
+                                    {"ops": [{"op": "remove_task", "id": "missing"}],
+                                     "version": response.json()["version"]},
+                                    content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get("/api/tasks/projects/unknown/graph/").status_code, 404)
+
+
+class WireFormatTest(TestCase):
+    def setUp(self):
+        result_cache.clear()
+        self.tasks = [
+            {"id": "a", "title": "A", "due_date": None, "estimated_hours": 2, "importance": 8, "dependencies": []},
+            {"id": "b", "title": "B", "due_date": "2030-01-01", "estimated_hours": 1, "importance": 5,
+             "dependencies": ["a", "missing"]},
+            {"id": "c", "title": "C", "due_date": "2030-01-01", "estimated_hours": 3, "importance": 3,
+             "dependencies": ["a"]},
+        ]
+
+    def without_nulls(self, rows):
+        return [{key: value for key, value in row.items() if value is not None} for row in rows]
+
+    def test_tables_round_trip(self):
+        rows = self.tasks + [{"id": "d", "title": "D", "extra": {"nested": True}}]
+        payload = {"tasks": rows, "total_tasks": 4}
+        for fmt in ("columnar", "msgpack"):
+            body = encode_payload(payload, fmt, (("tasks",),))
+            decoded = decode_payload(body, fmt, (("tasks",),))
+            expected = self.without_nulls(rows)
+            expected[3]["dependencies"] = []
+            self.assertEqual(decoded, {"tasks": expected, "total_tasks": 4})
+        self.assertLess(len(encode_payload(payload, "columnar", (("tasks",),))),
+                        len(encode_payload(payload, "json")))
+
+        with self.assertRaises(WireFormatError):
+            decode_payload(b'{"tasks": {"rows": 2, "columns": {"id": ["a"]}}}', "columnar", (("tasks",),))
+        for rows in (b'1000000000', b'-1', b'true', b'"2"', b'1.0'):
+            with self.assertRaises(WireFormatError):
+                decode_payload(b'{"tasks": {"rows": ' + rows + b', "columns": {}}}', "columnar", (("tasks",),))
+        self.assertEqual(decode_payload(b'{"tasks": {"rows": 0, "columns": {}}}', "columnar", (("tasks",),)),
+                         {"tasks": []})
+        for fmt in ("columnar", "msgpack") if wire.msgpack is not None else ("columnar",):
+            body = encode_payload({"tasks": [{}, {}]}, fmt, (("tasks",),))
+            self.assertEqual(decode_payload(body, fmt, (("tasks",),)), {"tasks": [{}, {}]})
+
+    def test_negotiation(self):
+        self.assertEqual(response_format(None), "json")
+        self.assertEqual(response_format("*/*"), "json")
+        self.assertEqual(response_format("application/msgpack"), "msgpack")
+        self.assertEqual(response_format("application/json;q=0.9, application/vnd.tasks.columnar+json"), "columnar")
+        self.assertEqual(response_format("application/msgpack;q=0.5, application/json"), "json")
+
+    @skipUnless(wire.msgpack is not None, "msgpack not installed")
+    def test_endpoints_speak_compact_formats(self):
+        body = json.dumps({"tasks": self.tasks})
+        plain = self.client.post("/api/tasks/analyze/", body, content_type="application/json")
+        self.assertIn("Accept", plain["Vary"])
+
+        columnar_body = encode_payload({"tasks": self.tasks}, "columnar", (("tasks",),))
+        response = self.client.post("/api/tasks/analyze/", columnar_body,
+                                    content_type="application/vnd.tasks.columnar+json",
+                                    HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        decoded = decode_payload(response.content, "msgpack", (("tasks",),))
+        self.assertEqual(decoded["tasks"], self.without_nulls(plain.json()["tasks"]))
+
+        # The cache keeps formats apart.
+        again = self.client.post("/api/tasks/analyze/", body, content_type="application/json")
+        self.assertEqual(again["Content-Type"], "application/json")
+        self.assertEqual(again.content, plain.content)
+
+        response = self.client.post("/api/tasks/dependency-graph/", body, content_type="application/json",
+                                    HTTP_ACCEPT="application/vnd.tasks.columnar+json")
+        graph = decode_payload(response.content, "columnar", (("graph", "nodes"), ("graph", "edges")))["graph"]
+        self.assertEqual(graph, analyze_dependency_graph(self.tasks))
+
+        response = self.client.post("/api/tasks/analyze/", b"\xc1", content_type="application/msgpack")
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post("/api/tasks/analyze/", encode_payload({"tasks": [{}]}, "columnar", (("tasks",),)),
+                                    content_type="application/vnd.tasks.columnar+json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Each task must have id and title")
+
+
+class ResponseProjectionTest(TestCase):
+    def setUp(self):
+        result_cache.clear()
+        self.tasks = generate_tasks("random_dag", 40)
+
+    def test_projection_and_quiet_mode_match_full_results(self):
+        for vectorized in ((False, True) if np is not None else (False,)):
+            full = analyze_tasks(copy.deepcopy(self.tasks), vectorized=vectorized)
+
+            quiet = analyze_tasks(copy.deepcopy(self.tasks), vectorized=vectorized, verbose=False)
+            self.assertEqual(quiet, [{k: v for k, v in task.items() if k != "explanation"} for task in full])
+
+            projected = analyze_tasks(copy.deepcopy(self.tasks), vectorized=vectorized,
+                                      fields="priority_score,title,unknown")
+            self.assertEqual(projected, [
+                {"id": task["id"], "priority_score": task["priority_score"], "title": task["title"]} for task in full
+            ])
+
+        with self.assertRaises(ValueError):
+            analyze_tasks(self.tasks, fields=[])
+
+    def test_quiet_recommendations_skip_reasoning(self):
+        with mock.patch("tasks.scoring.generate_recommendation_reasoning") as reasoning:
+            result = get_top_recommendations(copy.deepcopy(self.tasks), limit=3, verbose=False)
+        reasoning.assert_not_called()
+        self.assertEqual(len(result["recommendations"]), 3)
+        self.assertEqual(set(result["recommendations"][0]), {"rank", "task"})
+
+    def test_endpoints_accept_fields_and_verbose(self):
+        response = self.client.post("/api/tasks/analyze/", {"tasks": self.tasks, "fields": ["priority_score"]},
+                                    content_type="application/json")
+        self.assertEqual(set(response.json()["tasks"][0]), {"id", "priority_score"})
+
+        response = self.client.post("/api/tasks/analyze/", {"tasks": self.tasks, "verbose": "maybe"},
+                                    content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get("/api/tasks/suggest/", {"tasks": json.dumps(self.tasks), "verbose": "false"})
+        self.assertNotIn("reasoning", response.json()["recommendations"][0])
+
+
+class SuggestPostTest(TransactionTestCase):
+    # The suggest view runs in a worker thread, which cannot read the store
+    # while TestCase holds its transaction open.
+    def setUp(self):
+        result_cache.clear()
+        task_lists.clear()
+        self.tasks = generate_tasks("random_dag", 30)
+
+    def post(self, body):
+        return self.client.post("/api/tasks/suggest/", body, content_type="application/json")
+
+    def test_post_matches_get(self):
+        posted = self.post({"tasks": self.tasks, "strategy": "deadline_driven", "limit": 5})
+        fetched = self.client.get("/api/tasks/suggest/", {"tasks": json.dumps(self.tasks),
+                                                          "strategy": "deadline_driven", "limit": 5})
+        self.assertEqual(posted.status_code, 200)
+        body = posted.json()
+        # A full list's id hashes the body it came in, so resending it
+        # gives the same id.
+        again = self.post({"tasks": self.tasks, "strategy": "deadline_driven", "limit": 5}).json()
+        self.assertEqual(body.pop("list_id"), again["list_id"])
+        self.assertEqual(body, fetched.json())
+
+    def test_changes_against_a_list_id(self):
+        list_id = self.post({"tasks": self.tasks}).json()["list_id"]
+        changed = {**self.tasks[3], "importance": 10, "due_date": "2020-01-01"}
+        removed = self.tasks[-1]["id"]
+
+        response = self.post({"base": list_id, "upsert": [changed], "remove": [removed]})
+        expected = apply_task_changes(self.tasks, [changed], [removed])
+        full = self.post({"tasks": expected}).json()
+        body = response.json()
+        self.assertEqual(body["total_considered"], len(self.tasks) - 1)
+        self.assertEqual(body["recommendations"], full["recommendations"])
+        self.assertNotEqual(body["list_id"], list_id)
+
+        # The delta's list id can itself be a base.
+        response = self.post({"base": body["list_id"], "remove": [changed["id"]]})
+        self.assertEqual(response.json()["total_considered"], len(self.tasks) - 2)
+
+    def test_stored_lists_honour_byte_budget(self):
+        budget = approximate_size(self.tasks) * 3 // 2
+        with mock.patch("tasks.views.task_lists", build_task_lists({"MAX_BYTES": budget})):
+            first = self.post({"tasks": self.tasks}).json()["list_id"]
+            second = self.post({"tasks": generate_tasks("random_dag", 30, seed=1)}).json()["list_id"]
+            self.assertEqual(self.post({"base": first}).status_code, 409)
+            self.assertEqual(self.post({"base": second}).status_code, 200)
+
+    def test_unknown_base_and_bad_changes(self):
+        response = self.post({"base": "missing", "upsert": []})
+        self.assertEqual(response.status_code, 409)
+        self.assertIn("full task list", response.json()["error"])
+
+        list_id = self.post({"tasks": self.tasks}).json()["list_id"]
+        self.assertEqual(self.post({"base": list_id, "upsert": [{"title": "No id"}]}).status_code, 400)
+        self.assertEqual(self.post({"base": list_id, "remove": "a"}).status_code, 400)
+        self.assertEqual(self.post({"base": {"project": "nope"}}).status_code, 404)
+
+    def test_project_base(self):
+        tasks = [{"id": "a", "title": "A", "importance": 2}, {"id": "b", "title": "B", "dependencies": ["a"]}]
+        upsert_tasks(get_project("suggest-base"), tasks)
+        response = self.post({"base": {"project": "suggest-base"},
+                              "upsert": [{"id": "c", "title": "C", "importance": 9}], "remove": ["b"]})
+        self.assertEqual(response.status_code, 200)
+        ids = [item["task"]["id"] for item in response.json()["recommendations"]]
+        self.assertEqual(sorted(ids), ["a", "c"])
+
+
+class PreparedTasksTest(TestCase):
+    def setUp(self):
+        self.tasks = generate_tasks("random_dag", 60)
+
+    def test_prepared_set_matches_plain_lists(self):
+        prepared = prepare_tasks(copy.deepcopy(self.tasks), validate=True)
+        for impact in ("direct", "transitive_hours"):
+            self.assertEqual(analyze_tasks(prepared, impact=impact),
+                             analyze_tasks(copy.deepcopy(self.tasks), impact=impact))
+            self.assertEqual(analyze_strategies(prepared, impact=impact),
+                             analyze_strategies(copy.deepcopy(self.tasks), impact=impact))
+            self.assertEqual(select_top_tasks(prepared, limit=4, impact=impact),
+                             select_top_tasks(copy.deepcopy(self.tasks), limit=4, impact=impact))
+        self.assertEqual(detect_circular_dependencies(prepared), detect_circular_dependencies(self.tasks))
+        self.assertEqual(analyze_dependency_graph(prepared), analyze_dependency_graph(self.tasks))
+        self.assertEqual(task_schedule(prepared), task_schedule(self.tasks))
+
+    def test_one_table_and_graph_per_request(self):
+        prepared = prepare_tasks(self.tasks, validate=True)
+        with mock.patch("tasks.scoring.TaskTable", wraps=TaskTable) as table, \
+                mock.patch.object(TaskTable, "dependency_lists", autospec=True,
+                                  side_effect=TaskTable.dependency_lists) as lists:
+            detect_circular_dependencies(prepared)
+            analyze_tasks(prepared, impact="transitive")
+            get_top_recommendations(prepared, limit=3)
+        self.assertEqual(table.call_count, 1)
+        self.assertEqual(lists.call_count, 1)
+
+    def test_validation_and_rows_without_ids(self):
+        with self.assertRaises(TaskDataError):
+            prepare_tasks([{"id": "a", "title": "A"}, {"id": "b"}], validate=True)
+
+        tasks = [{"id": "a", "title": ""}, {"id": "", "title": "Blank", "dependencies": ["a"]}]
+        prepared = prepare_tasks(tasks)
+        self.assertEqual(tasks[0]["title"], "Untitled Task a")
+        self.assertEqual([task["id"] for task in analyze_tasks(prepared)], ["a"])
+        self.assertEqual(analyze_dependency_graph(prepared)["analysis"]["total_tasks"], 2)
+
+        graph_only = [{"id": "a", "title": ""}]
+        prepare_tasks(graph_only, scoring=False)
+        self.assertEqual(graph_only[0]["title"], "")
+
+
+class PaginationTest(TestCase):
+    def setUp(self):
+        result_cache.clear()
+        rankings.clear()
+        self.tasks = generate_tasks("random_dag", 45)
+
+    def post(self, path, body):
+        return self.client.post(path, body, content_type="application/json")
+
+    def test_cursor_pages_match_full_result_without_rescoring(self):
+        full = self.post("/api/tasks/analyze/", {"tasks": self.tasks}).json()
+
+        with mock.patch("tasks.views.analyze_tasks", wraps=analyze_tasks) as scorer:
+            page = self.post("/api/tasks/analyze/", {"tasks": self.tasks, "page_size": 20}).json()
+            self.assertEqual(page["total_tasks"], 45)
+            collected = page["tasks"]
+            while page["page"]["next_cursor"]:
+                page = self.post("/api/tasks/analyze/", {"cursor": page["page"]["next_cursor"]}).json()
+                collected += page["tasks"]
+            offset_page = self.post("/api/tasks/analyze/", {"tasks": self.tasks, "page_size": 20, "offset": 40})
+        self.assertEqual(scorer.call_count, 1)
+        self.assertEqual(collected, full["tasks"])
+        self.assertEqual(offset_page.json()["tasks"], full["tasks"][40:])
+        self.assertIsNone(offset_page.json()["page"]["next_cursor"])
+
+    def test_graph_pages(self):
+        full = self.post("/api/tasks/dependency-graph/", {"tasks": self.tasks}).json()["graph"]
+        first = self.client.get("/api/tasks/dependency-graph/",
+                                {"tasks": json.dumps(self.tasks), "page_size": 30}).json()
+        second = self.client.get("/api/tasks/dependency-graph/", {"cursor": first["page"]["next_cursor"]}).json()
+        self.assertEqual(first["graph"]["analysis"], full["analysis"])
+        self.assertNotIn("analysis", second["graph"])
+        self.assertEqual(first["graph"]["nodes"] + second["graph"]["nodes"], full["nodes"])
+        self.assertEqual(second["graph"]["edges"], full["edges"][30:60])
+
+    def test_bad_and_expired_cursors(self):
+        cursor = self.post("/api/tasks/analyze/", {"tasks": self.tasks, "page_size": 10}).json()["page"]["next_cursor"]
+        self.assertEqual(self.post("/api/tasks/analyze/", {"cursor": "not-a-cursor"}).status_code, 400)
+        self.assertEqual(self.post("/api/tasks/analyze/", {"tasks": self.tasks, "page_size": 0}).status_code, 400)
+        # A cursor is bound to the endpoint that issued it.
+        response = self.post("/api/tasks/dependency-graph/", {"cursor": cursor})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Cursor", response.json()["error"])
+
+        rankings.clear()
+        response = self.post("/api/tasks/analyze/", {"cursor": cursor})
+        self.assertEqual(response.status_code, 409)
+        # Resending the tasks with the cursor recomputes the page.
+        response = self.post("/api/tasks/analyze/", {"cursor": cursor, "tasks": self.tasks})
+        self.assertEqual(response.json()["page"]["offset"], 10)
+
+    def test_stored_rankings_honour_byte_budget(self):
+        size = approximate_size(analyze_tasks(copy.deepcopy(self.tasks)))
+        with mock.patch("tasks.views.rankings", build_rankings({"MAX_BYTES": size * 3 // 2})):
+            first = self.post("/api/tasks/analyze/", {"tasks": self.tasks, "page_size": 10}).json()
+            other = generate_tasks("random_dag", 45, seed=1)
+            second = self.post("/api/tasks/analyze/", {"tasks": other, "page_size": 10}).json()
+            # Only one ranking fits: the older one was evicted.
+            for page, status in ((first, 409), (second, 200)):
+                response = self.post("/api/tasks/analyze/", {"cursor": page["page"]["next_cursor"]})
+                self.assertEqual(response.status_code, status)
+
+
+class NeighborhoodQueryTest(TestCase):
+    def setUp(self):
+        graph_indexes.clear()
+        # a <- b <- c <- d, c <- e, x <-> y, and z on its own.
+        self.tasks = [
+            {"id": "a", "title": "A"},
+            {"id": "b", "title": "B", "dependencies": ["a"]},
+            {"id": "c", "title": "C", "dependencies": ["b", "external"]},
+            {"id": "d", "title": "D", "dependencies": ["c"]},
+            {"id": "e", "title": "E", "dependencies": ["c", "y"]},
+            {"id": "x", "title": "X", "dependencies": ["y"]},
+            {"id": "y", "title": "Y", "dependencies": ["x"]},
+            {"id": "z", "title": "Z"},
+        ]
+        self.index = GraphIndex(self.tasks)
+
+    def ids(self, graph):
+        return sorted(node["id"] for node in graph["nodes"])
+
+    def test_directions_and_depth(self):
+        index = self.index
+        self.assertEqual(self.ids(index.neighborhood("c", 1, "upstream")), ["b", "c"])
+        self.assertEqual(self.ids(index.neighborhood("c", None, "upstream")), ["a", "b", "c"])
+        self.assertEqual(self.ids(index.neighborhood("c", None, "downstream")), ["c", "d", "e"])
+        self.assertEqual(self.ids(index.neighborhood("c", 1)), ["b", "c", "d", "e"])
+        self.assertEqual(self.ids(index.neighborhood("c", 0)), ["c"])
+        self.assertEqual(self.ids(index.neighborhood("a", None, "component")),
+                         ["a", "b", "c", "d", "e", "x", "y"])
+
+        with self.assertRaises(ValueError):
+            index.neighborhood("c", 1, "sideways")
+        with self.assertRaises(KeyError):
+            index.neighborhood("missing")
+
+    def test_matches_full_graph_rendering(self):
+        full = self.index.snapshot()
+        nodes = {node["id"]: node for node in full["nodes"]}
+        edges = {(edge["from"], edge["to"]): edge for edge in full["edges"]}
+
+        graph = self.index.neighborhood("e", 2, "upstream")
+        self.assertEqual(self.ids(graph), ["b", "c", "e", "x", "y"])
+        for node in graph["nodes"]:
+            self.assertEqual(node, nodes[node["id"]])
+        self.assertEqual({(edge["from"], edge["to"]): edge for edge in graph["edges"]},
+                         {key: edge for key, edge in edges.items() if set(key) <= {"b", "c", "e", "x", "y"}})
+        self.assertEqual(graph["analysis"]["cycle_count"], 1)
+        self.assertEqual(sorted(graph["analysis"]["circular_dependencies"][0]), ["x", "y"])
+
+    def test_project_graph_focus_query(self):
+        upsert_tasks(get_project("focus"), [{"id": "a", "title": "A"}, {"id": "b", "title": "B", "dependencies": ["a"]},
+                                            {"id": "c", "title": "C"}])
+        response = self.client.get("/api/tasks/projects/focus/graph/", {"focus": "a", "direction": "downstream"})
+        self.assertEqual(self.ids(response.json()["graph"]), ["a", "b"])
+        self.assertEqual(response.json()["total_tasks"], 2)
+
+        response = self.client.get("/api/tasks/projects/focus/graph/", {"focus": "nope"})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get("/api/tasks/projects/focus/graph/", {"focus": "a", "depth": "far"})
+        self.assertEqual(response.status_code, 400)
+
+
+class LoadTestHarnessTest(LiveServerTestCase):
+    def test_synthetic_mix_replays_over_http(self):
+        requests = synthetic_mix(size=20, count=12, mix=parse_mix(["analyze=2", "suggest", "dependency-graph"]),
+                                 distinct=2)
+        report = run_load(requests, self.live_server_url, concurrency=3, warmup=2)
+
+        self.assertEqual(report["total"]["requests"], 12)
+        self.assertEqual(report["total"]["errors"], 0)
+        self.assertEqual(sum(result["requests"] for result in report["endpoints"].values()), 12)
+        for result in report["endpoints"].values():
+            self.assertEqual(set(result["status"]), {"200"})
+            self.assertEqual(sum(result["histogram"].values()), result["requests"])
+            self.assertEqual(len(result["histogram"]), len(HISTOGRAM_BOUNDS_MS) + 1)
+            self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+
+    def test_recorded_requests_and_errors(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "mix.jsonl")
+            with open(path, "w") as fp:
+                fp.write(json.dumps({"endpoint": "suggest", "method": "GET", "path": "/api/tasks/suggest/",
+                                     "query": {"tasks": json.dumps([{"id": "a", "title": "A"}])}}) + "\n\n")
+                fp.write(json.dumps({"path": "/api/tasks/analyze/", "body": {"tasks": "nope"}}) + "\n")
+            requests = load_recorded(path)
+
+            with open(path, "a") as fp:
+                fp.write("[]\n")
+            with self.assertRaises(ValueError):
+                load_recorded(path)
+
+        report = run_load(requests, self.live_server_url, concurrency=1, total=4)
+        self.assertEqual(report["endpoints"]["suggest"]["status"], {"200": 2})
+        self.assertEqual(report["endpoints"]["/api/tasks/analyze/"]["error_rate"], 1.0)
+
+        with self.assertRaises(ValueError):
+            parse_mix(["unknown=1"])
@@ -0,0 +1,123 @@
+from typing import Any, Dict, IO, Iterable, Iterator, Optional
+import csv
+import json
+
+FORMATS = ('json', 'ndjson', 'csv')
+CSV_FIELDS = ('id', 'title', 'due_date', 'estimated_hours', 'importance', 'dependencies')
+# Dependencies are stored in one CSV column, separated by this character.
+CSV_DEPENDENCY_SEPARATOR = ';'
+
+READ_SIZE = 64 * 1024
+
+
+def detect_format(path: str, declared: Optional[str] = None) -> str:
+    if declared:
+        fmt = declared.lower()
+    else:
+        fmt = path.rsplit('.', 1)[-1].lower() if '.' in path else ''
+        fmt = {'jsonl': 'ndjson'}.get(fmt, fmt)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}', expected one of: {', '.join(FORMATS)}")
+    return fmt
+
+
+def iter_json_array(fp: IO[str]) -> Iterator[Any]:
+    # Decodes a top-level JSON array one element at a time, so memory is
+    # bounded by the largest element rather than by the file.
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = fp.read(READ_SIZE)
+        if not chunk:
+            eof = True
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    skip_whitespace()
+    if pos >= len(buf) or buf[pos] != '[':
+        raise ValueError("Expected a JSON array of tasks")
+    pos += 1
+
+    expect_value = True
+    while True:
+        skip_whitespace()
+        if pos >= len(buf):
+            raise ValueError("Unexpected end of JSON array")
+        if buf[pos] == ']':
+            return
+        if not expect_value:
+            if buf[pos] != ',':
+                raise ValueError("Expected ',' or ']' in JSON array")
+            pos += 1
+            skip_whitespace()
+
+        while True:
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+                break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+        pos = end
+        expect_value = False
+        yield item
+
+
+def iter_ndjson(fp: IO[str]) -> Iterator[Any]:
+    for line in fp:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def iter_csv(fp: IO[str]) -> Iterator[Dict]:
+    for row in csv.DictReader(fp):
+        task = {key: (value if value != '' else None) for key, value in row.items() if key}
+        dependencies = task.get('dependencies') or ''
+        task['dependencies'] = [dep.strip() for dep in dependencies.split(CSV_DEPENDENCY_SEPARATOR) if dep.strip()]
+        yield task
+
+
+def read_tasks(fp: IO[str], fmt: str) -> Iterator[Any]:
+    readers = {'json': iter_json_array, 'ndjson': iter_ndjson, 'csv': iter_csv}
+    return readers[fmt](fp)
+
+
+def write_tasks(fp: IO[str], tasks: Iterable[Dict], fmt: str) -> int:
+    count = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(fp, fieldnames=CSV_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        for task in tasks:
+            writer.writerow({
+                **task,
+                'dependencies': CSV_DEPENDENCY_SEPARATOR.join(task.get('dependencies', []))
+            })
+            count += 1
+    elif fmt == 'ndjson':
+        for task in tasks:
+            fp.write(json.dumps(task))
+            fp.write('\n')
+            count += 1
+    else:
+        fp.write('[')
+        for task in tasks:
+            fp.write(',\n' if count else '\n')
+            fp.write(json.dumps(task))
+            count += 1
+        fp.write('\n]\n')
+    return count
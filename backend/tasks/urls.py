@@ -1,8 +1,26 @@
 from django.urls import path
-from .views import analyze_tasks_view, suggest_tasks_view, dependency_graph_view
+from .views import (
+    analyze_tasks_view,
+    analyze_batch_view,
+    suggest_tasks_view,
+    dependency_graph_view,
+    schedule_view,
+    project_tasks_view,
+    project_task_detail_view,
+    project_suggest_view,
+    project_graph_view,
+    project_graph_delta_view
+)
 
 urlpatterns = [
     path("analyze/", analyze_tasks_view, name="analyze"),
+    path("analyze/batch/", analyze_batch_view, name="analyze-batch"),
     path("suggest/", suggest_tasks_view, name="suggest"),
     path("dependency-graph/", dependency_graph_view, name="dependency-graph"),
+    path("schedule/", schedule_view, name="schedule"),
+    path("projects/<str:project>/tasks/", project_tasks_view, name="project-tasks"),
+    path("projects/<str:project>/tasks/<str:task_id>/", project_task_detail_view, name="project-task-detail"),
+    path("projects/<str:project>/suggest/", project_suggest_view, name="project-suggest"),
+    path("projects/<str:project>/graph/", project_graph_view, name="project-graph"),
+    path("projects/<str:project>/graph/delta/", project_graph_delta_view, name="project-graph-delta"),
 ]
\ No newline at end of file
@@ -1,114 +1,813 @@
-from django.http import JsonResponse
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date
+from functools import wraps
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 import json
 
+from .cache import apply_task_changes, approximate_size, build_rankings, build_result_cache, build_task_lists, digest
+from .concurrency import build_limiters, offload
+from .graph import find_cycles
+from .graph_index import graph_indexes
 from .scoring import (
+    TaskDataError,
     analyze_dependency_graph,
+    analyze_strategies,
     analyze_tasks,
     get_top_recommendations,
-    detect_circular_dependencies
+    detect_circular_dependencies,
+    prepare_tasks,
+    resolve_fields,
+    resolve_impact,
+    resolve_strategies,
+    task_data_error,
+    task_schedule
+)
+from .models import Project
+from .parallel import build_parallel_scorer
+from .profiling import instrument_stages, stage
+from .store import (
+    CircularDependencyError,
+    delete_tasks,
+    get_project,
+    iter_exported_tasks,
+    stored_recommendations,
+    upsert_tasks
+)
+from .streaming import (
+    NDJSON_CONTENT_TYPE,
+    AsyncRankedLines,
+    ingest_ndjson_tasks,
+    iter_ranked_lines,
+    rank_spooled_tasks
+)
+from .wire import (
+    FORMAT_CONTENT_TYPES,
+    WireFormatError,
+    _replace_tables,
+    decode_payload,
+    encode_payload,
+    request_format,
+    response_format
 )
 
+result_cache = build_result_cache(getattr(settings, 'TASKS_RESULT_CACHE', None))
+parallel_scorer = build_parallel_scorer(getattr(settings, 'TASKS_PARALLEL_SCORING', None))
+endpoint_limiters = build_limiters(getattr(settings, 'TASKS_ENDPOINT_LIMITS', None))
+task_lists = build_task_lists(getattr(settings, 'TASKS_TASK_LISTS', None))
+rankings = build_rankings(getattr(settings, 'TASKS_RANKINGS', None))
+
+# Largest page a paged analyze or dependency-graph request may ask for.
+MAX_PAGE_SIZE = 1000
+
+# Request and response fields that the compact wire formats send as column
+# tables; see tasks.wire.
+REQUEST_TABLES = (('tasks',),)
+SUGGEST_REQUEST_TABLES = (('tasks',), ('upsert',))
+RESPONSE_TABLES = {
+    'analyze': (('tasks',),),
+    'suggest': (('recommendations',),),
+    'dependency-graph': (('graph', 'nodes'), ('graph', 'edges')),
+}
+
+def _encoded_response(endpoint, payload, status, fmt):
+    if fmt == 'json':
+        return JsonResponse(payload, status=status)
+    content = encode_payload(payload, fmt, RESPONSE_TABLES.get(endpoint, ()))
+    return HttpResponse(content, status=status, content_type=FORMAT_CONTENT_TYPES[fmt])
+
+def _request_bytes(request):
+    # What a result cache key hashes for a request's tasks: the body of a
+    # POST, or the raw 'tasks' query parameter of a GET.
+    if request.method == 'POST':
+        return request.body
+    return request.GET.get('tasks', '').encode()
+
+def _cached_response(endpoint, tasks, params, compute, fmt='json'):
+    # compute(today) returns (payload, status), encoded in the negotiated
+    # wire format. Responses are cached as encoded bytes, so a hit skips
+    # validation, cycle detection, scoring and encoding. Unexpected errors
+    # propagate and are never cached. The reference date is read once, so
+    # the key and the scores always agree. ``tasks`` is keyed on as given,
+    # usually the raw request bytes (see ResultCache.make_key).
+    today = date.today()
+    if result_cache is None:
+        payload, status = compute(today)
+        with stage('serialize'):
+            return _encoded_response(endpoint, payload, status, fmt)
+
+    with stage('cache'):
+        key = result_cache.make_key(endpoint, tasks, scoring_date=today, wire=fmt, **params)
+        cached = result_cache.get(key)
+    if cached is not None:
+        status, content = cached
+        response = HttpResponse(content, status=status, content_type=FORMAT_CONTENT_TYPES[fmt])
+        response['X-Cache'] = 'HIT'
+        return response
+
+    payload, status = compute(today)
+    with stage('serialize'):
+        response = _encoded_response(endpoint, payload, status, fmt)
+    result_cache.set(key, (status, response.content), len(response.content))
+    response['X-Cache'] = 'MISS'
+    return response
+
+def _encode_cursor(endpoint, ranking_id, offset, page_size):
+    return urlsafe_b64encode(json.dumps([endpoint, ranking_id, offset, page_size]).encode()).decode()
+
+def _decode_cursor(cursor):
+    try:
+        endpoint, ranking_id, offset, page_size = json.loads(urlsafe_b64decode(cursor.encode()))
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if not all(isinstance(value, str) for value in (endpoint, ranking_id)) or \
+            not all(isinstance(value, int) for value in (offset, page_size)):
+        raise ValueError("Invalid cursor")
+    return endpoint, ranking_id, offset, page_size
+
+def _page_request(endpoint, data):
+    # (ranking id or None, offset, page_size) from an opaque 'cursor', or
+    # from 'page_size' and an optional 'offset'; None when the request is
+    # not paged. ``data`` is a request body or query dict. A cursor is only
+    # accepted by the endpoint that issued it.
+    if data.get('cursor') is not None:
+        issuer, ranking_id, offset, page_size = _decode_cursor(data['cursor'])
+        if issuer != endpoint:
+            raise ValueError(f"Cursor was issued by {issuer}, not {endpoint}")
+    elif data.get('page_size') is not None:
+        try:
+            ranking_id, offset, page_size = None, int(data.get('offset', 0)), int(data['page_size'])
+        except (TypeError, ValueError):
+            raise ValueError("page_size and offset must be integers")
+    else:
+        return None
+    if not 1 <= page_size <= MAX_PAGE_SIZE or offset < 0:
+        raise ValueError(f"page_size must be between 1 and {MAX_PAGE_SIZE}, offset at least 0")
+    return ranking_id, offset, page_size
+
+def _page_payload(endpoint, payload, ranking_id, offset, page_size):
+    # The tables of ``payload`` (RESPONSE_TABLES) cut to one page; graph
+    # nodes and edges share the offset. The graph summary is only sent
+    # with the first page.
+    more = []
+
+    def cut(rows):
+        more.append(offset + page_size < len(rows))
+        return rows[offset:offset + page_size]
+
+    page = _replace_tables(payload, RESPONSE_TABLES[endpoint], cut)
+    if offset and isinstance(page.get('graph'), dict):
+        page['graph'].pop('analysis', None)
+    page['page'] = {
+        'offset': offset,
+        'page_size': page_size,
+        'next_cursor': _encode_cursor(endpoint, ranking_id, offset + page_size, page_size) if any(more) else None
+    }
+    return page
+
+def _ranking_size(endpoint, payload):
+    # Approximate memory held by a stored result: its tables dominate.
+    sizes = []
+    _replace_tables(payload, RESPONSE_TABLES[endpoint], lambda rows: sizes.append(approximate_size(rows)))
+    return sum(sizes)
+
+def _paged_response(endpoint, tasks, params, compute, page, fmt='json'):
+    # One page of a full result. The result is kept in ``rankings`` under a
+    # digest of the request without its paging fields, so later pages,
+    # whether by cursor or by offset, are cut from it without rescoring. A
+    # cursor names the stored result, so it needs no tasks; once that has
+    # expired, the request must be repeated with them (409). Stored results
+    # are keyed per endpoint and sized by their tables (TASKS_RANKINGS
+    # MAX_BYTES). Pages bypass the result cache.
+    ranking_id, offset, page_size = page
+    today = date.today()
+    if ranking_id is None:
+        ranking_id = digest([endpoint, today.isoformat(), params, tasks])
+
+    payload = None
+    if rankings is not None:
+        with stage('cache'):
+            payload = rankings.get(f"{endpoint}:{ranking_id}")
+    if payload is None:
+        if tasks is None:
+            return JsonResponse({"error": "Cursor has expired; repeat the request with the tasks"}, status=409)
+        payload, status = compute(today)
+        if status != 200:
+            with stage('serialize'):
+                return _encoded_response(endpoint, payload, status, fmt)
+        if rankings is not None:
+            rankings.set(f"{endpoint}:{ranking_id}", payload, _ranking_size(endpoint, payload))
+
+    with stage('serialize'):
+        return _encoded_response(endpoint, _page_payload(endpoint, payload, ranking_id, offset, page_size), 200, fmt)
+
+def _negotiated(view):
+    # Compact formats are chosen through the Accept header, so caches must
+    # not serve one format for another.
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+    return wrapped
+
+def _flag(value, name):
+    # Booleans from JSON bodies or query strings.
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in ('true', '1', 'false', '0'):
+        return value.lower() in ('true', '1')
+    raise ValueError(f"{name} must be true or false")
+
+def _validate_tasks(tasks):
+    for task in tasks:
+        error = task_data_error(task)
+        if error:
+            return error
+    return None
+
+def _prepared_tasks(tasks, scoring=True):
+    # (prepared, None), or (None, error payload and status) when a task
+    # fails validation. The prepared set is passed to every later stage.
+    with stage('validate'):
+        try:
+            return prepare_tasks(tasks, validate=True, scoring=scoring), None
+        except TaskDataError as e:
+            return None, ({"error": str(e)}, 400)
+
+def _analyze_payload(tasks, strategy, impact, fields, verbose, today):
+    prepared, error = _prepared_tasks(tasks)
+    if error:
+        return error
+
+    with stage('cycles'):
+        has_cycle, cycles = detect_circular_dependencies(prepared)
+    if has_cycle:
+        return {"error": "Circular dependencies detected", "cycles": cycles}, 400
+
+    if parallel_scorer is not None:
+        analyzed = parallel_scorer.analyze(prepared, strategy, today=today, impact=impact, fields=fields,
+                                           verbose=verbose)
+    else:
+        analyzed = analyze_tasks(prepared, strategy, today=today, impact=impact, fields=fields, verbose=verbose)
+
+    return {
+        "strategy": strategy,
+        "impact": impact,
+        "tasks": analyzed,
+        "total_tasks": len(analyzed)
+    }, 200
+
+def _analyze_batch_payload(tasks, strategies, impact, today):
+    prepared, error = _prepared_tasks(tasks)
+    if error:
+        return error
+
+    with stage('cycles'):
+        has_cycle, cycles = detect_circular_dependencies(prepared)
+    if has_cycle:
+        return {"error": "Circular dependencies detected", "cycles": cycles}, 400
+
+    analyzed = analyze_strategies(prepared, strategies, today=today, impact=impact)
+
+    return {
+        "strategies": strategies,
+        "impact": impact,
+        "tasks": analyzed['tasks'],
+        "rankings": analyzed['rankings'],
+        "total_tasks": len(analyzed['tasks'])
+    }, 200
+
+def _suggest_payload(tasks, strategy, limit, impact, verbose, today, list_id=None):
+    with stage('cycles'):
+        prepared = prepare_tasks(tasks)
+        has_cycle, cycles = detect_circular_dependencies(prepared)
+    if has_cycle:
+        return {"error": "Circular dependencies detected", "cycles": cycles}, 400
+
+    result = get_top_recommendations(prepared, strategy, limit, today, impact, verbose)
+
+    payload = {
+        "strategy": strategy,
+        "impact": impact,
+        "recommendations": result['recommendations'],
+        "total_considered": len(tasks)
+    }
+    if list_id is not None:
+        payload["list_id"] = list_id
+    return payload, 200
+
+def _posted_task_list(data, body):
+    # (tasks, list_id) for a suggest body. The body holds either the full
+    # "tasks" list, or a "base" plus "upsert" tasks and "remove" ids. The
+    # base is a list_id from an earlier response or {"project": name}. A
+    # full list's id hashes the raw ``body``, so the tasks are never
+    # re-serialized. list_id is None when task lists are disabled. Raises
+    # ValueError for malformed bodies, LookupError when the base list is
+    # unknown or expired and Project.DoesNotExist for an unknown project.
+    if 'base' not in data:
+        tasks = data.get('tasks', [])
+        if not isinstance(tasks, list):
+            raise ValueError("Tasks must be a list")
+        return tasks, None if task_lists is None else digest('tasks', body)
+
+    base = data['base']
+    upsert = data.get('upsert', [])
+    remove = data.get('remove', [])
+    if not isinstance(upsert, list) or not isinstance(remove, list):
+        raise ValueError("Upsert and remove must be lists")
+    with stage('validate'):
+        error = _validate_tasks(upsert)
+    if error:
+        raise ValueError(error)
+
+    if isinstance(base, dict) and isinstance(base.get('project'), str):
+        stored = Project.objects.get(name=base['project'])
+        tasks = apply_task_changes(iter_exported_tasks(stored), upsert, remove)
+        return tasks, None if task_lists is None else digest(tasks)
+    if not isinstance(base, str):
+        raise ValueError('Base must be a list_id or {"project": name}')
+    if task_lists is None:
+        raise ValueError("Base lists are disabled; send the full task list")
+
+    base_tasks = task_lists.get(base)
+    if base_tasks is None:
+        raise LookupError("Unknown or expired base list; send the full task list")
+    return apply_task_changes(base_tasks, upsert, remove), digest([base, upsert, remove])
+
+def _dependency_graph_payload(tasks):
+    prepared, error = _prepared_tasks(tasks, scoring=False)
+    if error:
+        return error
+
+    with stage('graph'):
+        graph = analyze_dependency_graph(prepared)
+
+    return {
+        "success": True,
+        "graph": graph,
+        "total_tasks": len(tasks)
+    }, 200
+
+def _schedule_payload(tasks):
+    prepared, error = _prepared_tasks(tasks, scoring=False)
+    if error:
+        return error
+
+    with stage('cycles'):
+        has_cycle, cycles = detect_circular_dependencies(prepared, stop_at_first=True)
+    if has_cycle:
+        return {"error": "Circular dependencies detected", "cycles": cycles}, 400
+
+    return {
+        "success": True,
+        "schedule": task_schedule(prepared),
+        "total_tasks": len(tasks)
+    }, 200
+
+def _project_graph_index(project):
+    # The loaded index, or one seeded from the stored project; None when
+    # neither exists.
+    index = graph_indexes.get(project)
+    if index is None:
+        stored = Project.objects.filter(name=project).first()
+        if stored is not None:
+            index = graph_indexes.load(project, iter_exported_tasks(stored))
+    return index
+
+def _analyze_ndjson(request):
+    # One task per line in, one scored task per line out, in rank order. The
+    # request body is consumed as a stream instead of through request.body.
+    # 'fields' and 'verbose' come from the query string as in JSON mode;
+    # transitive impact needs the whole graph in memory, which this mode
+    # avoids, so only direct impact is accepted.
+    strategy = request.GET.get('strategy', 'smart_balance')
+
+    try:
+        with stage('parse'):
+            fields = resolve_fields(request.GET.get('fields'))
+            verbose = _flag(request.GET.get('verbose', True), 'verbose')
+            if resolve_impact(request.GET.get('impact')) != 'direct':
+                return JsonResponse({"error": "NDJSON analysis supports only direct impact"}, status=400)
+            spool = ingest_ndjson_tasks(request)
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    try:
+        if not spool.file.tell():
+            return JsonResponse({"error": "No tasks provided"}, status=400)
+
+        with stage('cycles'):
+            cycles = find_cycles(spool.graph)
+        if cycles:
+            return JsonResponse({"error": "Circular dependencies detected", "cycles": cycles}, status=400)
+
+        with stage('score'):
+            output, index = rank_spooled_tasks(spool, strategy, date.today(), fields, verbose)
+    finally:
+        spool.close()
+
+    # ASGI servers need an async iterator to stream without buffering.
+    lines = AsyncRankedLines(output, index) if isinstance(request, ASGIRequest) else iter_ranked_lines(output, index)
+    response = StreamingHttpResponse(lines, content_type=NDJSON_CONTENT_TYPE)
+    response['X-Strategy'] = strategy
+    response['X-Total-Tasks'] = str(len(index))
+    return response
+
+@offload(endpoint_limiters['analyze'])
 @csrf_exempt
 @require_http_methods(["POST"])
+@instrument_stages
+@_negotiated
 def analyze_tasks_view(request):
     try:
-        data = json.loads(request.body)
+        if request.content_type == NDJSON_CONTENT_TYPE:
+            return _analyze_ndjson(request)
+
+        fmt = response_format(request.headers.get('Accept'))
+        with stage('parse'):
+            data = decode_payload(request.body, request_format(request.content_type), REQUEST_TABLES)
         tasks = data.get('tasks', [])
         strategy = data.get('strategy', 'smart_balance')
 
+        try:
+            page = _page_request('analyze', data)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        if page is not None and page[0] is not None and 'tasks' not in data:
+            return _paged_response('analyze', None, None, None, page, fmt)
+
         if not isinstance(tasks, list):
             return JsonResponse({"error": "Tasks must be a list"}, status=400)
 
         if not tasks:
             return JsonResponse({"error": "No tasks provided"}, status=400)
 
-        for task in tasks:
-            if 'id' not in task or 'title' not in task:
-                return JsonResponse({"error": "Each task must have id and title"}, status=400)
-            if not isinstance(task.get('dependencies', []), list):
-                return JsonResponse({"error": "Dependencies must be a list"}, status=400)
+        try:
+            impact = resolve_impact(data.get('impact'))
+            fields = resolve_fields(data.get('fields'))
+            verbose = _flag(data.get('verbose', True), 'verbose')
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
 
-        has_cycle, cycles = detect_circular_dependencies(tasks)
-        if has_cycle:
-            return JsonResponse({"error": "Circular dependencies detected", "cycles": cycles}, status=400)
+        params = {'strategy': strategy, 'impact': impact, 'fields': fields, 'verbose': verbose}
+        compute = lambda today: _analyze_payload(tasks, strategy, impact, fields, verbose, today)
+        if page is not None:
+            return _paged_response('analyze', tasks, params, compute, page, fmt)
+        return _cached_response('analyze', _request_bytes(request), params, compute, fmt)
 
-        analyzed = analyze_tasks(tasks, strategy)
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    except WireFormatError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
+    except Exception as e:
+        return JsonResponse({"error": f"Processing error: {str(e)}"}, status=500)
 
-        return JsonResponse({
-            "strategy": strategy,
-            "tasks": analyzed,
-            "total_tasks": len(analyzed)
-        })
+@offload(endpoint_limiters['analyze'])
+@csrf_exempt
+@require_http_methods(["POST"])
+@instrument_stages
+def analyze_batch_view(request):
+    # Rankings for several weight vectors from one request; see
+    # resolve_strategies for the accepted 'strategies' forms.
+    try:
+        with stage('parse'):
+            data = json.loads(request.body)
+        tasks = data.get('tasks', [])
+
+        if not isinstance(tasks, list):
+            return JsonResponse({"error": "Tasks must be a list"}, status=400)
+
+        if not tasks:
+            return JsonResponse({"error": "No tasks provided"}, status=400)
+
+        strategies = resolve_strategies(data.get('strategies'))
+        impact = resolve_impact(data.get('impact'))
+
+        params = {'strategies': strategies, 'impact': impact}
+        return _cached_response('analyze-batch', _request_bytes(request), params,
+                                lambda today: _analyze_batch_payload(tasks, strategies, impact, today))
 
     except json.JSONDecodeError:
         return JsonResponse({"error": "Invalid JSON"}, status=400)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
     except Exception as e:
         return JsonResponse({"error": f"Processing error: {str(e)}"}, status=500)
 
-@require_http_methods(["GET"])
+@offload(endpoint_limiters['suggest'])
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+@instrument_stages
+@_negotiated
 def suggest_tasks_view(request):
+    # GET takes the task list as a JSON query parameter and is kept for
+    # existing clients. POST takes the same parameters in the body, where
+    # repeat calls can send only what changed; see _posted_task_list. The
+    # result cache keys on the list_id when there is one.
     try:
-        tasks_json = request.GET.get('tasks')
-        strategy = request.GET.get('strategy', 'smart_balance')
-        limit = min(int(request.GET.get('limit', 3)), 10)
+        fmt = response_format(request.headers.get('Accept'))
+        list_id = None
 
-        if not tasks_json:
+        if request.method == 'POST':
+            with stage('parse'):
+                data = decode_payload(request.body, request_format(request.content_type), SUGGEST_REQUEST_TABLES)
+            if not isinstance(data, dict):
+                return JsonResponse({"error": "Expected an object"}, status=400)
+            strategy = data.get('strategy', 'smart_balance')
+            limit = min(int(data.get('limit', 3)), 10)
+            impact_value = data.get('impact')
+            verbose_value = data.get('verbose', True)
+
+            try:
+                tasks, list_id = _posted_task_list(data, request.body)
+            except LookupError as e:
+                return JsonResponse({"error": str(e)}, status=409)
+            except Project.DoesNotExist:
+                return JsonResponse({"error": "Project not found"}, status=404)
+            except ValueError as e:
+                return JsonResponse({"error": str(e)}, status=400)
+        else:
+            tasks_json = request.GET.get('tasks')
+            strategy = request.GET.get('strategy', 'smart_balance')
+            limit = min(int(request.GET.get('limit', 3)), 10)
+            impact_value = request.GET.get('impact')
+            verbose_value = request.GET.get('verbose', True)
+
+            if not tasks_json:
+                return JsonResponse({"error": "Tasks parameter required"}, status=400)
+
+            with stage('parse'):
+                tasks = json.loads(tasks_json)
+
+            if not isinstance(tasks, list):
+                return JsonResponse({"error": "Tasks must be a list"}, status=400)
+
+        try:
+            impact = resolve_impact(impact_value)
+            verbose = _flag(verbose_value, 'verbose')
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        if list_id is not None:
+            task_lists.set(list_id, tasks, approximate_size(tasks))
+
+        params = {'strategy': strategy, 'limit': limit, 'impact': impact, 'verbose': verbose}
+        return _cached_response(
+            'suggest', _request_bytes(request) if list_id is None else [list_id], params,
+            lambda today: _suggest_payload(tasks, strategy, limit, impact, verbose, today, list_id), fmt
+        )
+
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid tasks JSON"}, status=400)
+    except WireFormatError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
+    except Exception as e:
+        return JsonResponse({"error": f"Processing error: {str(e)}"}, status=500)
+
+@offload(endpoint_limiters['dependency-graph'])
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+@instrument_stages
+@_negotiated
+def dependency_graph_view(request):
+    try:
+        fmt = response_format(request.headers.get('Accept'))
+        with stage('parse'):
+            if request.method == 'POST':
+                data = decode_payload(request.body, request_format(request.content_type), REQUEST_TABLES)
+                tasks = data.get('tasks', [])
+            else:
+                data = request.GET
+                tasks_json = data.get('tasks')
+                tasks = json.loads(tasks_json) if tasks_json else None
+
+        try:
+            page = _page_request('dependency-graph', data)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        if page is not None and page[0] is not None and 'tasks' not in data:
+            return _paged_response('dependency-graph', None, None, None, page, fmt)
+
+        if tasks is None:
             return JsonResponse({"error": "Tasks parameter required"}, status=400)
 
-        tasks = json.loads(tasks_json)
+        if not isinstance(tasks, list):
+            return JsonResponse({"error": "Tasks must be a list"}, status=400)
+
+        compute = lambda today: _dependency_graph_payload(tasks)
+        if page is not None:
+            return _paged_response('dependency-graph', tasks, {}, compute, page, fmt)
+        return _cached_response('dependency-graph', _request_bytes(request), {}, compute, fmt)
+
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON format"}, status=400)
+    except WireFormatError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
+    except Exception as e:
+        return JsonResponse({"error": f"Processing error: {str(e)}"}, status=500)
+
+@offload(endpoint_limiters['dependency-graph'])
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+@instrument_stages
+def schedule_view(request):
+    try:
+        with stage('parse'):
+            if request.method == 'POST':
+                data = json.loads(request.body)
+                tasks = data.get('tasks', [])
+            else:
+                tasks_json = request.GET.get('tasks')
+                if not tasks_json:
+                    return JsonResponse({"error": "Tasks parameter required"}, status=400)
+                tasks = json.loads(tasks_json)
 
         if not isinstance(tasks, list):
             return JsonResponse({"error": "Tasks must be a list"}, status=400)
 
-        has_cycle, cycles = detect_circular_dependencies(tasks)
-        if has_cycle:
-            return JsonResponse({"error": "Circular dependencies detected", "cycles": cycles}, status=400)
+        return _cached_response('schedule', _request_bytes(request), {},
+                                lambda today: _schedule_payload(tasks))
+
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON format"}, status=400)
+    except Exception as e:
+        return JsonResponse({"error": f"Processing error: {str(e)}"}, status=500)
+
+@csrf_exempt
+@require_http_methods(["POST"])
+@instrument_stages
+def project_tasks_view(request, project):
+    try:
+        data = json.loads(request.body)
+        tasks = data.get('tasks', [])
+
+        if not isinstance(tasks, list):
+            return JsonResponse({"error": "Tasks must be a list"}, status=400)
+
+        result = upsert_tasks(get_project(project), tasks)
+
+        return JsonResponse({"project": project, **result})
+
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    except CircularDependencyError as e:
+        return JsonResponse({"error": str(e), "cycles": e.cycles}, status=400)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({"error": f"Processing error: {str(e)}"}, status=500)
+
+@csrf_exempt
+@require_http_methods(["DELETE"])
+@instrument_stages
+def project_task_detail_view(request, project, task_id):
+    try:
+        stored = Project.objects.filter(name=project).first()
+        if stored is None:
+            return JsonResponse({"error": "Project not found"}, status=404)
+
+        result = delete_tasks(stored, [task_id])
+        if not result['deleted']:
+            return JsonResponse({"error": "Task not found"}, status=404)
 
-        result = get_top_recommendations(tasks, strategy, limit)
+        return JsonResponse({"project": project, **result})
+
+    except Exception as e:
+        return JsonResponse({"error": f"Processing error: {str(e)}"}, status=500)
+
+@require_http_methods(["GET"])
+@instrument_stages
+def project_suggest_view(request, project):
+    try:
+        strategy = request.GET.get('strategy', 'smart_balance')
+        limit = min(int(request.GET.get('limit', 3)), 10)
+
+        stored = Project.objects.filter(name=project).first()
+        if stored is None:
+            return JsonResponse({"error": "Project not found"}, status=404)
+
+        result = stored_recommendations(stored, strategy, limit)
 
         return JsonResponse({
             "strategy": strategy,
             "recommendations": result['recommendations'],
-            "total_considered": len(tasks)
+            "total_considered": result['total_tasks_analyzed']
         })
 
-    except json.JSONDecodeError:
-        return JsonResponse({"error": "Invalid tasks JSON"}, status=400)
     except Exception as e:
         return JsonResponse({"error": f"Processing error: {str(e)}"}, status=500)
 
-@require_http_methods(["GET", "POST"])
-def dependency_graph_view(request):
+@csrf_exempt
+@require_http_methods(["GET", "PUT"])
+@instrument_stages
+def project_graph_view(request, project):
+    # GET renders the project's graph index, seeding it from the store on
+    # first use; with ?focus=<task id> only that task's neighborhood, see
+    # GraphIndex.neighborhood ('depth' and 'direction'). PUT replaces the
+    # index with the tasks in the body. Responses carry the index version,
+    # also as the ETag, for later deltas.
     try:
-        if request.method == 'POST':
-            data = json.loads(request.body)
+        if request.method == 'PUT':
+            with stage('parse'):
+                data = json.loads(request.body)
             tasks = data.get('tasks', [])
-        else:
-            tasks_json = request.GET.get('tasks')
-            if not tasks_json:
-                return JsonResponse({"error": "Tasks parameter required"}, status=400)
-            tasks = json.loads(tasks_json)
 
-        if not isinstance(tasks, list):
-            return JsonResponse({"error": "Tasks must be a list"}, status=400)
+            if not isinstance(tasks, list):
+                return JsonResponse({"error": "Tasks must be a list"}, status=400)
+
+            with stage('validate'):
+                error = _validate_tasks(tasks)
+            if error:
+                return JsonResponse({"error": error}, status=400)
 
-        for task in tasks:
-            if 'id' not in task or 'title' not in task:
-                return JsonResponse({"error": "Each task must have id and title"}, status=400)
-            if not isinstance(task.get('dependencies', []), list):
-                return JsonResponse({"error": "Dependencies must be a list"}, status=400)
+            with stage('graph'):
+                index = graph_indexes.load(project, tasks)
+        else:
+            with stage('graph'):
+                index = _project_graph_index(project)
+            if index is None:
+                return JsonResponse({"error": "Project not found"}, status=404)
 
-        graph = analyze_dependency_graph(tasks)
+        focus = request.GET.get('focus') if request.method == 'GET' else None
+        if focus is not None:
+            try:
+                depth = request.GET.get('depth')
+                depth = None if depth is None else int(depth)
+            except ValueError:
+                return JsonResponse({"error": "Depth must be an integer"}, status=400)
 
-        return JsonResponse({
+        with stage('graph'), index.lock:
+            version = index.version
+            if focus is None:
+                graph = index.snapshot()
+            else:
+                try:
+                    graph = index.neighborhood(focus, depth, request.GET.get('direction', 'both'))
+                except KeyError:
+                    return JsonResponse({"error": "Task not found"}, status=404)
+                except ValueError as e:
+                    return JsonResponse({"error": str(e)}, status=400)
+
+        response = JsonResponse({
             "success": True,
+            "project": project,
+            "version": version,
             "graph": graph,
-            "total_tasks": len(tasks)
+            "total_tasks": len(graph['nodes'])
         })
+        response['ETag'] = f'"{version}"'
+        return response
 
     except json.JSONDecodeError:
-        return JsonResponse({"error": "Invalid JSON format"}, status=400)
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    except Exception as e:
+        return JsonResponse({"error": f"Processing error: {str(e)}"}, status=500)
+
+@csrf_exempt
+@require_http_methods(["POST"])
+@instrument_stages
+def project_graph_delta_view(request, project):
+    # Applies {"ops": [...], "version": ...} to the project's graph index and
+    # returns only the nodes and edges that changed; see GraphIndex.apply.
+    # The version (or an If-Match header) must be the one of the snapshot
+    # or delta the client last saw; otherwise the index is not the graph
+    # the client holds and the ops are rejected with 409.
+    try:
+        with stage('parse'):
+            data = json.loads(request.body)
+        expected = data.get('version') or request.headers.get('If-Match', '').strip('"') or None
+        if expected is None:
+            return JsonResponse({"error": "Version required; send the version of your last snapshot"},
+                                status=428)
+
+        with stage('graph'):
+            index = _project_graph_index(project)
+        if index is None:
+            return JsonResponse({"error": "Project not found"}, status=404)
+
+        with stage('graph'), index.lock:
+            if index.version != expected:
+                return JsonResponse({"error": "Graph has changed; fetch a new snapshot",
+                                     "version": index.version}, status=409)
+            delta = index.apply(data.get('ops'))
+            version = index.version
+
+        response = JsonResponse({"success": True, "project": project, "version": version, "delta": delta})
+        response['ETag'] = f'"{version}"'
+        return response
+
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
     except Exception as e:
         return JsonResponse({"error": f"Processing error: {str(e)}"}, status=500)
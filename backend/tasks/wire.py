@@ -0,0 +1,247 @@
+from itertools import accumulate, chain, count, repeat
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_CONTENT_TYPE = 'application/json'
+COLUMNAR_CONTENT_TYPE = 'application/vnd.tasks.columnar+json'
+MSGPACK_CONTENT_TYPE = 'application/msgpack'
+
+CONTENT_TYPES = {
+    JSON_CONTENT_TYPE: 'json',
+    COLUMNAR_CONTENT_TYPE: 'columnar',
+    MSGPACK_CONTENT_TYPE: 'msgpack',
+    'application/x-msgpack': 'msgpack',
+    'application/vnd.msgpack': 'msgpack',
+}
+FORMAT_CONTENT_TYPES = {
+    'json': JSON_CONTENT_TYPE,
+    'columnar': COLUMNAR_CONTENT_TYPE,
+    'msgpack': MSGPACK_CONTENT_TYPE,
+}
+FORMATS = tuple(FORMAT_CONTENT_TYPES)
+
+# Compact formats turn lists of task-like dicts into column tables:
+#
+#     {"rows": 2,
+#      "columns": {"id": ["t1", "t2"], "dependencies": {"offsets": [0, 0, 1], "values": [0]}, ...},
+#      "interned": ["dependencies"]}
+#
+# String columns where at least half the values repeat (due dates,
+# explanations) and columns of string lists (dependencies) hold indexes into
+# one "string_table" at the top of the payload, shared by every table in
+# it; field names are sent once per table rather than once per row. Mostly
+# unique strings such as titles stay inline, since interning them only adds
+# work. String lists are sent flat: row i's items are
+# values[offsets[i]:offsets[i + 1]]. Which payload fields hold tables is
+# fixed per endpoint. 'columnar' sends that layout as JSON, 'msgpack' as
+# MessagePack. A null and a missing field are the same on this wire, and a
+# null string list comes back empty.
+
+STRING_TABLE = 'string_table'
+
+
+class WireFormatError(ValueError):
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _intern(strings: Dict[str, int], values: Iterable[str]) -> None:
+    new = [value for value in dict.fromkeys(values) if value not in strings]
+    strings.update(zip(new, count(len(strings))))
+
+
+def _split_columns(rows: Sequence[Dict]) -> Tuple[List, List[List]]:
+    # Rows usually share the first row's keys; then every column is one
+    # C-level itemgetter pass. A missing key sends any row set down the
+    # general path.
+    names = list(rows[0]) if rows else []
+    if set(map(len, rows)) <= {len(names)}:
+        try:
+            return names, [list(map(itemgetter(name), rows)) for name in names]
+        except KeyError:
+            pass
+    names = list(dict.fromkeys(chain.from_iterable(rows)))
+    return names, [[row.get(name) for row in rows] for name in names]
+
+
+def _pack_table(rows: Sequence[Dict], strings: Dict[str, int]) -> Dict:
+    # strings maps each interned string to its position. The per-value work
+    # runs through C-level map/zip/dict calls, and string lists are sent
+    # flat, like TaskTable's dependency arrays, so packing allocates a
+    # handful of large lists rather than one small object per row.
+    columns = {}
+    interned = []
+    position = strings.__getitem__
+    for name, values in zip(*_split_columns(rows)):
+        kinds = set(map(type, values))
+        nullable = type(None) in kinds
+        kinds.discard(type(None))
+        if kinds == {str} and len(set(values)) * 2 <= len(values):
+            _intern(strings, (value for value in values if value is not None) if nullable else values)
+            if nullable:
+                columns[name] = [None if value is None else position(value) for value in values]
+            else:
+                columns[name] = list(map(position, values))
+            interned.append(name)
+        elif kinds == {list} and set(map(type, chain.from_iterable(filter(None, values)))) <= {str}:
+            flat = list(chain.from_iterable(filter(None, values)))
+            _intern(strings, flat)
+            columns[name] = {
+                'offsets': list(accumulate((len(value) if value else 0 for value in values), initial=0)),
+                'values': list(map(position, flat))
+            }
+            interned.append(name)
+        else:
+            columns[name] = values
+    return {'rows': len(rows), 'columns': columns, 'interned': interned}
+
+
+def _unpack_table(table: Any, strings: List[str], max_rows: int = 0) -> List[Dict]:
+    try:
+        columns = table['columns']
+        rows = table['rows']
+        interned = set(table.get('interned', ()))
+        names = list(columns)
+        # 'rows' comes from the client and sizes the result, so it must
+        # agree with the columns. A table without columns is a list of empty
+        # rows, which nothing else bounds, so it may have at most max_rows.
+        if type(rows) is not int or rows < 0:
+            raise WireFormatError("Table 'rows' must match its columns")
+        if not names and rows > max_rows:
+            raise WireFormatError("Table 'rows' exceeds the size of the body")
+        values = []
+        nullable = []
+        lookup = strings.__getitem__
+        for name in names:
+            column = columns[name]
+            if isinstance(column, dict) and name in interned:
+                flat = list(map(lookup, column['values']))
+                offsets = column['offsets']
+                column = list(map(flat.__getitem__, map(slice, offsets, offsets[1:])))
+            elif name in interned:
+                if None in column:
+                    column = [None if value is None else lookup(value) for value in column]
+                    nullable.append((name, column))
+                else:
+                    column = list(map(lookup, column))
+            elif None in column:
+                nullable.append((name, column))
+            if len(column) != rows:
+                raise WireFormatError(f"Column '{name}' has {len(column)} values, expected {rows}")
+            values.append(column)
+    except WireFormatError:
+        raise
+    except (KeyError, TypeError, IndexError, AttributeError):
+        raise WireFormatError("Malformed column table")
+
+    if not names:
+        return [{} for _ in range(rows)]
+    result = list(map(dict, map(zip, repeat(names), zip(*values))))
+    for name, column in nullable:
+        for row, value in zip(result, column):
+            if value is None:
+                del row[name]
+    return result
+
+
+def _replace_tables(payload: Dict, paths: Iterable[Tuple[str, ...]], convert) -> Dict:
+    # Copies only the dicts along each path, so the caller's payload is left
+    # untouched.
+    payload = dict(payload)
+    for path in paths:
+        parent = payload
+        for key in path[:-1]:
+            if not isinstance(parent.get(key), dict):
+                break
+            parent[key] = parent = dict(parent[key])
+        else:
+            if path[-1] in parent:
+                parent[path[-1]] = convert(parent[path[-1]])
+    return payload
+
+
+def pack_payload(payload: Dict, paths: Iterable[Tuple[str, ...]]) -> Dict:
+    strings = {}
+    packed = _replace_tables(
+        payload, paths,
+        lambda rows: _pack_table(rows, strings) if isinstance(rows, list) else rows
+    )
+    packed[STRING_TABLE] = list(strings)
+    return packed
+
+
+def unpack_payload(payload: Any, paths: Iterable[Tuple[str, ...]], max_rows: int = 0) -> Dict:
+    # max_rows bounds tables without columns; decode_payload passes the body
+    # size, as every other row costs at least a byte of the body.
+    if not isinstance(payload, dict):
+        raise WireFormatError("Expected an object")
+    strings = payload.get(STRING_TABLE, [])
+    unpacked = _replace_tables(payload, paths, lambda table: _unpack_table(table, strings, max_rows))
+    unpacked.pop(STRING_TABLE, None)
+    return unpacked
+
+
+def request_format(content_type: Optional[str]) -> str:
+    # Unknown types are read as JSON, as before formats were negotiated.
+    fmt = CONTENT_TYPES.get((content_type or '').lower(), 'json')
+    if fmt == 'msgpack' and msgpack is None:
+        raise WireFormatError("MessagePack bodies need the msgpack package", status=415)
+    return fmt
+
+
+def response_format(accept: Optional[str]) -> str:
+    # The supported type the Accept header ranks highest, JSON by default.
+    # Wildcards and unsupported types never select a compact format.
+    best, best_quality = 'json', 0.0
+    for position, item in enumerate((accept or '').split(',')):
+        media_type, *params = [part.strip() for part in item.split(';')]
+        fmt = CONTENT_TYPES.get(media_type.lower())
+        if fmt is None or fmt == 'msgpack' and msgpack is None:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > best_quality:
+            best, best_quality = fmt, quality
+    return best
+
+
+def _msgpack_default(value):
+    return DjangoJSONEncoder().default(value)
+
+
+def encode_payload(payload: Dict, fmt: str, paths: Iterable[Tuple[str, ...]] = ()) -> bytes:
+    if fmt == 'json':
+        return json.dumps(payload, cls=DjangoJSONEncoder).encode()
+    packed = pack_payload(payload, paths)
+    if fmt == 'msgpack':
+        return msgpack.packb(packed, default=_msgpack_default)
+    return json.dumps(packed, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+
+
+def decode_payload(body: bytes, fmt: str, paths: Iterable[Tuple[str, ...]] = ()) -> Any:
+    # Raises json.JSONDecodeError for malformed JSON, as the views expect.
+    if fmt == 'json':
+        return json.loads(body)
+    if fmt == 'msgpack':
+        try:
+            data = msgpack.unpackb(body, strict_map_key=False)
+        except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError):
+            raise WireFormatError("Invalid MessagePack")
+    else:
+        data = json.loads(body)
+    return unpack_payload(data, paths, len(body))
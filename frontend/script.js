@@ -5,6 +5,8 @@ class TaskManager {
         this.network = null;
         this.graphData = null;
         this.physicsEnabled = true;
+        this.PAGE_SIZE = 50;
+        this.nextCursor = null;
         this.initializeEventListeners();
         this.updateTaskCount();
     }
@@ -13,6 +15,7 @@ class TaskManager {
         document.getElementById('taskForm').addEventListener('submit', (e) => this.handleAddTask(e));
         document.getElementById('analyzeBtn').addEventListener('click', () => this.analyzeTasks());
         document.getElementById('suggestBtn').addEventListener('click', () => this.getSuggestions());
+        document.getElementById('moreResultsBtn').addEventListener('click', () => this.loadMoreResults());
         document.getElementById('loadJson').addEventListener('click', () => this.loadFromJson());
         document.getElementById('clearTasks').addEventListener('click', () => this.clearTasks());
         document.getElementById('showGraphBtn').addEventListener('click', () => this.showDependencyGraph());
@@ -95,7 +98,7 @@ class TaskManager {
             const response = await fetch(`${this.BACKEND_URL}/api/tasks/analyze/`, {
                 method: 'POST',
                 headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify({tasks: this.tasks, strategy})
+                body: JSON.stringify({tasks: this.tasks, strategy, page_size: this.PAGE_SIZE})
             });
 
             const data = await response.json();
@@ -112,6 +115,37 @@ class TaskManager {
         }
     }
 
+    async loadMoreResults() {
+        // Later pages come from the ranking the server kept for the first
+        // one, so only the cursor is sent.
+        if (!this.nextCursor) return;
+
+        this.showLoading();
+
+        try {
+            const response = await fetch(`${this.BACKEND_URL}/api/tasks/analyze/`, {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({cursor: this.nextCursor})
+            });
+
+            const data = await response.json();
+
+            if (response.status === 409) {
+                return this.analyzeTasks();
+            }
+            if (!response.ok) {
+                throw new Error(data.error || 'Analysis failed');
+            }
+
+            this.displayAnalysisResults(data, true);
+        } catch (error) {
+            this.showError(error.message);
+        } finally {
+            this.hideLoading();
+        }
+    }
+
     async getSuggestions() {
         if (this.tasks.length === 0) {
             this.showError('No tasks to analyze');
@@ -122,8 +156,11 @@ class TaskManager {
         const strategy = document.getElementById('strategy').value;
 
         try {
-            const tasksJson = encodeURIComponent(JSON.stringify(this.tasks));
-            const response = await fetch(`${this.BACKEND_URL}/api/tasks/suggest/?tasks=${tasksJson}&strategy=${strategy}`);
+            const response = await fetch(`${this.BACKEND_URL}/api/tasks/suggest/`, {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({tasks: this.tasks, strategy})
+            });
 
             const data = await response.json();
             
@@ -139,13 +176,15 @@ class TaskManager {
         }
     }
 
-    displayAnalysisResults(data) {
-        this.hideAllResults();
+    displayAnalysisResults(data, append = false) {
+        if (!append) {
+            this.hideAllResults();
+        }
         
         document.getElementById('currentStrategy').textContent = data.strategy;
         const resultsContainer = document.getElementById('tasksResults');
         
-        resultsContainer.innerHTML = data.tasks.map(task => {
+        const html = data.tasks.map(task => {
             const priorityClass = task.priority_score >= 75 ? 'high' : 
                                 task.priority_score >= 40 ? 'medium' : 'low';
             
@@ -161,7 +200,15 @@ class TaskManager {
                 </div>
             `;
         }).join('');
-        
+
+        if (append) {
+            resultsContainer.insertAdjacentHTML('beforeend', html);
+        } else {
+            resultsContainer.innerHTML = html;
+        }
+
+        this.nextCursor = data.page ? data.page.next_cursor : null;
+        document.getElementById('moreResultsBtn').classList.toggle('hidden', !this.nextCursor);
         document.getElementById('analysisResults').classList.remove('hidden');
     }
 
@@ -248,9 +295,11 @@ class TaskManager {
     this.showLoading();
 
     try {
-        const tasksJson = encodeURIComponent(JSON.stringify(this.tasks));
-
-        const response = await fetch(`${this.BACKEND_URL}/api/tasks/dependency-graph/?tasks=${tasksJson}`);
+        const response = await fetch(`${this.BACKEND_URL}/api/tasks/dependency-graph/`, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({tasks: this.tasks})
+        });
 
         if (!response.ok) {
             throw new Error(`HTTP ${response.status} - ${response.statusText}`);